@@ -0,0 +1,179 @@
+"""
+Approximate nearest-neighbour search over normalized embeddings (IVF).
+The vectors are partitioned by spherical k-means (NumPy only) into inverted
+lists; a query is compared only with the vectors of its `n_probe` closest
+centroids. More probes trade speed for recall, measured by recall() against
+the exact blocked scan of topk_search.
+
+An index is saved as a directory of .npy files plus meta.json and loaded with
+the vectors memory-mapped:
+  centroids.npy  (n_lists, dim) float32
+  vectors.npy    (n, dim) float32, grouped by list
+  ids.npy        (n,) original row of each stored vector
+  offsets.npy    (n_lists + 1,) start of each list in vectors.npy
+  meta.json      {"n_probe", "model", "labels"}
+
+Command line, e.g. which projects resemble a domain text:
+  python ann_index.py .cache/ann/projekty --text "Chytrá mobilita" -k 20
+  python ann_index.py .cache/ann/projekty --recall 1 2 4 8 16
+"""
+import argparse, json, sys
+from pathlib import Path
+import numpy as np
+from topk_search import blocked_topk, merge_topk, sort_topk
+
+
+def _nearest_centroid(vectors, centroids, block=8192):
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for lo in range(0, len(vectors), block):
+        assign[lo:lo + block] = (vectors[lo:lo + block] @ centroids.T).argmax(axis=1)
+    return assign
+
+
+class IvfIndex:
+    def __init__(self, centroids, vectors, ids, offsets, n_probe=8, model=None, labels=None):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.n_probe = n_probe
+        self.model = model
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, n_iter=15, sample=None, n_probe=8, seed=0,
+              model=None, labels=None):
+        """k-means on a sample of `vectors` (rows normalized), then every vector
+        is assigned to its closest centroid. Default n_lists ≈ 4·√n."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        n_lists = max(1, min(n, n_lists or int(4 * np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = min(n, sample or 64 * n_lists)
+        train = vectors[np.sort(rng.choice(n, sample, replace=False))]
+
+        centroids = train[rng.choice(len(train), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = _nearest_centroid(train, centroids)
+            order = np.argsort(assign, kind='stable')
+            counts = np.bincount(assign, minlength=n_lists)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.zeros_like(centroids)
+            present = counts > 0
+            sums[present] = np.add.reduceat(train[order], starts[present], axis=0)
+            empty = counts == 0
+            # Re-seed empty lists with random training vectors
+            sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+            centroids = sums / (np.linalg.norm(sums, axis=1, keepdims=True) + 1e-10)
+
+        assign = _nearest_centroid(vectors, centroids)
+        ids = np.argsort(assign, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        return cls(centroids.astype(np.float32), vectors[ids], ids, offsets,
+                   n_probe=n_probe, model=model, labels=labels)
+
+    def search(self, queries, k, n_probe=None, query_block=8192):
+        """(scores, ids) of approximately the k nearest vectors per query, best
+        first; ids are rows of the vectors passed to build(), -1 if fewer than
+        k vectors were probed."""
+        queries = np.asarray(queries, dtype=np.float32)
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        found = np.full((len(queries), k), -1, dtype=np.int64)
+        for q0 in range(0, len(queries), query_block):
+            q = queries[q0:q0 + query_block]
+            _, probe = blocked_topk(q, self.centroids, n_probe)
+            best_s = np.full((len(q), k), -np.inf, dtype=np.float32)
+            best_i = np.full((len(q), k), -1, dtype=np.int64)
+
+            # Visit each probed list once, with all the queries probing it
+            flat_list = probe.ravel()
+            flat_query = np.repeat(np.arange(len(q)), n_probe)
+            order = np.argsort(flat_list, kind='stable')
+            lists, starts = np.unique(flat_list[order], return_index=True)
+            ends = np.append(starts[1:], len(order))
+            for lst, lo_q, hi_q in zip(lists.tolist(), starts.tolist(), ends.tolist()):
+                lo, hi = int(self.offsets[lst]), int(self.offsets[lst + 1])
+                if lo == hi:
+                    continue
+                qs = flat_query[order[lo_q:hi_q]]
+                sims = q[qs] @ np.asarray(self.vectors[lo:hi]).T
+                best_s[qs], best_i[qs] = merge_topk(best_s[qs], best_i[qs], sims, lo, k)
+
+            best_s, best_i = sort_topk(best_s, best_i)
+            scores[q0:q0 + len(q)] = best_s
+            found[q0:q0 + len(q)] = np.where(best_i >= 0, self.ids[np.maximum(best_i, 0)], -1)
+        return scores, found
+
+    def recall(self, queries, k=10, n_probe=None):
+        """Mean fraction of the exact top-k found by search()."""
+        _, approx = self.search(queries, k, n_probe)
+        _, exact = blocked_topk(queries, np.asarray(self.vectors), k)
+        exact = self.ids[exact]
+        hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx, exact))
+        return hits / exact.size if exact.size else 1.0
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "centroids.npy", self.centroids)
+        np.save(path / "vectors.npy", np.asarray(self.vectors))
+        np.save(path / "ids.npy", self.ids)
+        np.save(path / "offsets.npy", self.offsets)
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"n_probe": self.n_probe, "model": self.model, "labels": self.labels},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with open(path / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(np.load(path / "centroids.npy"), np.load(path / "vectors.npy", mmap_mode='r'),
+                   np.load(path / "ids.npy"), np.load(path / "offsets.npy"),
+                   n_probe=meta["n_probe"], model=meta.get("model"), labels=meta.get("labels"))
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description='Query or evaluate a saved IVF index.')
+    parser.add_argument('index', help='index directory, e.g. .cache/ann/projekty')
+    parser.add_argument('--text', help='text to encode and search for')
+    parser.add_argument('-k', type=int, default=10, help='neighbours to return')
+    parser.add_argument('--probe', type=int, help='lists to probe (default: the index setting)')
+    parser.add_argument('--recall', type=int, nargs='+', metavar='PROBE',
+                        help='report recall@k vs exact search for these probe counts')
+    args = parser.parse_args()
+
+    index = IvfIndex.load(args.index)
+    print(f"{len(index)} vectors in {len(index.centroids)} lists, model {index.model}")
+
+    if args.recall:
+        import time
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(len(index), min(1000, len(index)), replace=False))
+        queries = np.asarray(index.vectors[sample])
+        for n_probe in args.recall:
+            t0 = time.time()
+            index.search(queries, args.k, n_probe)
+            elapsed = time.time() - t0
+            print(f"  probe {n_probe:4d}: recall@{args.k} {index.recall(queries, args.k, n_probe):.3f}, "
+                  f"{elapsed / len(queries) * 1000:.2f} ms/query")
+
+    if args.text:
+        from sentence_transformers import SentenceTransformer
+        from embedding_cache import EmbeddingCache
+        query = EmbeddingCache(index.model).encode(SentenceTransformer(index.model), [args.text])
+        query = query / np.linalg.norm(query, axis=1, keepdims=True)
+        scores, found = index.search(query, args.k, args.probe)
+        for score, row in zip(scores[0], found[0]):
+            if row >= 0:
+                label = index.labels[row] if index.labels else row
+                print(f"  {score:.4f}  {label}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Length-bucketed, token-budget batching for sentence-transformer encoding.
+Texts are sorted by token length (longest first), grouped into power-of-two
+length buckets and cut into batches whose padded size — items × longest
+item — stays within `max_tokens`. A batch never spans two buckets, so no text
+is padded to more than twice its length, and short
+project titles travel in large batches and long domain texts in small ones
+instead of every batch being padded to its longest member at a fixed item
+count. Embeddings are scattered back to the input order.
+
+Token lengths come from the model's tokenizer, capped at max_seq_length as
+the model truncates; models without a tokenizer fall back to a word count.
+With an EncodePool (encode_pool.py) the batches are encoded by its worker
+processes instead of `model`, which then only supplies the tokenizer.
+
+The baseline in the printed report is what a plain model.encode(texts,
+batch_size=N) does: SentenceTransformer already sorts the texts of one call by
+character length and cuts fixed batches of N, so the gain over it comes only
+from token (not character) lengths and the token budget per batch.
+Benchmark against model.encode on the project texts:
+  python batch_encode.py --bench --texts 20000 --batch-size 64
+"""
+import argparse, json, sys, time
+import numpy as np
+
+MAX_BATCH_TOKENS = 16384
+MAX_BATCH_SIZE = 512
+
+
+def token_lengths(model, texts, block=1024):
+    """Tokens per text as the model will see them (special tokens included)."""
+    tokenizer = getattr(model, "tokenizer", None)
+    max_len = getattr(model, "max_seq_length", None)
+    if tokenizer is None:
+        lengths = np.array([len(t.split()) + 2 for t in texts], dtype=np.int64)
+    else:
+        lengths = np.empty(len(texts), dtype=np.int64)
+        for lo in range(0, len(texts), block):
+            ids = tokenizer(list(texts[lo:lo + block]), add_special_tokens=True, truncation=False,
+                            return_attention_mask=False)["input_ids"]
+            lengths[lo:lo + block] = [len(x) for x in ids]
+    return np.minimum(lengths, max_len) if max_len else lengths
+
+
+def token_budget_batches(lengths, max_tokens=MAX_BATCH_TOKENS, max_batch=MAX_BATCH_SIZE):
+    """Index arrays of batches over texts sorted by length, longest first;
+    len(batch) × longest length ≤ max_tokens (a single over-long text still
+    gets its own batch) and all lengths of a batch share a power-of-two bucket."""
+    lengths = np.asarray(lengths)
+    order = np.argsort(-lengths, kind='stable')
+    bucket = np.log2(np.maximum(lengths[order], 1)).astype(np.int64)
+    bucket_ends = np.append(np.flatnonzero(np.diff(bucket)) + 1, len(order))
+    batches = []
+    lo = 0
+    for end in bucket_ends.tolist():
+        while lo < end:
+            # The first item of a batch is its longest
+            size = max(1, min(max_batch, max_tokens // max(1, int(lengths[order[lo]])), end - lo))
+            batches.append(order[lo:lo + size])
+            lo += size
+    return batches
+
+
+def padded_tokens(lengths, batches):
+    return sum(len(b) * int(lengths[b].max()) for b in batches)
+
+
+def model_encode_batches(texts, batch_size):
+    """Batches of SentenceTransformer.encode(texts, batch_size): texts sorted
+    by character length, longest first, in fixed batches of `batch_size`."""
+    order = np.argsort([-len(t) for t in texts], kind='stable')
+    return [order[lo:lo + batch_size] for lo in range(0, len(texts), batch_size)]
+
+
+def encode_batched(model, texts, max_tokens=MAX_BATCH_TOKENS, max_batch=MAX_BATCH_SIZE,
+                   show_progress_bar=False, baseline_batch_size=32, pool=None):
+    """Embeddings of `texts` in input order, encoded in token-budget batches.
+    Prints throughput and padding against model.encode(texts,
+    batch_size=baseline_batch_size)."""
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    lengths = token_lengths(model, texts)
+    batches = token_budget_batches(lengths, max_tokens, max_batch)
+    progress = batches
+    if show_progress_bar and pool is None:
+        try:
+            from tqdm import tqdm
+            progress = tqdm(batches, desc="Batches")
+        except ImportError:
+            pass
+
+    t0 = time.time()
+    out = None
+    if pool is not None:
+        progress = zip(batches, pool.map([[texts[i] for i in batch] for batch in batches]))
+    else:
+        progress = ((batch, model.encode([texts[i] for i in batch], batch_size=len(batch),
+                                         show_progress_bar=False, convert_to_numpy=True))
+                    for batch in progress)
+    for batch, vectors in progress:
+        if out is None:
+            out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        out[batch] = vectors
+    elapsed = time.time() - t0
+
+    real = int(lengths.sum())
+    padded = padded_tokens(lengths, batches)
+    fixed = padded_tokens(lengths, model_encode_batches(texts, baseline_batch_size))
+    workers = f" on {pool.n_workers} workers" if pool is not None else ""
+    print(f"  Encoded {len(texts)} texts in {len(batches)} batches{workers}: {real} tokens, "
+          f"{real / max(elapsed, 1e-9):.0f} tokens/s, padding {1 - real / padded:.1%} "
+          f"(model.encode, batch_size={baseline_batch_size}: {1 - real / fixed:.1%})")
+    return out
+
+
+def bench(n_texts, batch_size):
+    from sentence_transformers import SentenceTransformer
+    from encode_pool import MODEL_NAME
+    from json_stream import iter_json_array
+
+    texts = []
+    for p in iter_json_array("public/data/projekty_cep.json", "projekty"):
+        # As project_text() in compute_vav_semantic.py
+        text = p.get("nazev", "")
+        if p.get("klicova_slova"):
+            text += " " + p["klicova_slova"]
+        texts.append(text)
+        if len(texts) >= n_texts:
+            break
+    model = SentenceTransformer(MODEL_NAME)
+    lengths = token_lengths(model, texts)
+    real = int(lengths.sum())
+    print(f"{len(texts)} project texts, {real} tokens")
+
+    t0 = time.time()
+    reference = model.encode(texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+    runs = [("model.encode", time.time() - t0,
+             padded_tokens(lengths, model_encode_batches(texts, batch_size)), reference)]
+    t0 = time.time()
+    vectors = encode_batched(model, texts, baseline_batch_size=batch_size)
+    runs.append(("token budget", time.time() - t0,
+                 padded_tokens(lengths, token_budget_batches(lengths)), vectors))
+    for label, elapsed, padded, vecs in runs:
+        print(json.dumps({"setup": label, "tokens_per_s": round(real / elapsed),
+                          "padding": round(1 - real / padded, 4),
+                          "max_abs_diff": float(np.abs(vecs - reference).max())}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Token-budget batching and its benchmark.')
+    parser.add_argument('--bench', action='store_true',
+                        help='compare encode_batched with model.encode on the project texts')
+    parser.add_argument('--texts', type=int, default=20000, help='project texts to encode in the benchmark')
+    parser.add_argument('--batch-size', type=int, default=64, help='batch_size of the model.encode baseline')
+    args = parser.parse_args()
+    if args.bench:
+        sys.stdout.reconfigure(encoding='utf-8')
+        bench(args.texts, args.batch_size)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
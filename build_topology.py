@@ -0,0 +1,267 @@
+"""
+Build a quantized TopoJSON topology of kraje and okresy.
+Both layers are cut into arcs at junctions — points where rings meet with
+different neighbours — so every border shared by two okresy, two kraje or a
+kraj and its okresy is stored once, and the layers reference the same arcs.
+Coordinates are quantized to the grid of the source precision (0.001°, so
+nothing is lost) and arcs are delta-encoded as in the TopoJSON spec.
+
+Besides the full topology, coarser levels for smaller maps are simplified
+with Visvalingam–Whyatt on the shared arcs: junctions stay fixed and each
+border is simplified once, so neighbouring kraje and okresy keep matching
+edges and kraj borders stay on okres borders. A level drops vertices whose
+triangle is under about a square pixel on a map of its target width.
+
+Input:  data/src/kraje.geojson, data/src/okresy.geojson (build inputs, not deployed)
+Output: public/data/kraje_okresy.topo.json          full detail
+        public/data/kraje_okresy.<level>.topo.json  one per LEVELS entry
+        objects "kraje" and "okresy" (GeometryCollections with the original
+        properties), decoded in the browser by src/geoLayers.js
+
+Usage: python build_topology.py [--precision 0.001]
+"""
+import argparse, gzip, heapq, json, math, sys
+from pathlib import Path
+
+DATA_DIR = Path("public/data")
+SRC_DIR = Path("data/src")
+LAYERS = {"kraje": SRC_DIR / "kraje.geojson", "okresy": SRC_DIR / "okresy.geojson"}
+OUT_PATH = DATA_DIR / "kraje_okresy.topo.json"
+# Simplified levels: name → map width in px the level is good for
+# (keep in sync with GEO_LEVELS in src/geoLayers.js)
+LEVELS = {"s": 480, "m": 1200}
+
+
+def level_path(level):
+    return OUT_PATH if level is None else OUT_PATH.with_name(f"kraje_okresy.{level}.topo.json")
+
+
+def polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"Unsupported geometry type {geometry['type']}")
+
+
+def quantize_ring(ring, translate, precision):
+    """Ring as grid points, closing point and consecutive repeats dropped."""
+    points = []
+    for x, y in ((c[0], c[1]) for c in ring):
+        p = (round((x - translate[0]) / precision), round((y - translate[1]) / precision))
+        if not points or points[-1] != p:
+            points.append(p)
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+
+def find_junctions(rings):
+    """Points visited with more than one pair of neighbours."""
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i, p in enumerate(ring):
+            a, b = ring[i - 1], ring[(i + 1) % n]
+            pair = (a, b) if a <= b else (b, a)
+            seen = neighbours.setdefault(p, pair)
+            if seen != pair:
+                junctions.add(p)
+    return junctions
+
+
+class ArcIndex:
+    """Deduplicated arcs; a reversed match is referenced as ~index."""
+
+    def __init__(self):
+        self.arcs = []
+        self._index = {}
+
+    def add(self, points):
+        key = tuple(points)
+        if key in self._index:
+            return self._index[key]
+        reverse = key[::-1]
+        if reverse in self._index:
+            return ~self._index[reverse]
+        self._index[key] = len(self.arcs)
+        self.arcs.append(points)
+        return len(self.arcs) - 1
+
+
+def ring_arcs(ring, junctions, arcs):
+    cuts = [i for i, p in enumerate(ring) if p in junctions]
+    if not cuts:
+        # A ring touching no other ring: one closed arc from its smallest point
+        start = min(range(len(ring)), key=ring.__getitem__)
+        rotated = ring[start:] + ring[:start]
+        return [arcs.add(rotated + rotated[:1])]
+    rotated = ring[cuts[0]:] + ring[:cuts[0]]
+    cuts = [i - cuts[0] for i in cuts] + [len(ring)]
+    closed = rotated + rotated[:1]
+    return [arcs.add(closed[lo:hi + 1]) for lo, hi in zip(cuts[:-1], cuts[1:])]
+
+
+def triangle_area(a, b, c, aspect):
+    return abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])) * aspect / 2
+
+
+def visvalingam(points, min_area, keep, aspect=1.0):
+    """Drop interior points of an arc while their effective area is under
+    min_area, keeping at least `keep` points; endpoints always stay."""
+    n = len(points)
+    if n <= keep:
+        return points
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    area = [math.inf] * n
+    heap = []
+    for i in range(1, n - 1):
+        area[i] = triangle_area(points[i - 1], points[i], points[i + 1], aspect)
+        heap.append((area[i], i))
+    heapq.heapify(heap)
+    removed = [False] * n
+    remaining = n
+    floor = 0.0   # areas never decrease, so a point is not dropped before its neighbours
+    while heap and remaining > keep:
+        a, i = heapq.heappop(heap)
+        if removed[i] or a != area[i]:
+            continue
+        if max(a, floor) >= min_area:
+            break
+        floor = max(a, floor)
+        removed[i] = True
+        remaining -= 1
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                area[j] = max(triangle_area(points[prev[j]], points[j], points[nxt[j]], aspect), floor)
+                heapq.heappush(heap, (area[j], j))
+    return [pt for pt, r in zip(points, removed) if not r]
+
+
+def simplify_arcs(arcs, min_area, aspect=1.0):
+    """Simplify every arc once. A closed arc keeps a triangle, and an arc
+    whose endpoints are shared with another arc keeps one interior point,
+    so no ring collapses to a line."""
+    ends = {}
+    for a in arcs:
+        key = (min(a[0], a[-1]), max(a[0], a[-1]))
+        ends[key] = ends.get(key, 0) + 1
+    out = []
+    for a in arcs:
+        if a[0] == a[-1]:
+            keep = 4
+        elif ends[(min(a[0], a[-1]), max(a[0], a[-1]))] > 1:
+            keep = 3
+        else:
+            keep = 2
+        out.append(visvalingam(a, min_area, keep, aspect))
+    return out
+
+
+def level_min_area(topology, width):
+    """Effective area in grid units² of one square pixel on a map `width` px wide."""
+    x0, _, x1, _ = topology["bbox"]
+    pixel = (x1 - x0) / topology["transform"]["scale"][0] / width
+    return pixel * pixel
+
+
+def delta_encode(points):
+    out, px, py = [], 0, 0
+    for x, y in points:
+        out.append([x - px, y - py])
+        px, py = x, y
+    return out
+
+
+def build(layers, precision):
+    features = {name: json.loads(Path(path).read_text(encoding="utf-8"))["features"]
+                for name, path in layers.items()}
+    xs = [c[0] for fs in features.values() for f in fs for poly in polygons(f["geometry"])
+          for ring in poly for c in ring]
+    ys = [c[1] for fs in features.values() for f in fs for poly in polygons(f["geometry"])
+          for ring in poly for c in ring]
+    translate = [round(min(xs) / precision) * precision, round(min(ys) / precision) * precision]
+
+    quantized = {
+        name: [[[quantize_ring(ring, translate, precision) for ring in poly]
+                for poly in polygons(f["geometry"])] for f in fs]
+        for name, fs in features.items()
+    }
+    junctions = find_junctions([ring for fq in quantized.values() for polys in fq
+                                for poly in polys for ring in poly])
+    arcs = ArcIndex()
+    objects = {}
+    for name, fs in features.items():
+        geometries = []
+        for f, polys in zip(fs, quantized[name]):
+            arc_polys = [[ring_arcs(ring, junctions, arcs) for ring in poly if len(ring) >= 3]
+                         for poly in polys]
+            if f["geometry"]["type"] == "Polygon":
+                geometry = {"type": "Polygon", "arcs": arc_polys[0]}
+            else:
+                geometry = {"type": "MultiPolygon", "arcs": arc_polys}
+            geometries.append({**geometry, "properties": f.get("properties", {})})
+        objects[name] = {"type": "GeometryCollection", "geometries": geometries}
+
+    return {
+        "type": "Topology",
+        "bbox": [min(xs), min(ys), max(xs), max(ys)],
+        "transform": {"scale": [precision, precision], "translate": translate},
+        "objects": objects,
+        "arcs": arcs.arcs,
+    }
+
+
+def encode(topology, arcs):
+    """Topology JSON with the given grid-point arcs, delta-encoded."""
+    return json.dumps({**topology, "arcs": [delta_encode(a) for a in arcs]},
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+def _sizes(data):
+    return len(data), len(gzip.compress(data, 9))
+
+
+def size_report(paths, outputs):
+    """outputs: [(path, topology JSON text, number of points)]"""
+    rows = [(str(p), *_sizes(Path(p).read_bytes())) for p in paths]
+    total = (sum(r[1] for r in rows), sum(r[2] for r in rows))
+    for name, raw, gz in rows:
+        print(f"  {name:42s} {raw:9d} B  gzip {gz:8d} B")
+    print(f"  {'total GeoJSON':42s} {total[0]:9d} B  gzip {total[1]:8d} B")
+    for path, text, n_points in outputs:
+        raw, gz = _sizes(text.encode("utf-8"))
+        print(f"  {str(path):42s} {raw:9d} B  gzip {gz:8d} B  {n_points:6d} points  "
+              f"({total[0] / raw:.1f}× / {total[1] / gz:.1f}× smaller)")
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description='Build the kraje + okresy TopoJSON topology.')
+    parser.add_argument('--precision', type=float, default=0.001,
+                        help='quantization step in degrees (default: the 0.001° of the sources)')
+    args = parser.parse_args()
+
+    topology = build(LAYERS, args.precision)
+    print(f"{len(topology['arcs'])} arcs, "
+          + ", ".join(f"{len(o['geometries'])} {name}" for name, o in topology["objects"].items()))
+    # Mercator stretches latitude by 1/cos(lat) against longitude
+    aspect = 1 / math.cos(math.radians((topology["bbox"][1] + topology["bbox"][3]) / 2))
+    outputs = []
+    for level, width in [(None, None), *LEVELS.items()]:
+        arcs = topology["arcs"] if level is None else \
+            simplify_arcs(topology["arcs"], level_min_area(topology, width), aspect)
+        text = encode(topology, arcs)
+        path = level_path(level)
+        path.write_text(text, encoding="utf-8")
+        outputs.append((path, text, sum(len(a) for a in arcs)))
+    print("Saved:")
+    size_report(list(LAYERS.values()), outputs)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,73 @@ For each CEP project, determines if it matches a domain in its kraj via:
   1. FORD discipline → domain text similarity (structural/field match)
   2. Project text → domain text similarity (content/semantic match)
 
-Output: public/data/vav_semantic_match.json
+Output: data/vav_semantic_match.json (all raw_scores, not deployed)
+        public/data/vav_semantic/ (summary + per-kraj shards for the frontend, see vav_shards.py)
+        public/data/ford_kraj_match.json (FORD × kraj match tensor, see ford_match.py)
+
+Projects are encoded and matched in chunks; raw_scores are spilled to disk per
+kraj as they are produced. With --stream, projekty_cep.json is also read
+incrementally, so texts, embeddings and records are only held for the current
+chunk. What still grows with the project history is small per-project
+bookkeeping: the occurrence count of every `kod`, the exact-duplicate map of
+text_dedup.py (one entry per distinct project text) and the embedding cache
+index (one hash per distinct text), whose index file is written once at the
+end rather than after every chunk.
+
+With --incremental, per-project results from the previous run are kept in
+.cache/vav_semantic_projects.sqlite keyed by `kod` with a fingerprint of the
+project's text, kraj and FORD code (counters in
+.cache/vav_semantic_state.json). Only new or changed projects are encoded and
+classified; removed and changed ones are subtracted from the kraje counters
+and top_domeny. The previous results are looked up chunk by chunk on disk
+(project_state.py), not loaded up front. A change of model, thresholds,
+domain or FORD texts forces a full run.
+
+With --sweep, each project's best semantic and FORD similarity also feed a
+threshold sweep (threshold_sweep.py): per-kraj category counts for a grid of
+THRESHOLD / FORD_THRESHOLD pairs, saved to public/data/vav_threshold_sweep.json.
+
+With --nationwide K, every project is also scored against every domain of
+every kraj (blocked top-k search, topk_search.py) and its K best
+(kraj, domain, similarity) are saved to public/data/vav_nationwide_match.json,
+together with counts of own kraj → kraj of the best nationwide match.
+--ann-probe P switches that search to an IVF index over the domains
+(ann_index.py) probing P lists; --project-index saves an IVF index over all
+project embeddings to .cache/ann/projekty for ad-hoc queries
+("which projects resemble this domain", see ann_index.py).
+
+With --store int8|float16, the normalized domain, FORD and project embeddings
+are also saved as quantized embedding stores keyed by "kraj/nazev", FORD code
+and `kod` under .cache/embedding_store/<model>/ (see embedding_store.py).
+
+With --workers N, texts are encoded by N worker processes, each with its own
+model copy and --threads-per-worker torch threads (encode_pool.py).
+
+Project texts are collapsed before encoding (text_dedup.py): exact duplicates
+always, near duplicates with --near-dup J (word-set Jaccard ≥ J, MinHash/LSH);
+each group is encoded once and its embedding broadcast to the members.
+
+With --columnar, raw_scores of the full file are written as per-kraj columns
+with dictionary-encoded domains and categories and uint16 scores
+(score_columns.py), and the file is written compactly. The frontend shards
+always use that format.
 """
 
-import json, sys
+import argparse, json, sys
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from embedding_cache import VERSION as CACHE_VERSION, EmbeddingCache, text_hash
+from ford_match import FordKrajMatch
+from json_stream import GroupedArrayWriter, iter_json_array
+from threshold_sweep import ThresholdSweep
+from topk_search import blocked_topk
+from ann_index import IvfIndex
+from embedding_store import DTYPES, EmbeddingStoreWriter, store_path
+from encode_pool import EncodePool
+from text_dedup import Deduplicator
+from score_columns import ColumnarScoresWriter
+from vav_shards import FULL_PATH, write_shards
+from project_state import ProjectState, ProjectStateWriter
 from pathlib import Path
 import time
 
@@ -18,12 +79,47 @@ sys.stdout.reconfigure(encoding='utf-8')
 DATA_DIR = Path("public/data")
 THRESHOLD = 0.35       # semantic: project text vs domain
 FORD_THRESHOLD = 0.38  # FORD discipline name vs domain text
+NATIONWIDE_OUT_PATH = DATA_DIR / "vav_nationwide_match.json"
+NATIONWIDE_UNASSIGNED = "bez_kraje"   # group for projects whose kraj has no domains entry
+PROJECT_INDEX_PATH = Path(".cache/ann/projekty")
+STATE_PATH = Path(".cache/vav_semantic_state.json")
+PROJECTS_STATE_PATH = Path(".cache/vav_semantic_projects.sqlite")   # key → fingerprint, kraj, record, score
+
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument('--stream', action='store_true',
+                    help='read projekty_cep.json incrementally and match in chunks (flat memory)')
+parser.add_argument('--chunk-size', type=int, default=4096,
+                    help='projects encoded and matched per chunk in --stream mode')
+parser.add_argument('--incremental', action='store_true',
+                    help='encode and classify only projects that are new or changed since the last run')
+parser.add_argument('--sweep', action='store_true',
+                    help='also write per-kraj category counts for a grid of threshold pairs')
+parser.add_argument('--nationwide', type=int, default=0, metavar='K',
+                    help='also keep the K best (kraj, domain) matches over all kraje per project')
+parser.add_argument('--ann-probe', type=int, default=0, metavar='P',
+                    help='use an approximate (IVF) domain index probing P lists for --nationwide')
+parser.add_argument('--project-index', action='store_true',
+                    help=f'save an IVF index over all project embeddings to {PROJECT_INDEX_PATH.as_posix()}')
+parser.add_argument('--store', choices=sorted(DTYPES),
+                    help='save domain, FORD and project embeddings as quantized embedding stores')
+parser.add_argument('--workers', type=int, default=0, metavar='N',
+                    help='encode in N worker processes (see encode_pool.py --bench)')
+parser.add_argument('--threads-per-worker', type=int, metavar='T',
+                    help='torch threads per worker (default: cores / workers)')
+parser.add_argument('--near-dup', type=float, metavar='J',
+                    help='encode near-duplicate project texts (word Jaccard >= J) once per group')
+parser.add_argument('--columnar', action='store_true',
+                    help='write raw_scores in the compact columnar format (score_columns.py)')
+args = parser.parse_args()
 
 # ── Load data ────────────────────────────────────────────────────────
 print("Loading data...")
-with open(DATA_DIR / "projekty_cep.json", "r", encoding="utf-8") as f:
-    cep_data = json.load(f)
-projects = cep_data["projekty"]
+if args.stream:
+    projects = iter_json_array(DATA_DIR / "projekty_cep.json", "projekty")
+else:
+    with open(DATA_DIR / "projekty_cep.json", "r", encoding="utf-8") as f:
+        cep_data = json.load(f)
+    projects = cep_data["projekty"]
 
 with open(DATA_DIR / "domeny_plne_texty.json", "r", encoding="utf-8") as f:
     domeny = json.load(f)
@@ -38,6 +134,10 @@ ford_groups = ford_data["ford_skupiny"]    # "1xx" → "Přírodní vědy"
 print("Loading embedding model...")
 model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
 model_name = "paraphrase-multilingual-MiniLM-L12-v2"
+cache = EmbeddingCache(model_name)
+pool = EncodePool(model_name, args.workers, args.threads_per_worker) if args.workers else None
+if pool is not None:
+    print(f"Encoding pool: {pool.n_workers} workers × {pool.threads} threads")
 
 # ── Prepare domain texts (flat list with kraj tracking) ──────────────
 all_domain_texts = []
@@ -66,15 +166,15 @@ for code in ford_codes_list:
 
 # ── Encode domains ──────────────────────────────────────────────────
 print(f"Encoding {len(all_domain_texts)} domain texts...")
-domain_embeddings = model.encode(all_domain_texts, show_progress_bar=True, batch_size=32)
+domain_embeddings = cache.encode(model, all_domain_texts, show_progress_bar=True, batch_size=32, pool=pool)
 domain_embeddings = domain_embeddings / np.linalg.norm(domain_embeddings, axis=1, keepdims=True)
 
 # ── Encode FORD disciplines ─────────────────────────────────────────
 print(f"Encoding {len(ford_texts)} FORD discipline texts...")
-ford_embeddings = model.encode(ford_texts, batch_size=32)
+ford_embeddings = cache.encode(model, ford_texts, batch_size=32, pool=pool)
 ford_embeddings = ford_embeddings / np.linalg.norm(ford_embeddings, axis=1, keepdims=True)
 
-# ── Build FORD→domain match lookup per kraj ─────────────────────────
+# ── Build FORD × kraj match tensor ──────────────────────────────────
 # For each (ford_3digit, kraj): does this discipline match any domain in the kraj?
 ford_domain_sim = np.dot(ford_embeddings, domain_embeddings.T)  # (n_ford, n_domains)
 
@@ -83,123 +183,339 @@ kraj_domain_indices = {}
 for di, (kraj, _) in enumerate(domain_kraj_map):
     kraj_domain_indices.setdefault(kraj, []).append(di)
 
-ford_kraj_match = {}  # (ford_3digit, kraj) → bool
-ford_kraj_best = {}   # (ford_3digit, kraj) → (best_sim, best_domain_name)
-
-for fi, ford_code in enumerate(ford_codes_list):
-    for kraj in domeny:
-        d_indices = kraj_domain_indices.get(kraj, [])
-        if not d_indices:
-            continue
-        sims = ford_domain_sim[fi, d_indices]
-        best_idx = np.argmax(sims)
-        best_sim = float(sims[best_idx])
-        best_domain_local = domain_kraj_map[d_indices[best_idx]][1]
-        ford_kraj_match[(ford_code, kraj)] = best_sim > FORD_THRESHOLD
-        ford_kraj_best[(ford_code, kraj)] = (best_sim, domain_names_map[kraj][best_domain_local])
+kraje = list(domeny)
+kraj_index = {kraj: ki for ki, kraj in enumerate(kraje)}
+ford_kraj = FordKrajMatch.compute(ford_codes_list, kraje, domain_names_map, ford_domain_sim,
+                                  FORD_THRESHOLD, model=model_name)
+ford_kraj.save()
 
 # Diagnostics: FORD matching coverage
-ford_match_count = sum(1 for v in ford_kraj_match.values() if v)
-ford_total = len(ford_kraj_match)
+ford_match_count = int(ford_kraj.match.sum())
+ford_total = int((ford_kraj.best_domain >= 0).sum())
 print(f"FORD→domain matches: {ford_match_count}/{ford_total} ({ford_match_count/ford_total*100:.1f}%)")
 
-# ── Prepare project texts ───────────────────────────────────────────
-print("Preparing project texts...")
-project_texts = []
-for p in projects:
+# Dense lookup: ford_match_table[ford_row, kraj_idx]; the extra last row
+# stands for a missing or unknown FORD code
+ford_match_table = ford_kraj.match_table()
+
+# ── Previous run (incremental mode) ─────────────────────────────────
+# Anything that changes every project's result invalidates the stored results
+config = {
+    "model": model_name,
+    "embedding_cache": CACHE_VERSION,
+    "threshold_semantic": THRESHOLD,
+    "threshold_ford": FORD_THRESHOLD,
+    "domeny": text_hash(json.dumps([[k, domain_names_map[k], domain_texts_map[k]] for k in kraje],
+                                   ensure_ascii=False)),
+    "ford": text_hash("\n".join(f"{c} {t}" for c, t in zip(ford_codes_list, ford_texts))),
+}
+if args.near_dup:
+    config["near_dup"] = args.near_dup
+previous = None
+if args.incremental:
+    if not (STATE_PATH.exists() and PROJECTS_STATE_PATH.exists()):
+        print("No previous run state found, matching all projects")
+    else:
+        with open(STATE_PATH, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("config") != config:
+            print("Model, thresholds or domain/FORD texts changed, matching all projects")
+            previous = None
+
+# ── Match projects chunk by chunk ───────────────────────────────────
+# Projects are grouped by kraj and matched with one matmul per kraj against
+# the kraj's (contiguous) domain block; classification and counts are array ops.
+CATEGORIES = ["v_obou", "jen_semantic", "jen_ford", "mimo_vse"]
+
+if previous is not None:
+    results_by_kraj = previous["kraje"]
+    old_state = ProjectState(PROJECTS_STATE_PATH)
+else:
+    results_by_kraj = {}
+    for kraj in kraje:
+        results_by_kraj[kraj] = {
+            "celkem_projektu": 0,
+            "v_obou": 0,
+            "jen_semantic": 0,
+            "jen_ford": 0,
+            "mimo_vse": 0,
+            "top_domeny": {},
+        }
+    old_state = None
+STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+projects_state = ProjectStateWriter(PROJECTS_STATE_PATH)
+shard_scores = ColumnarScoresWriter(kraje, domain_names_map)
+raw_scores = shard_scores if args.columnar else GroupedArrayWriter(kraje)
+# Histogram of rounded max similarities (bin = score * 10^4 + 10^4), for the summary
+score_hist = np.zeros(20001, dtype=np.int64)
+sweep = ThresholdSweep(kraje) if args.sweep else None
+if args.nationwide:
+    nationwide = GroupedArrayWriter(kraje + [NATIONWIDE_UNASSIGNED])
+    domain_kraj_idx = np.array([kraj_index[kraj] for kraj, _ in domain_kraj_map], dtype=np.int64)
+    # best_kraj_counts[own kraj (last row = unassigned), kraj of the best match]
+    best_kraj_counts = np.zeros((len(kraje) + 1, len(kraje)), dtype=np.int64)
+    domain_index = None
+    if args.ann_probe:
+        domain_index = IvfIndex.build(domain_embeddings, n_probe=args.ann_probe, model=model_name)
+        print(f"Domain IVF index: {len(domain_embeddings)} domains in {len(domain_index.centroids)} lists, "
+              f"probing {args.ann_probe}")
+if args.project_index:
+    # Normalized project embeddings in export order, spooled to disk for the index build
+    PROJECT_INDEX_PATH.mkdir(parents=True, exist_ok=True)
+    project_spool = open(PROJECT_INDEX_PATH / "spool.f32", "wb")
+    project_keys = []
+if args.store:
+    domain_ids = [f"{kraj}/{domain_names_map[kraj][i]}" for kraj, i in domain_kraj_map]
+    for name, ids, vectors in (("domeny", domain_ids, domain_embeddings),
+                               ("ford", ford_codes_list, ford_embeddings)):
+        store = EmbeddingStoreWriter(store_path(model_name, name), args.store, model_name)
+        store.add(ids, vectors)
+        store.close()
+    project_store = EmbeddingStoreWriter(store_path(model_name, "projekty"), args.store, model_name)
+ford_best_table = ford_kraj.best_similarity_table()
+
+def project_text(p):
     text = p.get("nazev", "")
     kw = p.get("klicova_slova", "")
     if kw:
         text += " " + kw
-    project_texts.append(text)
+    return text
+
+def project_fingerprint(p, representative=None):
+    """With near-duplicate collapse the group representative's text is part of
+    the fingerprint: a project whose representative changes is re-matched."""
+    parts = [p.get("kraj_hlavni_prijemce", ""), p.get("ford_kod", ""), project_text(p)]
+    if representative is not None:
+        parts.append(representative)
+    return text_hash("\x1f".join(parts))
+
+def match_chunk(chunk, project_embeddings):
+    """Classify one chunk of projects and add them to the per-kraj counters.
+    Returns the raw score record and the exact best semantic similarity of
+    each project (None / -inf if it has none)."""
+    records = [None] * len(chunk)
+    scores = np.full(len(chunk), -np.inf, dtype=np.float32)
+    project_kraj = np.array([kraj_index.get(p.get("kraj_hlavni_prijemce", ""), -1) for p in chunk],
+                            dtype=np.int64)
+    project_ford = ford_kraj.ford_rows([p.get("ford_kod", "") for p in chunk])
+
+    for ki, kraj in enumerate(kraje):
+        p_idx = np.flatnonzero(project_kraj == ki)
+        if len(p_idx) == 0:
+            continue
+        d_indices = kraj_domain_indices.get(kraj, [])
+        r = results_by_kraj[kraj]
+        r["celkem_projektu"] += len(p_idx)
+        if not d_indices:
+            r["mimo_vse"] += len(p_idx)
+            continue
 
-# ── Encode projects ─────────────────────────────────────────────────
-print(f"Encoding {len(projects)} project texts...")
+        # ─ Semantic match: project text vs domain texts in this kraj ─
+        sims = project_embeddings[p_idx] @ domain_embeddings[d_indices[0]:d_indices[-1] + 1].T
+        best_local = sims.argmax(axis=1)
+        max_sims = sims[np.arange(len(p_idx)), best_local]
+        semantic_match = max_sims > THRESHOLD
+        scores[p_idx] = max_sims
+
+        # ─ FORD match: project's FORD discipline vs domains in this kraj ─
+        ford_match = ford_match_table[project_ford[p_idx], ki]
+
+        # ─ Classify: 0 v_obou, 1 jen_semantic, 2 jen_ford, 3 mimo_vse ─
+        category = 2 * ~semantic_match + ~ford_match
+        for cat, n in zip(CATEGORIES, np.bincount(category, minlength=4)):
+            r[cat] += int(n)
+
+        # Track top domains (for tooltip), in order of first appearance
+        n_dom = len(d_indices)
+        semantic_counts = np.bincount(best_local[semantic_match], minlength=n_dom)
+        ford_counts = np.bincount(best_local[ford_match], minlength=n_dom)
+        matched_local = best_local[semantic_match | ford_match]
+        seen_local, first_pos = np.unique(matched_local, return_index=True)
+        names = domain_names_map[kraj]
+        for local in seen_local[np.argsort(first_pos)].tolist():
+            entry = r["top_domeny"].setdefault(names[local], {"semantic_count": 0, "ford_count": 0})
+            entry["semantic_count"] += int(semantic_counts[local])
+            entry["ford_count"] += int(ford_counts[local])
+
+        # Raw scores (full list for data)
+        for pi, sim, local, fm, sm, cat in zip(
+                p_idx.tolist(), max_sims.tolist(), best_local.tolist(),
+                ford_match.tolist(), semantic_match.tolist(), category.tolist()):
+            records[pi] = {
+                "projekt_kod": chunk[pi].get("kod", ""),
+                "max_similarity": round(sim, 4),
+                "best_domena": names[local],
+                "ford_match": fm,
+                "semantic_match": sm,
+                "category": CATEGORIES[cat],
+            }
+    return records, scores
+
+def match_nationwide(chunk, project_embeddings):
+    """Top-k domains over all kraje for every project of the chunk."""
+    if domain_index is not None:
+        top_s, top_i = domain_index.search(project_embeddings, args.nationwide)
+        if not match_nationwide.recall_checked:
+            recall = domain_index.recall(project_embeddings[:1000], args.nationwide)
+            print(f"  Domain IVF recall@{args.nationwide} vs exact search: {recall:.3f}")
+            match_nationwide.recall_checked = True
+    else:
+        top_s, top_i = blocked_topk(project_embeddings, domain_embeddings, args.nationwide)
+    own = np.array([kraj_index.get(p.get("kraj_hlavni_prijemce", ""), len(kraje)) for p in chunk],
+                   dtype=np.int64)
+    if top_i.shape[1]:
+        found = top_i[:, 0] >= 0   # the IVF search marks unfilled slots with -1
+        np.add.at(best_kraj_counts, (own[found], domain_kraj_idx[top_i[found, 0]]), 1)
+    by_kraj = {}
+    for p, own_ki, row_s, row_i in zip(chunk, own.tolist(), top_s.tolist(), top_i.tolist()):
+        top = []
+        for sim, di in zip(row_s, row_i):
+            if di < 0:
+                break
+            kraj, local = domain_kraj_map[di]
+            top.append({"kraj": kraj, "domena": domain_names_map[kraj][local], "similarity": round(sim, 4)})
+        group = kraje[own_ki] if own_ki < len(kraje) else NATIONWIDE_UNASSIGNED
+        by_kraj.setdefault(group, []).append({"projekt_kod": p.get("kod", ""), "top": top})
+    for group, group_records in by_kraj.items():
+        nationwide.append(group, group_records)
+
+match_nationwide.recall_checked = False
+
+def unmatch(kraj, record):
+    """Remove a stored project's contribution from the per-kraj counters."""
+    r = results_by_kraj.get(kraj)
+    if r is None:
+        return
+    r["celkem_projektu"] -= 1
+    if record is None:
+        r["mimo_vse"] -= 1
+        return
+    r[record["category"]] -= 1
+    if record["semantic_match"] or record["ford_match"]:
+        entry = r["top_domeny"][record["best_domena"]]
+        entry["semantic_count"] -= record["semantic_match"]
+        entry["ford_count"] -= record["ford_match"]
+        if entry["semantic_count"] == 0 and entry["ford_count"] == 0:
+            del r["top_domeny"][record["best_domena"]]
+
+def iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+print("Encoding and matching projects...")
 t0 = time.time()
-project_embeddings = model.encode(project_texts, show_progress_bar=True, batch_size=64)
-project_embeddings = project_embeddings / np.linalg.norm(project_embeddings, axis=1, keepdims=True)
-print(f"Done in {time.time()-t0:.1f}s")
-
-# ── Match each project ──────────────────────────────────────────────
-print("Computing matches...")
-results_by_kraj = {}
-raw_scores = {}
-
-for kraj in domeny:
-    results_by_kraj[kraj] = {
-        "celkem_projektu": 0,
-        "v_obou": 0,
-        "jen_semantic": 0,
-        "jen_ford": 0,
-        "mimo_vse": 0,
-        "top_domeny": {},
-    }
-    raw_scores[kraj] = []
-
+dedup = Deduplicator(args.near_dup)
+n_projects = 0
+n_encoded = 0
 skipped = 0
-for pi, project in enumerate(projects):
-    kraj = project.get("kraj_hlavni_prijemce", "")
-    if kraj not in domeny:
-        skipped += 1
-        continue
-
-    results_by_kraj[kraj]["celkem_projektu"] += 1
-
-    # ─ Semantic match: project text vs domain texts in this kraj ─
-    d_indices = kraj_domain_indices.get(kraj, [])
-    if not d_indices:
-        results_by_kraj[kraj]["mimo_vse"] += 1
+kod_seen = {}
+for chunk in (iter_chunks(projects, args.chunk_size) if args.stream else [projects]):
+    if not chunk:
         continue
-
-    sims = np.dot(project_embeddings[pi], domain_embeddings[d_indices].T)
-    max_sim_idx = int(np.argmax(sims))
-    max_sim = float(sims[max_sim_idx])
-    best_domain_local = domain_kraj_map[d_indices[max_sim_idx]][1]
-    best_domain_name = domain_names_map[kraj][best_domain_local]
-
-    semantic_match = max_sim > THRESHOLD
-
-    # ─ FORD match: project's FORD discipline vs domains in this kraj ─
-    ford_code_full = project.get("ford_kod", "")
-    ford_3digit = ford_code_full[:3] if len(ford_code_full) >= 3 else ""
-    ford_match = ford_kraj_match.get((ford_3digit, kraj), False) if ford_3digit else False
-
-    # ─ Classify ─
-    if semantic_match and ford_match:
-        results_by_kraj[kraj]["v_obou"] += 1
-        cat = "v_obou"
-    elif semantic_match:
-        results_by_kraj[kraj]["jen_semantic"] += 1
-        cat = "jen_semantic"
-    elif ford_match:
-        results_by_kraj[kraj]["jen_ford"] += 1
-        cat = "jen_ford"
-    else:
-        results_by_kraj[kraj]["mimo_vse"] += 1
-        cat = "mimo_vse"
-
-    # Track top domains (for tooltip)
-    if semantic_match or ford_match:
-        td = results_by_kraj[kraj]["top_domeny"]
-        if best_domain_name not in td:
-            td[best_domain_name] = {"semantic_count": 0, "ford_count": 0}
-        if semantic_match:
-            td[best_domain_name]["semantic_count"] += 1
-        if ford_match:
-            td[best_domain_name]["ford_count"] += 1
-
-    # Raw score (first 5 per kraj for diagnostics, full list for data)
-    raw_scores[kraj].append({
-        "projekt_kod": project.get("kod", ""),
-        "max_similarity": round(max_sim, 4),
-        "best_domena": best_domain_name,
-        "ford_match": ford_match,
-        "semantic_match": semantic_match,
-        "category": cat,
-    })
+    # Stable per-project key: kod, with an occurrence suffix for repeated kods
+    keys = []
+    for p in chunk:
+        kod = p.get("kod", "")
+        n = kod_seen.get(kod, 0)
+        kod_seen[kod] = n + 1
+        keys.append(kod if n == 0 else f"{kod}#{n}")
+    # Every text goes through the dedup stage, so the groups do not depend on
+    # which projects are re-encoded
+    texts = dedup.collapse([project_text(p) for p in chunk])
+    fingerprints = [project_fingerprint(p, text if args.near_dup else None) for p, text in zip(chunk, texts)]
+
+    # Reuse stored results of unchanged projects, retract changed ones
+    records = [None] * len(chunk)
+    scores = np.full(len(chunk), -np.inf, dtype=np.float32)
+    todo = []
+    old_projects = old_state.get(keys) if old_state is not None else {}
+    for i, (key, fp) in enumerate(zip(keys, fingerprints)):
+        old = old_projects.get(key)
+        if old is not None and old[0] == fp and (old[2] is None or old[3] is not None):
+            records[i] = old[2]
+            if old[3] is not None:
+                scores[i] = old[3]
+            continue
+        if old is not None:
+            unmatch(old[1], old[2])
+        todo.append(i)
+
+    # Nationwide matching, the project index and store need every project of
+    # the chunk, not only the delta
+    need_all = bool(args.nationwide or args.project_index or args.store)
+    encode_idx = list(range(len(chunk))) if need_all else todo
+    if encode_idx:
+        project_embeddings = cache.encode(model, [texts[i] for i in encode_idx],
+                                          show_progress_bar=not args.stream, batch_size=64, pool=pool,
+                                          save=False)
+        project_embeddings = project_embeddings / np.linalg.norm(project_embeddings, axis=1, keepdims=True)
+    if args.nationwide:
+        match_nationwide(chunk, project_embeddings)
+    if args.project_index:
+        project_spool.write(np.ascontiguousarray(project_embeddings, dtype=np.float32).tobytes())
+        project_keys.extend(keys)
+    if args.store:
+        project_store.add(keys, project_embeddings)
+    if todo:
+        todo_projects = [chunk[i] for i in todo]
+        todo_embeddings = project_embeddings[todo] if need_all else project_embeddings
+        todo_records, todo_scores = match_chunk(todo_projects, todo_embeddings)
+        for i, record in zip(todo, todo_records):
+            records[i] = record
+        scores[todo] = todo_scores
+        n_encoded += len(todo)
+
+    by_kraj = {}
+    state_rows = []
+    for p, key, fp, record, score in zip(chunk, keys, fingerprints, records, scores.tolist()):
+        kraj = p.get("kraj_hlavni_prijemce", "")
+        state_rows.append((key, fp, kraj, record, score if record is not None else None))
+        if kraj not in kraj_index:
+            skipped += 1
+        elif record is not None:
+            by_kraj.setdefault(kraj, []).append(record)
+            score_hist[int(round(record["max_similarity"] * 10000)) + 10000] += 1
+    projects_state.add(state_rows)
+    for kraj, kraj_records in by_kraj.items():
+        raw_scores.append(kraj, kraj_records)
+        if shard_scores is not raw_scores:
+            shard_scores.append(kraj, kraj_records)
+    if sweep is not None:
+        chunk_kraj = np.array([kraj_index.get(p.get("kraj_hlavni_prijemce", ""), -1) for p in chunk],
+                              dtype=np.int64)
+        chunk_ford = ford_kraj.ford_rows([p.get("ford_kod", "") for p in chunk])
+        sweep.add(chunk_kraj, scores, ford_best_table[chunk_ford, np.maximum(chunk_kraj, 0)])
+    n_projects += len(chunk)
+    if args.stream:
+        print(f"  {n_projects} projects matched ({time.time()-t0:.1f}s)")
+
+# Projects missing from this export
+if old_state is not None:
+    n_removed = 0
+    for kraj, record in old_state.missing_from(projects_state):
+        unmatch(kraj, record)
+        n_removed += 1
+    old_state.close()
+    print(f"Incremental: {n_encoded} new or changed, {n_removed} removed, "
+          f"{n_projects - n_encoded} reused")
+cache.save()
+print(dedup.report())
+print(f"Done in {time.time()-t0:.1f}s")
+if pool is not None:
+    pool.close()
 
 print(f"Skipped {skipped} projects (no matching kraj in domains)")
 
+projects_state.close()
+with open(STATE_PATH, "w", encoding="utf-8") as f:
+    json.dump({"config": config, "kraje": results_by_kraj}, f, ensure_ascii=False)
+
 # Convert top_domeny to sorted lists
 for kraj in results_by_kraj:
     td = results_by_kraj[kraj]["top_domeny"]
@@ -217,17 +533,67 @@ output = {
         "threshold_semantic": THRESHOLD,
         "threshold_ford": FORD_THRESHOLD,
         "datum": "2026-02-25",
-        "pocet_projektu": len(projects),
+        "pocet_projektu": n_projects,
     },
     "kraje": results_by_kraj,
-    "raw_scores": raw_scores,
 }
 
-out_path = DATA_DIR / "vav_semantic_match.json"
-with open(out_path, "w", encoding="utf-8") as f:
-    json.dump(output, f, ensure_ascii=False, indent=2)
+out_path = FULL_PATH
+out_path.parent.mkdir(parents=True, exist_ok=True)
+raw_scores.write(out_path, output, "raw_scores")
+summary_path, shards = write_shards(output["meta"], results_by_kraj, shard_scores)
+raw_scores.close()
+if shard_scores is not raw_scores:
+    shard_scores.close()
 
 print(f"\nSaved to {out_path}")
+print(f"Summary ({summary_path.stat().st_size} B) and {len(shards)} kraj shards saved to {summary_path.parent}")
+
+if args.nationwide:
+    best_kraj = {}
+    for own_ki, own in enumerate(kraje + [NATIONWIDE_UNASSIGNED]):
+        row = best_kraj_counts[own_ki]
+        if row.any():
+            best_kraj[own] = {kraj: int(n) for kraj, n in zip(kraje, row) if n}
+    nationwide.write(NATIONWIDE_OUT_PATH,
+                     {"meta": {**output["meta"], "top_k": args.nationwide}, "nejlepsi_kraj": best_kraj},
+                     "projekty")
+    nationwide.close()
+    own_best = int(np.trace(best_kraj_counts[:len(kraje)]))
+    own_total = int(best_kraj_counts[:len(kraje)].sum())
+    print(f"Nationwide top-{args.nationwide} saved to {NATIONWIDE_OUT_PATH}: best match in the own kraj "
+          f"for {own_best}/{own_total} projects")
+
+if args.store:
+    project_store.close()
+    print(f"Embedding stores ({args.store}) saved to {store_path(model_name, '').as_posix()}: "
+          f"{len(domain_ids)} domains, {len(ford_codes_list)} FORD codes, {len(project_store.ids)} projects")
+
+if args.project_index and not project_keys:
+    project_spool.close()
+    (PROJECT_INDEX_PATH / "spool.f32").unlink()
+    print("No projects, project IVF index not built")
+elif args.project_index:
+    project_spool.close()
+    spooled = np.memmap(PROJECT_INDEX_PATH / "spool.f32", dtype=np.float32, mode="r").reshape(
+        len(project_keys), -1)
+    t0 = time.time()
+    project_ann = IvfIndex.build(spooled, model=model_name, labels=project_keys)
+    del spooled
+    project_ann.save(PROJECT_INDEX_PATH)
+    (PROJECT_INDEX_PATH / "spool.f32").unlink()
+    sample = np.asarray(project_ann.vectors[::max(1, len(project_ann) // 1000)])
+    print(f"Project IVF index ({len(project_ann)} projects, {len(project_ann.centroids)} lists) saved to "
+          f"{PROJECT_INDEX_PATH.as_posix()} in {time.time()-t0:.1f}s, "
+          f"recall@10 at probe {project_ann.n_probe}: {project_ann.recall(sample, 10):.3f}")
+
+if sweep is not None:
+    sweep.save(meta={k: v for k, v in output["meta"].items()
+                     if k not in ("threshold_semantic", "threshold_ford")})
+    at_current = sweep.categories_at(THRESHOLD, FORD_THRESHOLD)
+    consistent = all(at_current[k][c] == results_by_kraj[k][c] for k in kraje for c in CATEGORIES)
+    print(f"Threshold sweep ({len(sweep.semantic_grid)}×{len(sweep.ford_grid)} grid) saved, "
+          f"counts at the current thresholds {'match' if consistent else 'DIFFER FROM'} the run")
 total_processed = sum(r["celkem_projektu"] for r in results_by_kraj.values())
 print(f"Projects processed: {total_processed}")
 print()
@@ -244,15 +610,17 @@ for kraj in sorted(results_by_kraj.keys()):
     pct_aligned = (r["v_obou"] + r["jen_semantic"]) / t * 100
     print(f"{kraj:<28} {t:>6} {r['v_obou']:>5} {r['jen_semantic']:>5} {r['jen_ford']:>5} {r['mimo_vse']:>5}  {pct_both:>5.1f} {pct_aligned:>8.1f}")
 
-# Distribution of similarity scores
-all_sims = []
-for kraj_scores in raw_scores.values():
-    for s in kraj_scores:
-        all_sims.append(s["max_similarity"])
-all_sims = np.array(all_sims)
-print(f"\nSimilarity score distribution:")
-print(f"  Min: {all_sims.min():.4f}  Max: {all_sims.max():.4f}")
-print(f"  Mean: {all_sims.mean():.4f}  Median: {np.median(all_sims):.4f}")
-for t in [0.25, 0.30, 0.35, 0.40, 0.45, 0.50]:
-    pct = (all_sims > t).mean() * 100
-    print(f"  > {t}: {pct:.1f}%")
+# Distribution of similarity scores (from the histogram of rounded scores)
+bin_values = (np.arange(len(score_hist)) - 10000) / 10000
+n_scores = int(score_hist.sum())
+if n_scores:
+    cumulative = np.cumsum(score_hist)
+    nonzero = np.flatnonzero(score_hist)
+    median = (bin_values[np.searchsorted(cumulative, (n_scores - 1) // 2 + 1)]
+              + bin_values[np.searchsorted(cumulative, n_scores // 2 + 1)]) / 2
+    print(f"\nSimilarity score distribution:")
+    print(f"  Min: {bin_values[nonzero[0]]:.4f}  Max: {bin_values[nonzero[-1]]:.4f}")
+    print(f"  Mean: {(score_hist * bin_values).sum() / n_scores:.4f}  Median: {median:.4f}")
+    for t in [0.25, 0.30, 0.35, 0.40, 0.45, 0.50]:
+        pct = score_hist[bin_values > t].sum() / n_scores * 100
+        print(f"  > {t}: {pct:.1f}%")
@@ -0,0 +1,162 @@
+"""
+Persistent content-addressed cache for sentence-transformer embeddings.
+Shared by gen_embeddings.py and compute_vav_semantic.py so that a rerun only
+encodes texts that were not seen before with the same model.
+
+Layout per model (.cache/embeddings/<model>/):
+  vectors.f32  raw float32 rows, memory-mapped on read
+  index.json   {"version": V, "dim": D, "rows": {text_hash: [row, last_used]}}
+
+Keys are SHA-256 hashes of the normalized text (NFC, collapsed whitespace);
+the model still encodes the original text, so embeddings match an uncached
+run. Texts that differ only in whitespace or Unicode composition share a key
+and get the vector of whichever of them was encoded first.
+Stored vectors are the raw model output; callers normalize them as before.
+When the vector file grows past `max_bytes`, the least recently used rows are
+dropped and the file is compacted.
+"""
+import hashlib, json, os, re, time, unicodedata
+from pathlib import Path
+import numpy as np
+from batch_encode import MAX_BATCH_TOKENS, encode_batched
+
+CACHE_DIR = Path(".cache/embeddings")
+MAX_BYTES = 512 * 1024 * 1024
+VERSION = 2   # 1 stored embeddings of the normalized text
+
+
+def normalize_text(text):
+    """Canonical form of a text used for hashing (never passed to the model)."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text or '')).strip()
+
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embedding store for one model."""
+
+    def __init__(self, model_name, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.dir = Path(cache_dir) / re.sub(r'[^\w.-]+', '__', model_name)
+        self.vectors_path = self.dir / "vectors.f32"
+        self.index_path = self.dir / "index.json"
+        self.dim = None
+        self.rows = {}   # text_hash → [row, last_used]
+        if self.index_path.exists():
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            # An index of another version is dropped; its vector file is overwritten
+            if index.get("version") == VERSION:
+                self.dim = index["dim"]
+                self.rows = index["rows"]
+        # Rows past the index (e.g. an interrupted write) are simply ignored
+        self.n_rows = max((r for r, _ in self.rows.values()), default=-1) + 1
+
+    def _vectors(self):
+        if not self.n_rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                         shape=(self.n_rows, self.dim))
+
+    def get(self, hashes):
+        """Return (vectors, missing) — vectors for cached hashes, rows of
+        missing hashes left as zeros; `missing` lists their positions."""
+        now = int(time.time())
+        missing = [i for i, h in enumerate(hashes) if h not in self.rows]
+        out = np.zeros((len(hashes), self.dim or 0), dtype=np.float32)
+        hit_pos = [i for i, h in enumerate(hashes) if h in self.rows]
+        if hit_pos:
+            rows = [self.rows[hashes[i]][0] for i in hit_pos]
+            out[hit_pos] = self._vectors()[rows]
+            for i in hit_pos:
+                self.rows[hashes[i]][1] = now
+        return out, missing
+
+    def put(self, hashes, vectors):
+        """Append vectors for new hashes (duplicates are stored once)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimension mismatch for {self.model_name}: "
+                             f"{vectors.shape[1]} != {self.dim}")
+        now = int(time.time())
+        new = {}
+        for i, h in enumerate(hashes):
+            if h not in self.rows and h not in new:
+                new[h] = i
+        if not new:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.vectors_path, "r+b" if self.vectors_path.exists() else "wb") as f:
+            f.seek(self.n_rows * self.dim * 4)
+            f.write(np.ascontiguousarray(vectors[list(new.values())]).tobytes())
+            f.truncate()
+        for h in new:
+            self.rows[h] = [self.n_rows, now]
+            self.n_rows += 1
+
+    def evict(self):
+        """Keep the most recently used rows that fit into `max_bytes`."""
+        row_bytes = (self.dim or 0) * 4
+        if not row_bytes or self.n_rows * row_bytes <= self.max_bytes:
+            return 0
+        keep_n = self.max_bytes // row_bytes
+        by_recency = sorted(self.rows.items(), key=lambda kv: kv[1][1], reverse=True)
+        kept = by_recency[:keep_n]
+        kept_rows = [r for _, (r, _) in kept]
+        data = np.array(self._vectors()[kept_rows]) if kept_rows else np.empty((0, self.dim), np.float32)
+        tmp = self.vectors_path.with_suffix(".tmp")
+        data.tofile(tmp)
+        os.replace(tmp, self.vectors_path)
+        evicted = len(self.rows) - len(kept)
+        self.rows = {h: [i, used] for i, (h, (_, used)) in enumerate(kept)}
+        self.n_rows = len(kept)
+        return evicted
+
+    def save(self):
+        evicted = self.evict()
+        if self.dim is None:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "model": self.model_name, "dim": self.dim, "rows": self.rows}, f)
+        os.replace(tmp, self.index_path)
+        if evicted:
+            print(f"  Embedding cache: evicted {evicted} least recently used vectors")
+
+    def encode(self, model, texts, batch_size=32, show_progress_bar=False, max_tokens=MAX_BATCH_TOKENS,
+               pool=None, save=True):
+        """Embeddings for `texts` in order, encoding only cache misses in
+        token-budget batches (batch_encode.py), optionally on an EncodePool;
+        `batch_size` is that of the model.encode baseline the padding is reported against.
+        The index is written after every call unless `save=False`, in which
+        case the caller calls save() once it is done (e.g. after a chunk loop)."""
+        hashes = [text_hash(t) for t in texts]
+        vectors, missing = self.get(hashes)
+
+        # Encode each missing text once, even if it repeats in the input
+        todo = {}
+        for i in missing:
+            todo.setdefault(hashes[i], i)
+        print(f"  Embedding cache: {len(texts) - len(missing)}/{len(texts)} hits, "
+              f"encoding {len(todo)} texts")
+        if todo:
+            new_vecs = encode_batched(model, [texts[i] for i in todo.values()],
+                                      max_tokens=max_tokens,
+                                      show_progress_bar=show_progress_bar,
+                                      baseline_batch_size=batch_size,
+                                      pool=pool)
+            self.put(list(todo), new_vecs)
+            if vectors.shape[1] == 0:
+                vectors = np.zeros((len(texts), new_vecs.shape[1]), dtype=np.float32)
+            new_rows = dict(zip(todo, new_vecs))
+            for i in missing:
+                vectors[i] = new_rows[hashes[i]]
+        if save:
+            self.save()
+        return vectors
@@ -0,0 +1,215 @@
+"""
+Quantized, memory-mapped embedding store keyed by id.
+Unlike the content-addressed EmbeddingCache (raw float32 keyed by text hash),
+a store holds the normalized vectors of one collection under their ids —
+domain key "kraj/nazev", project `kod`, FORD code — so that other scripts can
+compare them without the model or the source texts.
+
+Layout (.cache/embedding_store/<model>/<name>/):
+  vectors.i8   int8 rows, v ≈ codes * scale (symmetric, per row)   dtype int8
+  scales.f32   float32 scale per row (int8 stores only)             dtype float32
+  vectors.f16  float16 rows                                        dtype float16
+  index.json   {"model", "dtype", "dim", "ids"}; ids[row] is the id of a row
+
+similarity() and topk() work on the quantized rows block by block (int8 codes
+are widened per block and the scale is applied to the scores, not the
+vectors), so a store is never expanded to float32 as a whole.
+
+Command line, e.g. the projects most similar to a given one:
+  python embedding_store.py .cache/embedding_store/<model>/projekty --like KOD -k 10
+"""
+import argparse, json, os, re, sys
+from pathlib import Path
+import numpy as np
+from topk_search import merge_topk, sort_topk
+
+STORE_DIR = Path(".cache/embedding_store")
+DTYPES = {"int8": ("vectors.i8", np.int8), "float16": ("vectors.f16", np.float16)}
+
+
+def store_path(model_name, name, store_dir=STORE_DIR):
+    return Path(store_dir) / re.sub(r'[^\w.-]+', '__', model_name) / name
+
+
+def quantize_int8(vectors):
+    """(codes int8, scales float32) with vectors ≈ codes * scales[:, None]."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class EmbeddingStoreWriter:
+    """Appends normalized vectors to a new store; close() writes the index.
+    Repeated ids get an occurrence suffix ("id#1", "id#2", ...)."""
+
+    def __init__(self, path, dtype="int8", model=None):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown store dtype {dtype!r}, expected one of {sorted(DTYPES)}")
+        self.path = Path(path)
+        self.dtype = dtype
+        self.model = model
+        self.dim = None
+        self.ids = []
+        self._seen = {}
+        self.path.mkdir(parents=True, exist_ok=True)
+        for fname in ("vectors.i8", "vectors.f16", "scales.f32", "index.json"):
+            (self.path / fname).unlink(missing_ok=True)
+        self._vectors = open(self.path / DTYPES[dtype][0], "wb")
+        self._scales = open(self.path / "scales.f32", "wb") if dtype == "int8" else None
+
+    def add(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(ids) != len(vectors):
+            raise ValueError(f"{len(ids)} ids for {len(vectors)} vectors")
+        if not len(ids):
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimension mismatch in {self.path}: {vectors.shape[1]} != {self.dim}")
+        vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-10)
+        if self.dtype == "int8":
+            codes, scales = quantize_int8(vectors)
+            self._vectors.write(codes.tobytes())
+            self._scales.write(scales.tobytes())
+        else:
+            self._vectors.write(vectors.astype(np.float16).tobytes())
+        for id_ in ids:
+            n = self._seen.get(id_, 0)
+            self._seen[id_] = n + 1
+            self.ids.append(id_ if n == 0 else f"{id_}#{n}")
+
+    def close(self):
+        self._vectors.close()
+        if self._scales is not None:
+            self._scales.close()
+        tmp = self.path / "index.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dtype": self.dtype, "dim": self.dim or 0, "ids": self.ids},
+                      f, ensure_ascii=False)
+        os.replace(tmp, self.path / "index.json")
+
+
+class EmbeddingStore:
+    def __init__(self, ids, codes, scales=None, model=None):
+        self.ids = list(ids)
+        self.codes = codes
+        self.scales = scales
+        self.model = model
+        self.row = {id_: r for r, id_ in enumerate(self.ids)}
+
+    @classmethod
+    def write(cls, path, ids, vectors, dtype="int8", model=None):
+        writer = EmbeddingStoreWriter(path, dtype, model)
+        writer.add(ids, vectors)
+        writer.close()
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with open(path / "index.json", encoding="utf-8") as f:
+            index = json.load(f)
+        fname, dtype = DTYPES[index["dtype"]]
+        shape = (len(index["ids"]), index["dim"])
+        if not shape[0]:
+            return cls([], np.empty(shape, dtype=dtype),
+                       np.empty(0, np.float32) if index["dtype"] == "int8" else None, index["model"])
+        codes = np.memmap(path / fname, dtype=dtype, mode="r", shape=shape)
+        scales = (np.memmap(path / "scales.f32", dtype=np.float32, mode="r", shape=(shape[0],))
+                  if index["dtype"] == "int8" else None)
+        return cls(index["ids"], codes, scales, index["model"])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self.row
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def rows(self, ids):
+        """Row index per id (KeyError for unknown ids)."""
+        return np.array([self.row[id_] for id_ in ids], dtype=np.int64)
+
+    def _block(self, lo, hi):
+        """Rows lo..hi widened to float32, and their scales (or None)."""
+        return (np.asarray(self.codes[lo:hi], dtype=np.float32),
+                None if self.scales is None else np.asarray(self.scales[lo:hi]))
+
+    def vectors(self, ids=None):
+        """Dequantized float32 vectors of `ids` (all rows if None)."""
+        rows = np.arange(len(self)) if ids is None else self.rows(ids)
+        out = np.asarray(self.codes[rows], dtype=np.float32)
+        if self.scales is not None:
+            out *= np.asarray(self.scales[rows])[:, None]
+        return out
+
+    def similarity(self, queries, ids=None, block=65536):
+        """(n_queries, n) dot products of normalized float32 queries with the
+        stored rows of `ids` (all rows if None), in row order."""
+        queries = np.asarray(queries, dtype=np.float32)
+        if ids is not None:
+            rows = self.rows(ids)
+            codes = np.asarray(self.codes[rows], dtype=np.float32)
+            sims = queries @ codes.T
+            return sims * self.scales[rows] if self.scales is not None else sims
+        sims = np.empty((len(queries), len(self)), dtype=np.float32)
+        for lo in range(0, len(self), block):
+            codes, scales = self._block(lo, lo + block)
+            part = queries @ codes.T
+            sims[:, lo:lo + len(codes)] = part * scales if scales is not None else part
+        return sims
+
+    def topk(self, queries, k, block=65536, query_block=1024):
+        """(scores, rows) of the k most similar stored rows per query, best first."""
+        queries = np.asarray(queries, dtype=np.float32)
+        k = min(k, len(self))
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        rows = np.empty((len(queries), k), dtype=np.int64)
+        if k == 0:
+            return scores, rows
+        for q0 in range(0, len(queries), query_block):
+            q = queries[q0:q0 + query_block]
+            best_s = np.empty((len(q), 0), dtype=np.float32)
+            best_i = np.empty((len(q), 0), dtype=np.int64)
+            for lo in range(0, len(self), block):
+                codes, scales = self._block(lo, lo + block)
+                part = q @ codes.T
+                if scales is not None:
+                    part *= scales
+                best_s, best_i = merge_topk(best_s, best_i, part, lo, k)
+            scores[q0:q0 + len(q)], rows[q0:q0 + len(q)] = sort_topk(best_s, best_i)
+        return scores, rows
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description='Query a saved embedding store.')
+    parser.add_argument('store', help='store directory, e.g. .cache/embedding_store/<model>/projekty')
+    parser.add_argument('--like', nargs='+', metavar='ID', help='ids whose nearest neighbours to list')
+    parser.add_argument('--against', metavar='STORE', help='search this store instead (same model)')
+    parser.add_argument('-k', type=int, default=10, help='neighbours to return')
+    args = parser.parse_args()
+
+    store = EmbeddingStore.load(args.store)
+    dtype = "int8" if store.scales is not None else "float16"
+    print(f"{len(store)} vectors, dim {store.codes.shape[1]}, {dtype}, "
+          f"{store.nbytes / 1e6:.1f} MB, model {store.model}")
+    if args.like:
+        target = EmbeddingStore.load(args.against) if args.against else store
+        queries = store.vectors(args.like)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-10
+        scores, rows = target.topk(queries, args.k)
+        for id_, q_scores, q_rows in zip(args.like, scores, rows):
+            print(f"{id_}:")
+            for score, row in zip(q_scores, q_rows):
+                print(f"  {score:.4f}  {target.ids[row]}")
+
+
+if __name__ == '__main__':
+    main()
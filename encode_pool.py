@@ -0,0 +1,194 @@
+"""
+Multi-process CPU encoding pool.
+Torch intra-op threading scales poorly past a few cores, so on many-core
+machines it is faster to run several model copies with a few threads each.
+EncodePool starts N worker processes (this file with --worker), each loading
+its own SentenceTransformer with a pinned thread count and, on Linux, its own
+set of cores. Batches from batch_encode are handed out to whichever worker is
+free and the embeddings are scattered back in input order.
+
+Workers are plain subprocesses talking pickle over stdin/stdout, not
+multiprocessing children: the pipeline scripts are top-level code that a
+spawned child would re-run on import.
+
+Benchmark, throughput per worker count on the project texts:
+  python encode_pool.py --bench 1 2 4 8 --texts 20000
+"""
+import argparse, os, pickle, queue, subprocess, sys, threading, time
+from pathlib import Path
+
+MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class EncodePool:
+    """N worker processes encoding batches of texts with `model_name`."""
+
+    def __init__(self, model_name, n_workers, threads=None):
+        cores = available_cores()
+        self.model_name = model_name
+        self.n_workers = n_workers
+        self.threads = threads or max(1, len(cores) // n_workers)
+        self._procs = []
+        for w in range(n_workers):
+            own = cores[w * self.threads:(w + 1) * self.threads] if (w + 1) * self.threads <= len(cores) else []
+            cmd = [sys.executable, str(Path(__file__).resolve()), "--worker", model_name,
+                   "--threads", str(self.threads)]
+            if own:
+                cmd += ["--cores", ",".join(map(str, own))]
+            self._procs.append(subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE))
+        for w, proc in enumerate(self._procs):
+            self._receive(w, proc)   # "ready" once the model is loaded
+
+    def _receive(self, w, proc):
+        try:
+            return pickle.load(proc.stdout)
+        except EOFError:
+            raise RuntimeError(f"Encoding worker {w} exited with code {proc.wait()}") from None
+
+    def map(self, batches):
+        """Embeddings (numpy arrays) for each batch of texts, in order."""
+        todo = queue.Queue()
+        for b, texts in enumerate(batches):
+            todo.put((b, texts))
+        results = [None] * len(batches)
+        errors = []
+
+        def serve(w, proc):
+            while not errors:
+                try:
+                    b, texts = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    pickle.dump(texts, proc.stdin)
+                    proc.stdin.flush()
+                    results[b] = self._receive(w, proc)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=serve, args=(w, proc)) for w, proc in enumerate(self._procs)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def close(self):
+        for proc in self._procs:
+            try:
+                pickle.dump(None, proc.stdin)
+                proc.stdin.close()
+            except OSError:
+                pass
+        for proc in self._procs:
+            proc.wait()
+        self._procs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def worker(model_name, threads, cores):
+    # Keep the protocol stream clean: anything the model prints goes to stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    inp = sys.stdin.buffer
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    pickle.dump("ready", out)
+    out.flush()
+    while True:
+        try:
+            texts = pickle.load(inp)
+        except EOFError:
+            break
+        if texts is None:
+            break
+        vectors = model.encode(texts, batch_size=len(texts), show_progress_bar=False, convert_to_numpy=True)
+        pickle.dump(vectors, out, protocol=pickle.HIGHEST_PROTOCOL)
+        out.flush()
+
+
+def bench(worker_counts, n_texts, threads):
+    import json
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    from batch_encode import encode_batched, token_lengths
+    from json_stream import iter_json_array
+
+    texts = []
+    for p in iter_json_array("public/data/projekty_cep.json", "projekty"):
+        # As project_text() in compute_vav_semantic.py
+        text = p.get("nazev", "")
+        if p.get("klicova_slova"):
+            text += " " + p["klicova_slova"]
+        texts.append(text)
+        if len(texts) >= n_texts:
+            break
+    model = SentenceTransformer(MODEL_NAME)
+    n_tokens = int(token_lengths(model, texts).sum())
+    print(f"{len(texts)} project texts, {n_tokens} tokens, {len(available_cores())} cores")
+
+    reference = None
+    for n in worker_counts:
+        t0 = time.time()
+        if n == 0:
+            vectors = encode_batched(model, texts)
+            label = "in-process"
+        else:
+            with EncodePool(MODEL_NAME, n, threads) as pool:
+                start = time.time() - t0
+                t0 = time.time()
+                vectors = encode_batched(model, texts, pool=pool)
+                label = f"{n} workers × {pool.threads} threads (start {start:.1f}s)"
+        elapsed = time.time() - t0
+        if reference is None:
+            reference = vectors
+        diff = float(np.abs(vectors - reference).max())
+        print(json.dumps({"setup": label, "texts_per_s": round(len(texts) / elapsed, 1),
+                          "tokens_per_s": round(n_tokens / elapsed), "max_abs_diff": diff},
+                         ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-process encoding pool and its benchmark.')
+    parser.add_argument('--worker', metavar='MODEL', help=argparse.SUPPRESS)
+    parser.add_argument('--cores', help=argparse.SUPPRESS)
+    parser.add_argument('--threads', type=int, help='torch threads per worker (default: cores / workers)')
+    parser.add_argument('--bench', type=int, nargs='+', metavar='N',
+                        help='worker counts to benchmark (0 = in-process encoding)')
+    parser.add_argument('--texts', type=int, default=20000, help='project texts to encode in the benchmark')
+    args = parser.parse_args()
+
+    if args.worker:
+        cores = [int(c) for c in args.cores.split(",")] if args.cores else []
+        worker(args.worker, args.threads or 1, cores)
+    elif args.bench:
+        sys.stdout.reconfigure(encoding='utf-8')
+        bench(args.bench, args.texts, args.threads)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Dense FORD × kraj match tensor.
+For every (FORD discipline, kraj) pair: does the discipline match any domain
+of the kraj, how well, and which domain is the best one. FORD codes and kraje
+are integer-coded by their position in `ford_codes` / `kraje`; the tensor is
+computed with one segmented max over the FORD × domain similarity matrix and
+saved as public/data/ford_kraj_match.json, so the frontend and other scripts
+can reuse it without re-encoding the FORD texts.
+"""
+import json
+from pathlib import Path
+import numpy as np
+
+OUT_PATH = Path("public/data/ford_kraj_match.json")
+
+
+class FordKrajMatch:
+    """match (bool), best_similarity (float32) and best_domain (int16, local
+    index into domain_names[kraj], -1 for kraje without domains), each of
+    shape (len(ford_codes), len(kraje))."""
+
+    def __init__(self, ford_codes, kraje, domain_names, match, best_similarity, best_domain,
+                 threshold=None, model=None):
+        self.ford_codes = list(ford_codes)
+        self.kraje = list(kraje)
+        self.domain_names = domain_names
+        self.match = match
+        self.best_similarity = best_similarity
+        self.best_domain = best_domain
+        self.threshold = threshold
+        self.model = model
+        self.ford_index = {code: fi for fi, code in enumerate(self.ford_codes)}
+        self.kraj_index = {kraj: ki for ki, kraj in enumerate(self.kraje)}
+
+    @classmethod
+    def compute(cls, ford_codes, kraje, domain_names, ford_domain_sim, threshold, model=None):
+        """`ford_domain_sim` is (n_ford, n_domains) with the domains ordered kraj
+        by kraj as in `kraje`, len(domain_names[kraj]) columns per kraj."""
+        counts = np.array([len(domain_names[k]) for k in kraje])
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        present = np.flatnonzero(counts > 0)
+        sim = np.asarray(ford_domain_sim, dtype=np.float32)
+
+        best_similarity = np.zeros((sim.shape[0], len(kraje)), dtype=np.float32)
+        best_domain = np.full((sim.shape[0], len(kraje)), -1, dtype=np.int16)
+        if len(present):
+            seg = starts[present]
+            best = np.maximum.reduceat(sim, seg, axis=1)
+            # First column reaching the segment max, as np.argmax would pick
+            local = np.arange(sim.shape[1]) - np.repeat(starts, counts)
+            at_max = sim == np.repeat(best, counts[present], axis=1)
+            first = np.minimum.reduceat(np.where(at_max, local, sim.shape[1]), seg, axis=1)
+            best_similarity[:, present] = best
+            best_domain[:, present] = first
+        match = (best_domain >= 0) & (best_similarity > threshold)
+        return cls(ford_codes, kraje, domain_names, match, best_similarity, best_domain,
+                   threshold=threshold, model=model)
+
+    def ford_rows(self, codes):
+        """Row index per FORD code (first 3 digits); missing or unknown codes
+        map to len(ford_codes), the all-False row of match_table()."""
+        unknown = len(self.ford_codes)
+        return np.array([self.ford_index.get(c[:3], unknown) if c and len(c) >= 3 else unknown
+                         for c in codes], dtype=np.int64)
+
+    def match_table(self):
+        """`match` with an extra all-False row for missing or unknown codes."""
+        return np.vstack([self.match, np.zeros((1, len(self.kraje)), dtype=bool)])
+
+    def best_similarity_table(self):
+        """`best_similarity` with -inf where no match is possible, plus an extra
+        all -inf row for missing or unknown codes (rows as in ford_rows())."""
+        best = np.where(self.best_domain >= 0, self.best_similarity, -np.inf).astype(np.float32)
+        return np.vstack([best, np.full((1, len(self.kraje)), -np.inf, dtype=np.float32)])
+
+    def best_domain_name(self, ford_code, kraj):
+        fi, ki = self.ford_index[ford_code], self.kraj_index[kraj]
+        local = int(self.best_domain[fi, ki])
+        return self.domain_names[kraj][local] if local >= 0 else None
+
+    def to_json(self):
+        return {
+            "meta": {"model": self.model, "threshold_ford": self.threshold},
+            "ford_kody": self.ford_codes,
+            "kraje": self.kraje,
+            "domeny": {k: self.domain_names[k] for k in self.kraje},
+            "match": self.match.astype(np.uint8).tolist(),
+            "best_similarity": np.round(self.best_similarity.astype(np.float64), 4).tolist(),
+            "best_domena": self.best_domain.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["ford_kody"], data["kraje"], data["domeny"],
+                   np.array(data["match"], dtype=bool).reshape(len(data["ford_kody"]), -1),
+                   np.array(data["best_similarity"], dtype=np.float32).reshape(len(data["ford_kody"]), -1),
+                   np.array(data["best_domena"], dtype=np.int16).reshape(len(data["ford_kody"]), -1),
+                   threshold=data["meta"].get("threshold_ford"), model=data["meta"].get("model"))
+
+    def save(self, path=OUT_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path=OUT_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_json(json.load(f))
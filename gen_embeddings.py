@@ -1,7 +1,22 @@
-"""Generate semantic similarity matrix using sentence-transformers."""
-import json, sys, numpy as np
+"""Generate semantic similarity matrix using sentence-transformers.
+
+With --incremental, domain fingerprints from the previous run are compared with
+the current domeny_plne_texty.json and only the matrix rows/columns of kraje
+whose domains changed are recomputed; the rest of semanticka_podobnost.json is
+kept and updated in place.
+"""
+import argparse, json, sys, time, numpy as np
+from pathlib import Path
 sys.stdout.reconfigure(encoding='utf-8')
 
+OUT_PATH = Path('public/data/semanticka_podobnost.json')
+STATE_PATH = Path('.cache/semanticka_podobnost_state.json')
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument('--incremental', action='store_true',
+                    help='recompute only kraje whose domain texts changed since the last run')
+args = parser.parse_args()
+
 # Load domain texts
 with open('public/data/domeny_plne_texty.json', encoding='utf-8') as f:
     data = json.load(f)
@@ -21,6 +36,7 @@ for kraj in kraje:
 # Load model
 print("\nLoading embedding model...")
 from sentence_transformers import SentenceTransformer
+from embedding_cache import VERSION as CACHE_VERSION, EmbeddingCache, text_hash
 
 try:
     model = SentenceTransformer('google/embeddinggemma-300m')
@@ -32,78 +48,154 @@ except Exception as e:
     model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
     model_name = 'paraphrase-multilingual-MiniLM-L12-v2'
 
-# Generate embeddings for all domain texts
+# Per-domain fingerprints, compared against the previous run in incremental mode
+fingerprints = {k: [text_hash(t) for t in texts_per_kraj[k]] for k in kraje}
+
+previous = None
+if args.incremental:
+    if not (OUT_PATH.exists() and STATE_PATH.exists()):
+        print("\nNo previous run state found, computing the full matrix")
+    else:
+        with open(STATE_PATH, encoding='utf-8') as f:
+            state = json.load(f)
+        with open(OUT_PATH, encoding='utf-8') as f:
+            previous = json.load(f)
+        if state.get('model') != model_name or previous.get('model') != model_name:
+            print(f"\nModel changed ({state.get('model')} → {model_name}), computing the full matrix")
+            previous = None
+        elif state.get('cache_version') != CACHE_VERSION:
+            print("\nEmbedding cache format changed, computing the full matrix")
+            previous = None
+
+if previous is not None:
+    old_fp = state['fingerprints']
+    changed = [k for k in kraje
+               if old_fp.get(k) != fingerprints[k] or k not in previous['matrix']]
+    removed = [k for k in previous['kraje'] if k not in data]
+    print(f"\nIncremental: {len(changed)} changed kraje {changed}, {len(removed)} removed {removed}")
+else:
+    changed = list(kraje)
+    removed = []
+
+# Generate embeddings for all domain texts (unchanged kraje come from the cache)
 print("\nGenerating embeddings...")
 all_texts = []
-text_to_kraj = []
 for kraj in kraje:
-    for t in texts_per_kraj[kraj]:
-        all_texts.append(t)
-        text_to_kraj.append(kraj)
+    all_texts.extend(texts_per_kraj[kraj])
 
-embeddings = model.encode(all_texts, show_progress_bar=True, convert_to_numpy=True)
+embeddings = EmbeddingCache(model_name).encode(model, all_texts, show_progress_bar=True)
 print(f"Generated {len(embeddings)} embeddings, dim={embeddings.shape[1]}")
 
-# Build per-kraj embedding lists
-kraj_embeddings = {k: [] for k in kraje}
-for i, kraj in enumerate(text_to_kraj):
-    kraj_embeddings[kraj].append(embeddings[i])
-
 # Compute pairwise average-max cosine similarity
-def cos_sim(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-10)
-
-def avg_max_similarity(embs_a, embs_b):
-    """For each domain in A, find max similarity to any domain in B. Average both directions."""
-    if len(embs_a) == 0 or len(embs_b) == 0:
-        return 0.0
-
-    # A→B direction
-    scores_ab = []
-    for ea in embs_a:
-        max_sim = max(cos_sim(ea, eb) for eb in embs_b)
-        scores_ab.append(max_sim)
-
-    # B→A direction
-    scores_ba = []
-    for eb in embs_b:
-        max_sim = max(cos_sim(eb, ea) for ea in embs_a)
-        scores_ba.append(max_sim)
-
-    return (np.mean(scores_ab) + np.mean(scores_ba)) / 2
+def _mean_max(emb, starts, counts, row_blocks, col_blocks, chunk_rows):
+    """mean_max[a, b]: mean over the domains of row block a of the best match
+    among the domains of column block b. Blocks must be non-empty."""
+    def gather(blocks):
+        idx = np.concatenate([np.arange(starts[b], starts[b] + counts[b]) for b in blocks])
+        seg = np.concatenate([[0], np.cumsum(counts[blocks])[:-1]])
+        return idx, seg
+
+    row_idx, row_seg = gather(row_blocks)
+    col_idx, col_seg = gather(col_blocks)
+    cols = emb[col_idx]
+    row_max = np.empty((len(row_idx), len(col_blocks)), dtype=np.float32)
+    for lo in range(0, len(row_idx), chunk_rows):
+        sims = emb[row_idx[lo:lo + chunk_rows]] @ cols.T
+        row_max[lo:lo + chunk_rows] = np.maximum.reduceat(sims, col_seg, axis=1)
+    mean_max = np.add.reduceat(row_max, row_seg, axis=0, dtype=np.float64)
+    return mean_max / counts[row_blocks][:, None]
+
+def block_avg_max_similarity(embeddings, counts, only=None, chunk_rows=2048):
+    """Average-max cosine similarity between every pair of kraj blocks.
+
+    `embeddings` holds all domain vectors ordered kraj by kraj and `counts` the
+    number of domains per kraj. All vectors are normalized once, compared in one
+    all-domains x all-domains matmul (processed in row chunks to bound memory)
+    and reduced per kraj block: max over the columns of each block, then mean
+    over the rows of each block. Both directions are averaged, so the result is
+    a symmetric (K, K) matrix; pairs involving a kraj without domains are 0.
+
+    With `only` (kraj indices), just those rows and columns are computed and
+    the remaining entries are left at 0 for the caller to fill in.
+    """
+    counts = np.asarray(counts)
+    k = len(counts)
+    result = np.zeros((k, k))
+    present = np.flatnonzero(counts > 0)
+    targets = present if only is None else np.intersect1d(present, only)
+    if len(targets) == 0:
+        return result
+
+    emb = np.asarray(embeddings, dtype=np.float32)
+    emb = emb / (np.linalg.norm(emb, axis=1, keepdims=True) + 1e-10)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    if only is None:
+        mean_max = _mean_max(emb, starts, counts, present, present, chunk_rows)
+        result[np.ix_(present, present)] = (mean_max + mean_max.T) / 2
+    else:
+        out_mm = _mean_max(emb, starts, counts, targets, present, chunk_rows)
+        in_mm = _mean_max(emb, starts, counts, present, targets, chunk_rows)
+        rows = (out_mm + in_mm.T) / 2
+        result[np.ix_(targets, present)] = rows
+        result[np.ix_(present, targets)] = rows.T
+    return result
 
 print("\nComputing similarity matrix...")
-matrix = {}
-for i, k1 in enumerate(kraje):
-    matrix[k1] = {}
+t0 = time.time()
+counts = [len(texts_per_kraj[k]) for k in kraje]
+if previous is None:
+    sim = block_avg_max_similarity(embeddings, counts)
+else:
+    sim = block_avg_max_similarity(embeddings, counts, only=[kraje.index(k) for k in changed])
+print(f"  {len(changed)}/{len(kraje)} kraje recomputed in {(time.time()-t0)*1000:.1f} ms")
+
+if previous is None:
+    result = {'model': model_name, 'kraje': kraje, 'matrix': {},
+              'avg_similarity': {}, 'domain_count': {}}
+else:
+    result = previous
+    result['kraje'] = kraje
+    for k in removed:
+        result['matrix'].pop(k, None)
+        result['avg_similarity'].pop(k, None)
+        result['domain_count'].pop(k, None)
+    for row in result['matrix'].values():
+        for k in removed:
+            row.pop(k, None)
+
+matrix = result['matrix']
+for k1 in changed:
+    i = kraje.index(k1)
+    matrix.setdefault(k1, {})
     for j, k2 in enumerate(kraje):
-        if k1 == k2:
-            matrix[k1][k2] = 1.0
-        elif k2 in matrix and k1 in matrix[k2]:
-            matrix[k1][k2] = matrix[k2][k1]  # symmetric
-        else:
-            sim = avg_max_similarity(kraj_embeddings[k1], kraj_embeddings[k2])
-            matrix[k1][k2] = round(float(sim), 4)
-    print(f"  {k1}: done")
-
-# Also compute per-kraj average semantic similarity (like Jaccard avg)
-avg_similarity = {}
+        val = 1.0 if i == j else round(float(sim[i, j]), 4)
+        matrix[k1][k2] = val
+        matrix.setdefault(k2, {})[k1] = val
+# Keep the row and column order of a full run
+result['matrix'] = matrix = {k1: {k2: matrix[k1][k2] for k2 in kraje} for k1 in kraje}
+
+# Also compute per-kraj average semantic similarity (like Jaccard avg).
+# Every kraj's average includes the changed columns, so all are refreshed.
+avg_similarity = result['avg_similarity']
 for k1 in kraje:
     others = [matrix[k1][k2] for k2 in kraje if k2 != k1]
-    avg_similarity[k1] = round(float(np.mean(others)), 4)
+    avg_similarity[k1] = round(float(np.mean(others)), 4) if others else 0.0
+for k in changed:
+    result['domain_count'][k] = len(texts_per_kraj[k])
+result['avg_similarity'] = {k: avg_similarity[k] for k in kraje}
+result['domain_count'] = {k: result['domain_count'][k] for k in kraje}
+avg_similarity = result['avg_similarity']
 
 # Save
-result = {
-    'model': model_name,
-    'kraje': kraje,
-    'matrix': matrix,
-    'avg_similarity': avg_similarity,
-    'domain_count': {k: len(texts_per_kraj[k]) for k in kraje},
-}
-
-with open('public/data/semanticka_podobnost.json', 'w', encoding='utf-8') as f:
+with open(OUT_PATH, 'w', encoding='utf-8') as f:
     json.dump(result, f, ensure_ascii=False, indent=2)
 
+STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+with open(STATE_PATH, 'w', encoding='utf-8') as f:
+    json.dump({'model': model_name, 'cache_version': CACHE_VERSION, 'fingerprints': fingerprints}, f,
+              ensure_ascii=False)
+
 print("\nSimilarity matrix:")
 for k1 in kraje:
     vals = [f"{matrix[k1][k2]:.2f}" for k2 in kraje]
@@ -113,4 +205,4 @@ print(f"\nAvg semantic similarity per kraj:")
 for k, v in sorted(avg_similarity.items(), key=lambda x: -x[1]):
     print(f"  {k:25s}: {v:.4f}")
 
-print("\nSaved to public/data/semanticka_podobnost.json")
+print(f"\nSaved to {OUT_PATH.as_posix()}")
@@ -0,0 +1,142 @@
+"""
+Incremental JSON reading and writing for large pipeline files.
+iter_json_array() yields the items of one top-level array (e.g. "projekty" in
+projekty_cep.json) without loading the whole document; GroupedArrayWriter
+collects array items per group in temporary spill files and assembles an
+output identical to json.dump(..., ensure_ascii=False, indent=2). Memory use
+stays bounded by the read buffer and the current item, not the file size.
+"""
+import json, os, tempfile
+
+READ_CHARS = 1 << 20
+
+
+def iter_json_array(path, key, read_chars=READ_CHARS):
+    """Items of the array under top-level `key` of the JSON object in `path`."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(read_chars)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            return not eof
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or not fill():
+                    return
+
+        def expect(chars):
+            skip_ws()
+            if pos >= len(buf) or buf[pos] not in chars:
+                raise ValueError(f"{path}: expected {chars!r} at item boundary")
+            return buf[pos]
+
+        def value():
+            # A value is complete once it decodes and is followed by a
+            # delimiter (a number cut at the buffer end would decode short)
+            nonlocal pos
+            skip_ws()
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                    if (end < len(buf) and buf[end] in ",:]} \t\r\n") or eof:
+                        pos = end
+                        return obj
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        expect("{")
+        pos += 1
+        while True:
+            if expect('"}') == "}":
+                raise KeyError(key)
+            name = value()
+            expect(":")
+            pos += 1
+            if name != key:
+                value()
+                if expect(",}") == "}":
+                    raise KeyError(key)
+                pos += 1
+                continue
+            expect("[")
+            pos += 1
+            skip_ws()
+            if buf[pos:pos + 1] == "]":
+                return
+            while True:
+                yield value()
+                if expect(",]") == "]":
+                    return
+                pos += 1
+
+
+class GroupedArrayWriter:
+    """Appends items to per-group arrays held in temporary files.
+
+    write() produces {**head, key: {group: [items]}} formatted exactly like
+    json.dump(indent=2, ensure_ascii=False), with groups in `groups` order
+    (or only the given subset, e.g. one group per shard file).
+    """
+
+    def __init__(self, groups):
+        self.groups = list(groups)
+        self._dir = tempfile.TemporaryDirectory(prefix="json_stream_")
+        self._files = {}
+        self.counts = {g: 0 for g in self.groups}
+
+    def append(self, group, items):
+        if not items:
+            return
+        f = self._files.get(group)
+        if f is None:
+            f = self._files[group] = open(os.path.join(self._dir.name, f"{len(self._files)}.part"),
+                                          "w+", encoding="utf-8")
+        for item in items:
+            if self.counts[group]:
+                f.write(",\n")
+            text = json.dumps(item, ensure_ascii=False, indent=2)
+            f.write("      " + text.replace("\n", "\n      "))
+            self.counts[group] += 1
+
+    def write(self, path, head, key, groups=None):
+        groups = self.groups if groups is None else list(groups)
+        head_text = json.dumps(head, ensure_ascii=False, indent=2)
+        with open(path, "w", encoding="utf-8") as out:
+            out.write(head_text[:-2] + ",\n" if head else "{\n")
+            out.write(f"  {json.dumps(key, ensure_ascii=False)}: ")
+            if not groups:
+                out.write("{}\n}")
+                return
+            out.write("{\n")
+            for gi, group in enumerate(groups):
+                out.write(f"    {json.dumps(group, ensure_ascii=False)}: ")
+                f = self._files.get(group)
+                if f is None:
+                    out.write("[]")
+                else:
+                    out.write("[\n")
+                    f.seek(0)
+                    while True:
+                        block = f.read(READ_CHARS)
+                        if not block:
+                            break
+                        out.write(block)
+                    out.write("\n    ]")
+                out.write(",\n" if gi < len(groups) - 1 else "\n")
+            out.write("  }\n}")
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._dir.cleanup()
@@ -0,0 +1,86 @@
+"""
+Table-driven line lexer for the per-kraj domain parsers.
+Every line of a section is classified once with precompiled patterns into a
+typed token; the kraj parsers are then small state machines over the tokens
+instead of running several regexes per line.
+
+Token kinds (first matching rule wins, blank lines are dropped):
+  page      page marker ('=== PAGE …' or a bare page number)
+  nace      NACE reference line in the kraj's style (value = the codes part)
+  numbered  '1. Name'  (value = name)
+  tier      '1) Name'  (value = name)
+  bullet    line starting with • or ●
+  dash      line starting with – (en dash)
+  hyphen    line starting with -
+  text      anything else (headers and continuation lines)
+"""
+import re
+from collections import namedtuple
+
+Token = namedtuple('Token', 'kind text value garbage pos')
+
+# NACE reference line styles used by the kraj cards
+NACE_LINE_PATTERNS = {
+    'vazba': re.compile(r'Vazba na CZ[- ]?NACE[:\s]*(.*)', re.IGNORECASE),
+    'vazba_domeny': re.compile(r'Vazb[ay]\s+dom[eé]n[yě]?\s+na\s+CZ[- ]?NACE[:\s]*(.*)', re.IGNORECASE),
+    'hlavni_vazby': re.compile(r'Hlavní vazby na CZ[\-\s]?NACE\s*[\-–:]\s*(.*)', re.IGNORECASE),
+    'stezejni': re.compile(r'Stěžejní\s+CZ\s*[-]?NACE\s+pro\s+tuto\s+doménu[:\s]*(.*)', re.IGNORECASE),
+    'souvisejici_odvetvi': re.compile(r'(?=.*Související odvětví)(?=.*CZ-NACE)'),
+}
+
+_PAGE_RE = re.compile(r'=== PAGE|\d{1,3}$')
+
+# (kind, pattern) tried in order with re.match on the stripped line
+_LINE_RULES = [
+    ('numbered', re.compile(r'(\d+)\.\s+(.+)')),
+    ('tier', re.compile(r'(\d)\)\s+(.+)')),
+]
+_LEAD_KINDS = {'•': 'bullet', '●': 'bullet', '–': 'dash', '-': 'hyphen'}
+
+
+def is_page_marker(line):
+    return bool(_PAGE_RE.match(line.strip()))
+
+
+def is_garbage(line):
+    """Detect OCR garbage lines."""
+    if len(line.strip()) < 3:
+        return True
+    # High ratio of unusual character sequences
+    alpha = sum(1 for c in line if c.isalpha())
+    if alpha > 0 and len(line.strip()) > 10:
+        spaces = line.count(' ')
+        if spaces / max(1, len(line.strip())) > 0.4:
+            return True
+    return False
+
+
+def classify(line_s, nace_re=None, check_garbage=False, pos=0):
+    """Token for one stripped, non-empty line starting at document offset `pos`."""
+    garbage = check_garbage and is_garbage(line_s)
+    if _PAGE_RE.match(line_s):
+        return Token('page', line_s, '', garbage, pos)
+    if nace_re is not None:
+        m = nace_re.search(line_s)
+        if m:
+            return Token('nace', line_s, m.group(1) if m.re.groups else '', garbage, pos)
+    for kind, pattern in _LINE_RULES:
+        m = pattern.match(line_s)
+        if m:
+            return Token(kind, line_s, m.group(2), garbage, pos)
+    return Token(_LEAD_KINDS.get(line_s[0], 'text'), line_s, '', garbage, pos)
+
+
+def lex(lines, nace=None, check_garbage=False):
+    """Tokens for an iterable of (offset, raw line) pairs, e.g. View.lines().
+
+    `nace` selects a NACE_LINE_PATTERNS style; `check_garbage` fills the
+    garbage flag (left False otherwise, as most kraje do not need it).
+    """
+    nace_re = NACE_LINE_PATTERNS[nace] if nace else None
+    tokens = []
+    for pos, line in lines:
+        line_s = line.strip()
+        if line_s:
+            tokens.append(classify(line_s, nace_re, check_garbage, pos))
+    return tokens
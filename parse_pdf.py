@@ -1,15 +1,11 @@
 """Parse domain descriptions from Priloha_2_NRIS3_v08.pdf"""
-import pdfplumber, json, re, sys
+import argparse, json, re, sys
+from pdf_extract import load_pages
+from text_document import Document
 sys.stdout.reconfigure(encoding='utf-8')
 
 pdf_path = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-podklady/data/Priloha_2_NRIS3_v08.pdf'
 
-with pdfplumber.open(pdf_path) as pdf:
-    full_text = ""
-    for page in pdf.pages:
-        t = page.extract_text() or ""
-        full_text += t + "\n\n"
-
 # Build kraj sections
 KRAJ_PATTERNS = [
     ('Jihočeský kraj\nKrajská RIS3', 'Jihočeský kraj'),
@@ -28,17 +24,19 @@ KRAJ_PATTERNS = [
     ('Zlínský kraj\nKrajská RIS3', 'Zlínský kraj'),
 ]
 
-positions = []
-for pattern, name in KRAJ_PATTERNS:
-    idx = full_text.find(pattern)
-    if idx >= 0:
-        positions.append((idx, name))
-positions.sort(key=lambda x: x[0])
+def split_kraje(doc):
+    positions = []
+    for pattern, name in KRAJ_PATTERNS:
+        idx = doc.text.find(pattern)
+        if idx >= 0:
+            positions.append((idx, name))
+    positions.sort(key=lambda x: x[0])
 
-kraj_texts = {}
-for i, (start, name) in enumerate(positions):
-    end = positions[i+1][0] if i+1 < len(positions) else len(full_text)
-    kraj_texts[name] = full_text[start:end]
+    kraj_texts = {}
+    for i, (start, name) in enumerate(positions):
+        end = positions[i+1][0] if i+1 < len(positions) else len(doc)
+        kraj_texts[name] = doc.view(start, end)
+    return kraj_texts
 
 def extract_nace(text):
     codes = re.findall(r'\b(\d{2})\b', text)
@@ -53,14 +51,14 @@ def find_domain_section(text):
             start = idx
             break
     if start is None:
-        return ""
-    end = len(text)
+        return text.view(text.start, text.start)
+    end = text.end
     for em in ['Vznikající', 'Emerging', 'Realizace krajské', 'Realizace Krajské',
                'Instituce s hlavní', 'V následující aktualizaci', 'Realizační rámec']:
         eidx = text.find(em, start + 50)
         if eidx >= 0:
             end = min(end, eidx)
-    return text[start:end]
+    return text.view(start, end)
 
 def parse_generic(text, kraj_name):
     """Generic parser that works for most kraje."""
@@ -68,7 +66,6 @@ def parse_generic(text, kraj_name):
     if not section:
         return []
 
-    lines = section.split('\n')
     domains = []
     current_name = None
     current_text = []
@@ -84,7 +81,7 @@ def parse_generic(text, kraj_name):
     # For MSK, skip intro paragraphs until numbered items
     in_intro = kraj_name == 'Moravskoslezský kraj'
 
-    for line in lines:
+    for _, line in section.lines():
         line = line.strip()
         if not line:
             continue
@@ -181,17 +178,19 @@ def parse_generic(text, kraj_name):
 
     return domains
 
+PRAHA_SPLIT_RE = re.compile(r'\n([A-D])\.\s+')
+
 def parse_praha(text):
     section = find_domain_section(text)
     if not section:
         return []
 
     domains = []
-    parts = re.split(r'\n([A-D])\.\s+', section)
+    headers = list(section.finditer(PRAHA_SPLIT_RE))
 
-    for i in range(1, len(parts)-1, 2):
-        letter = parts[i]
-        content = parts[i+1]
+    for i, m in enumerate(headers):
+        end = headers[i+1].start() if i+1 < len(headers) else section.end
+        content = str(section.view(m.end(), end))
         lines = content.strip().split('\n')
         name = lines[0].strip().rstrip(',')
         desc_lines = []
@@ -209,29 +208,44 @@ def parse_praha(text):
 
     return domains
 
-# Parse all kraje
-result = {}
-for kraj_name, text in kraj_texts.items():
-    if kraj_name == 'Hl. m. Praha':
-        domains = parse_praha(text)
-    else:
-        domains = parse_generic(text, kraj_name)
-
-    # Filter out garbage
-    domains = [d for d in domains if len(d['nazev']) > 3 and len(d['nazev']) < 120
-               and not d['nazev'].startswith('Zaměření domény')]
-
-    result[kraj_name] = domains
-    nace_count = sum(1 for d in domains if d['nace'])
-    avg_desc = sum(len(d['popis']) for d in domains) / max(1, len(domains))
-    print(f"  {kraj_name:25s}: {len(domains):2d} domains, {nace_count} with NACE, avg desc {avg_desc:.0f} chars")
-    for d in domains:
-        print(f"    - {d['nazev'][:60]:60s} [{len(d['nace'])} NACE, {len(d['popis']):4d} chars]")
-
-out_path = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-mapa-cr/public/data/domeny_plne_texty.json'
-with open(out_path, 'w', encoding='utf-8') as f:
-    json.dump(result, f, ensure_ascii=False, indent=2)
-
-total = sum(len(v) for v in result.values())
-with_desc = sum(1 for v in result.values() for d in v if len(d['popis']) > 30)
-print(f"\nTotal: {total} domains, {with_desc} with descriptions > 30 chars. Saved.")
+def main():
+    arg_parser = argparse.ArgumentParser(description='Parse domain descriptions from Příloha 2 NRIS3 v08.')
+    arg_parser.add_argument('--workers', type=int, default=1,
+                            help='processes for page extraction (1 = serial, 0 = all CPU cores)')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='re-extract every page instead of using .cache/pdf_text')
+    args = arg_parser.parse_args()
+
+    doc = Document(load_pages(pdf_path, workers=args.workers, use_cache=not args.no_cache))
+    kraj_texts = split_kraje(doc)
+
+    # Parse all kraje
+    result = {}
+    for kraj_name, text in kraj_texts.items():
+        if kraj_name == 'Hl. m. Praha':
+            domains = parse_praha(text)
+        else:
+            domains = parse_generic(text, kraj_name)
+
+        # Filter out garbage
+        domains = [d for d in domains if len(d['nazev']) > 3 and len(d['nazev']) < 120
+                   and not d['nazev'].startswith('Zaměření domény')]
+
+        result[kraj_name] = domains
+        nace_count = sum(1 for d in domains if d['nace'])
+        avg_desc = sum(len(d['popis']) for d in domains) / max(1, len(domains))
+        print(f"  {kraj_name:25s}: {len(domains):2d} domains, {nace_count} with NACE, avg desc {avg_desc:.0f} chars")
+        for d in domains:
+            print(f"    - {d['nazev'][:60]:60s} [{len(d['nace'])} NACE, {len(d['popis']):4d} chars]")
+
+    out_path = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-mapa-cr/public/data/domeny_plne_texty.json'
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    total = sum(len(v) for v in result.values())
+    with_desc = sum(1 for v in result.values() for d in v if len(d['popis']) > 30)
+    print(f"\nTotal: {total} domains, {with_desc} with descriptions > 30 chars. Saved.")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,22 +3,14 @@ Parse domain descriptions from Priloha_2_NRIS3_v08.pdf — v2 (robust per-kraj p
 Handles all 14 formatting variants. Extracts: domain names, full descriptions, NACE codes,
 and emerging domains.
 """
-import pdfplumber, json, re, sys
+import argparse, json, os, re, sys
+from line_lexer import lex
+from pdf_extract import find_marker_pages, load_pages, page_count
+from text_document import Document
 sys.stdout.reconfigure(encoding='utf-8')
 
 pdf_path = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-podklady/data/Priloha_2_NRIS3_v08.pdf'
 
-with pdfplumber.open(pdf_path) as pdf:
-    full_text = ""
-    for page in pdf.pages:
-        t = page.extract_text() or ""
-        full_text += t + "\n\n"
-
-# Also load the pre-extracted fulltext for reference/fallback
-fulltext_path = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-podklady/data/_priloha2_v08_fulltext.txt'
-with open(fulltext_path, 'r', encoding='utf-8') as f:
-    ref_text = f.read()
-
 # ── Build kraj sections ──────────────────────────────────────────────────────
 KRAJ_PATTERNS = [
     ('Jihočeský kraj\nKrajská RIS3', 'Jihočeský kraj'),
@@ -37,26 +29,104 @@ KRAJ_PATTERNS = [
     ('Zlínský kraj\nKrajská RIS3', 'Zlínský kraj'),
 ]
 
-positions = []
-for pattern, name in KRAJ_PATTERNS:
-    idx = full_text.find(pattern)
-    if idx >= 0:
-        positions.append((idx, name))
-    else:
-        print(f"  WARNING: Pattern not found for {name}")
-positions.sort(key=lambda x: x[0])
-
-kraj_texts = {}
-for i, (start, name) in enumerate(positions):
-    end = positions[i+1][0] if i+1 < len(positions) else len(full_text)
-    kraj_texts[name] = full_text[start:end]
+# Every literal marker the parsers look up. Documents index them in one pass
+# (see marker_scan); a marker missing here still works through str.find().
+SECTION_MARKERS = [
+    'Domény specializace Jihočeského kraje', 'Domény specializace Libereckého kraje',
+    'Domény specializace Kraje Vysočina', 'Domény specializace kraje (vertikální',
+    'Domény specializace kraje/ Klíčová', 'Domény specializace kraje/',
+    'Domény specializace kraje:', 'Domény specializace kraje',
+    'Tematické priority – Domény', 'Tematické priority — Domény', 'Tematické priority:',
+    'Tematické priority', 'Tematická specializace RIS MSK', 'Z pohledu koncových trhů',
+    'Odvětvové (aplikační) domény', 'Horizontální průřezové domény',
+    'horizontální průřezové domény', 'Vznikající', 'Emerging', 'Emerging domén',
+    'Realizace krajské', 'Realizace Krajské', 'Realiza', 'Instituce s hlavní',
+    'Instituce s hlavní výkonnou', 'RIS3 mise', 'směřuje budoucí',
+    'V následující aktualizaci', 'Opatření pro průmyslovou', 'Mezinárodní aktivity',
+]
+ALL_MARKERS = [p for p, _ in KRAJ_PATTERNS] + SECTION_MARKERS
+
+def split_kraje(doc):
+    """Split the Document into per-kraj card Views."""
+    cards = doc.view()
+    positions = []
+    for pattern, name in KRAJ_PATTERNS:
+        idx = cards.find(pattern)
+        if idx >= 0:
+            positions.append((idx, name))
+        else:
+            print(f"  WARNING: Pattern not found for {name}")
+    positions.sort(key=lambda x: x[0])
+
+    kraj_texts = {}
+    for i, (start, name) in enumerate(positions):
+        end = positions[i+1][0] if i+1 < len(positions) else len(doc)
+        kraj_texts[name] = doc.view(start, end)
+    return kraj_texts
+
+def extract_kraj_texts(kraj_names, workers=1, use_cache=True):
+    """Extract only the pages spanned by the requested kraj cards → kraj Views.
+
+    A cheap page-map pre-pass locates the first page of every card; a card runs
+    up to (and including) the page where the next card starts. Returns None if
+    a requested card cannot be located, so the caller can fall back to the full
+    document.
+    """
+    marker_pages = find_marker_pages(pdf_path, [p for p, _ in KRAJ_PATTERNS], use_cache=use_cache)
+    spans = {}
+    for pattern, name in KRAJ_PATTERNS:
+        if name not in kraj_names:
+            continue
+        first = marker_pages[pattern]
+        if first is None:
+            print(f"  WARNING: Page of {name} not found by pre-pass, extracting the whole document")
+            return None
+        later = [pg for pat, pg in marker_pages.items() if pat != pattern and pg is not None and pg > first]
+        last = min(later) if later else page_count(pdf_path) - 1
+        spans[name] = (pattern, first, last)
+
+    pages = sorted({pg for _, first, last in spans.values() for pg in range(first, last + 1)})
+    page_texts = dict(zip(pages, load_pages(pdf_path, pages, workers=workers, use_cache=use_cache)))
+
+    kraj_texts = {}
+    for name, (pattern, first, last) in spans.items():
+        doc = Document((page_texts[pg] for pg in range(first, last + 1)),
+                       page_numbers=range(first + 1, last + 2), markers=ALL_MARKERS)
+        text = doc.view()
+        start = text.find(pattern)
+        if start < 0:
+            print(f"  WARNING: Pattern not found for {name}")
+            continue
+        # Cards starting in this page window end the requested one, as in split_kraje()
+        end = len(doc)
+        for other, _ in KRAJ_PATTERNS:
+            pg = marker_pages.get(other)
+            if other != pattern and pg is not None and first <= pg <= last:
+                idx = text.find(other)
+                if start < idx < end:
+                    end = idx
+        kraj_texts[name] = doc.view(start, end)
+        print(f"  {name}: pages {first + 1}–{last + 1}")
+    return kraj_texts
 
 # ── Helper functions ─────────────────────────────────────────────────────────
 
+NACE_CODE_RE = re.compile(r'\b(\d{2})(?:\.\d+)?\b')
+WHITESPACE_RE = re.compile(r'\s+')
+INLINE_NACE_RE = re.compile(r'\(CZ-NACE\s+([\d,.\s]+)\)')
+INLINE_NACE_SUB_RE = re.compile(r'\s*\(CZ-NACE[^)]+\)')
+JHM_NACE_RE = re.compile(r'\(těžišt[eě]\s+v\s+CZ-NACE\s+([\d,. a částicásti]+)\)')
+JHM_NACE_SUB_RE = re.compile(r'\s*\(těžišt[eě][^)]+\)')
+VYSOCINA_NACE_RE = re.compile(r'\((?:CZ-)?NACE\s+([\d,. a]+)\)')
+VYSOCINA_NACE_SUB_RE = re.compile(r'\((?:CZ-)?NACE[^)]+\)')
+FOOTNOTE_RE = re.compile(r'\d+\s+viz:')
+PRAHA_SPLIT_RE = re.compile(r'\n([A-D])\.\s+')
+MSK_EMERGING_RE = re.compile(r'\d+\.\s+([^\n]+)')
+
 def extract_nace_codes(text):
     """Extract 2-digit NACE codes from text. Handles various formats."""
     # Find all 2-digit numbers that look like NACE codes (01-99)
-    codes = re.findall(r'\b(\d{2})(?:\.\d+)?\b', text)
+    codes = NACE_CODE_RE.findall(text)
     # Deduplicate preserving order, filter valid range
     seen = set()
     result = []
@@ -67,44 +137,53 @@ def extract_nace_codes(text):
     return result
 
 def find_section(text, start_markers, end_markers, start_offset=0):
-    """Find text section between start and end markers."""
+    """Find the section of a View between start and end markers.
+
+    Returns the section as a View (empty if no start marker is found) and its
+    start relative to `text`.
+    """
     start = None
     for m in start_markers:
-        idx = text.find(m, start_offset)
+        idx = text.find(m, text.start + start_offset)
         if idx >= 0:
             start = idx
             break
     if start is None:
-        return "", 0
-    end = len(text)
+        return text.view(text.start, text.start), 0
+    end = text.end
     for em in end_markers:
         eidx = text.find(em, start + 50)
         if eidx >= 0 and eidx < end:
             end = eidx
-    return text[start:end], start
-
-def is_page_marker(line):
-    return line.strip().startswith('=== PAGE') or re.match(r'^\d{1,3}$', line.strip())
-
-def is_garbage(line):
-    """Detect OCR garbage lines."""
-    if len(line.strip()) < 3:
-        return True
-    # High ratio of unusual character sequences
-    alpha = sum(1 for c in line if c.isalpha())
-    if alpha > 0 and len(line.strip()) > 10:
-        spaces = line.count(' ')
-        if spaces / max(1, len(line.strip())) > 0.4:
-            return True
-    return False
+    return text.view(start, end), start - text.start
 
 def clean_domain_name(name):
     """Clean up a domain name string."""
     name = name.strip().rstrip(',').rstrip('.')
-    name = re.sub(r'\s+', ' ', name)
+    name = WHITESPACE_RE.sub(' ', name)
     return name
 
+def emerging_bullets(section, kinds=('bullet',), min_len=5, strip='•●– '):
+    """Bulleted items of an emerging-domain section longer than `min_len`."""
+    items = []
+    for tok in lex(section.lines()):
+        if tok.kind in kinds:
+            clean = tok.text.lstrip(strip).strip()
+            if clean and len(clean) > min_len:
+                items.append(clean)
+    return items
+
+def emerging_lines(section, skip_garbage=False):
+    """Every non-marker line of an emerging-domain section longer than 10 chars."""
+    items = []
+    for tok in lex(section.lines(), check_garbage=skip_garbage):
+        if (len(tok.text) > 10 and tok.kind != 'page' and not tok.garbage
+                and not tok.text.startswith(('Vznikající', 'Emerging'))):
+            items.append(tok.text)
+    return items
+
 # ── Per-kraj parsers ─────────────────────────────────────────────────────────
+# Each parser is a small state machine over line_lexer tokens.
 
 def parse_jihocesky(text):
     """Plain headers, bullets •, NACE on 'Vazba na CZ-NACE: hlavni vazby: ...'"""
@@ -114,34 +193,32 @@ def parse_jihocesky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines(), nace='vazba'):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Domény specializace'):
             continue
 
-        nace_match = re.search(r'Vazba na CZ[- ]?NACE[:\s]*(.*)', line_s, re.IGNORECASE)
-        if nace_match:
+        if tok.kind == 'nace':
             if current:
-                current['nace'] = extract_nace_codes(nace_match.group(1))
+                current['nace'] = extract_nace_codes(tok.value)
                 domains.append(current)
                 current = None
             continue
 
-        if line_s.startswith(('•', '●', '–', '-')) and current:
+        if tok.kind in ('bullet', 'dash', 'hyphen') and current:
             clean = line_s.lstrip('•●–- ').strip()
             if clean:
                 current['desc_lines'].append(clean)
-        elif not line_s.startswith(('•', '●')) and len(line_s) < 100 and line_s[0].isupper():
+        elif tok.kind != 'bullet' and len(line_s) < 100 and line_s[0].isupper():
             # Save previous domain
             if current and current['desc_lines']:
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
         elif current:
             current['desc_lines'].append(line_s)
 
@@ -154,14 +231,9 @@ def parse_jihocesky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské', 'Instituce s hlavní'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if line_s.startswith(('•', '●', '–')):
-                clean = line_s.lstrip('•●–- ').strip()
-                if clean and len(clean) > 5:
-                    emerging.append(clean)
+        emerging = emerging_bullets(em_section, kinds=('bullet', 'dash'), strip='•●–- ')
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_jihomoravsky(text):
@@ -172,25 +244,25 @@ def parse_jihomoravsky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines()):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         # Domain lines are bullets with inline NACE
         if line_s.startswith('•') and 'CZ-NACE' in line_s:
-            nace_match = re.search(r'\(těžišt[eě]\s+v\s+CZ-NACE\s+([\d,. a částicásti]+)\)', line_s)
+            nace_match = JHM_NACE_RE.search(line_s)
             nace_codes = extract_nace_codes(nace_match.group(1)) if nace_match else []
             # Remove the NACE parenthetical from domain name
-            name = re.sub(r'\s*\(těžišt[eě][^)]+\)', '', line_s)
+            name = JHM_NACE_SUB_RE.sub('', line_s)
             name = name.lstrip('•●– ').strip()
             if name and len(name) > 3:
                 domains.append({
                     'nazev': clean_domain_name(name),
                     'desc_lines': [],  # JHM domains don't have individual descriptions
                     'nace': nace_codes,
+                    'pos': tok.pos,
                 })
 
     # Emerging
@@ -199,14 +271,9 @@ def parse_jihomoravsky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské', 'Instituce s hlavní'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if line_s.startswith(('•', '●')):
-                clean = line_s.lstrip('•●– ').strip()
-                if clean and len(clean) > 5:
-                    emerging.append(clean)
+        emerging = emerging_bullets(em_section)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_karlovarsky(text):
@@ -217,37 +284,35 @@ def parse_karlovarsky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines(), nace='vazba'):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Domény specializace'):
             continue
 
-        nace_match = re.search(r'Vazba na CZ[- ]?NACE[:\s]*(.*)', line_s, re.IGNORECASE)
-        if nace_match:
+        if tok.kind == 'nace':
             if current:
-                current['nace'] = extract_nace_codes(nace_match.group(1))
+                current['nace'] = extract_nace_codes(tok.value)
                 domains.append(current)
                 current = None
             continue
 
-        if line_s.startswith(('•', '●', '–')) and current:
+        if tok.kind in ('bullet', 'dash') and current:
             clean = line_s.lstrip('•●–- ').strip()
             if clean:
                 current['desc_lines'].append(clean)
-        elif not line_s.startswith(('•', '●')) and len(line_s) < 100 and line_s[0].isupper() and current is None or (current and not current['desc_lines']):
+        elif tok.kind != 'bullet' and len(line_s) < 100 and line_s[0].isupper() and current is None or (current and not current['desc_lines']):
             if current and current['desc_lines']:
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
-        elif not line_s.startswith(('•', '●')) and len(line_s) < 80 and line_s[0].isupper():
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
+        elif tok.kind != 'bullet' and len(line_s) < 80 and line_s[0].isupper():
             if current and current['desc_lines']:
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
         elif current:
             current['desc_lines'].append(line_s)
 
@@ -260,14 +325,9 @@ def parse_karlovarsky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské', 'Instituce s hlavní'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if line_s.startswith(('•', '●')):
-                clean = line_s.lstrip('•●– ').strip()
-                if clean and len(clean) > 10:
-                    emerging.append(clean)
+        emerging = emerging_bullets(em_section, min_len=10)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_kralovehradecky(text):
@@ -278,21 +338,19 @@ def parse_kralovehradecky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines(), nace='vazba_domeny'):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Domény specializace'):
             continue
 
-        nace_match = re.search(r'Vazb[ay]\s+dom[eé]n[yě]?\s+na\s+CZ[- ]?NACE[:\s]*(.*)', line_s, re.IGNORECASE)
-        if nace_match:
+        if tok.kind == 'nace':
             if current:
-                current['nace'] = extract_nace_codes(nace_match.group(1))
+                current['nace'] = extract_nace_codes(tok.value)
                 domains.append(current)
                 current = None
             continue
@@ -302,14 +360,14 @@ def parse_kralovehradecky(text):
             current['desc_lines'].append(line_s)
             continue
 
-        if line_s.startswith(('•', '●', '–')) and current:
+        if tok.kind in ('bullet', 'dash') and current:
             clean = line_s.lstrip('•●–- ').strip()
             if clean:
                 current['desc_lines'].append(clean)
-        elif not line_s.startswith(('•', '●')) and len(line_s) < 100 and line_s[0].isupper():
+        elif tok.kind != 'bullet' and len(line_s) < 100 and line_s[0].isupper():
             if current and (current['desc_lines'] or current['nace']):
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
         elif current:
             current['desc_lines'].append(line_s)
 
@@ -322,14 +380,9 @@ def parse_kralovehradecky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské', 'Instituce s hlavní'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if line_s.startswith(('•', '●')):
-                clean = line_s.lstrip('•●– ').strip()
-                if clean and len(clean) > 5:
-                    emerging.append(clean)
+        emerging = emerging_bullets(em_section)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_liberecky(text):
@@ -340,33 +393,31 @@ def parse_liberecky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line) or is_garbage(line_s):
+    for tok in lex(section.lines(), nace='vazba_domeny', check_garbage=True):
+        line_s = tok.text
+        if tok.kind == 'page' or tok.garbage:
             continue
         if line_s.startswith('Domény specializace'):
             continue
 
-        nace_match = re.search(r'Vazb[ay]\s+dom[eé]n[yě]?\s+na\s+CZ[- ]?NACE[:\s]*(.*)', line_s, re.IGNORECASE)
-        if nace_match:
+        if tok.kind == 'nace':
             if current:
-                current['nace'] = extract_nace_codes(nace_match.group(1))
+                current['nace'] = extract_nace_codes(tok.value)
                 domains.append(current)
                 current = None
             continue
 
-        if line_s.startswith(('•', '●', '–')) and current:
+        if tok.kind in ('bullet', 'dash') and current:
             clean = line_s.lstrip('•●–- ').strip()
             if clean:
                 current['desc_lines'].append(clean)
-        elif not line_s.startswith(('•', '●')) and len(line_s) < 120 and len(line_s) > 10 and line_s[0].isupper() and not any(skip in line_s for skip in ['Informuje', 'předpokládat', 'perspektiv']):
+        elif tok.kind != 'bullet' and len(line_s) < 120 and len(line_s) > 10 and line_s[0].isupper() and not any(skip in line_s for skip in ['Informuje', 'předpokládat', 'perspektiv']):
             if current and (current['desc_lines'] or current['nace']):
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
         elif current:
             current['desc_lines'].append(line_s)
 
@@ -379,14 +430,18 @@ def parse_liberecky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské', 'Realiza'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if len(line_s) > 10 and not is_page_marker(line) and not is_garbage(line_s) and not line_s.startswith(('Vznikající', 'Emerging')):
-                emerging.append(line_s)
+        emerging = emerging_lines(em_section, skip_garbage=True)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
+MSK_INTRO_SKIPS = [
+    'Tematická specializace', 'Z hlediska EDP', 'Z pohledu koncových',
+    'Z pohledu technologických', 'byly formulovány', 'prioritám při rozvoji',
+    'aktualizaci RIS MSK', 'Současně s tím', 'příležitosti pro více',
+    'specializace vychází', 'vzájemně propojených'
+]
+
 def parse_moravskoslezsky(text):
     """Numbered domains in 2 groups, 'Zaměření domény:' blocks, 'Hlavní vazby na CZ-NACE - NN'"""
     section, _ = find_section(text,
@@ -395,43 +450,35 @@ def parse_moravskoslezsky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
     in_description = False
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines(), nace='hlavni_vazby'):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
 
         # Skip intro paragraphs
-        if any(skip in line_s for skip in [
-            'Tematická specializace', 'Z hlediska EDP', 'Z pohledu koncových',
-            'Z pohledu technologických', 'byly formulovány', 'prioritám při rozvoji',
-            'aktualizaci RIS MSK', 'Současně s tím', 'příležitosti pro více',
-            'specializace vychází', 'vzájemně propojených'
-        ]):
+        if any(skip in line_s for skip in MSK_INTRO_SKIPS):
             continue
 
-        # NACE line — use \u2013 explicitly for EN DASH
-        nace_match = re.search(r'Hlavní vazby na CZ[\-\s]?NACE\s*[\-\u2013:]\s*(.*)', line_s, re.IGNORECASE)
-        if nace_match:
+        # NACE line ('Hlavní vazby na CZ-NACE – NN', dash or colon)
+        if tok.kind == 'nace':
             if current:
-                current['nace'] = extract_nace_codes(nace_match.group(1))
+                current['nace'] = extract_nace_codes(tok.value)
                 domains.append(current)
                 current = None
                 in_description = False
             continue
 
         # Numbered domain
-        numbered = re.match(r'^(\d+)\.\s+(.+)', line_s)
-        if numbered and 'Zaměření' not in line_s:
+        if tok.kind == 'numbered' and 'Zaměření' not in line_s:
             if current:
                 # Previous domain — save it
                 if current['desc_lines']:
                     domains.append(current)
-            current = {'nazev': clean_domain_name(numbered.group(2)), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(tok.value), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
             in_description = False
             continue
 
@@ -450,8 +497,6 @@ def parse_moravskoslezsky(text):
 
         if in_description and current:
             current['desc_lines'].append(line_s)
-        elif current and not in_description:
-            pass
 
     if current and current['desc_lines']:
         domains.append(current)
@@ -460,18 +505,25 @@ def parse_moravskoslezsky(text):
     emerging = []
     em_idx = text.find('Emerging domén')
     if em_idx >= 0:
-        em_text = text[em_idx:]
-        em_end = em_text.find('Realiza')
+        em_end = text.find('Realiza', em_idx)
         if em_end < 0:
-            em_end = em_text.find('Instituce s hlavní')
-        if em_end > 0:
-            em_text = em_text[:em_end]
-        for m in re.finditer(r'\d+\.\s+([^\n]+)', em_text):
+            em_end = text.find('Instituce s hlavní', em_idx)
+        em_text = text.view(em_idx, em_end if em_end > em_idx else None)
+        for m in em_text.finditer(MSK_EMERGING_RE):
             name = m.group(1).strip()
             if name and 'Zaměření' not in name and len(name) > 5:
                 emerging.append(name)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
+
+
+def _split_name_desc(clean):
+    """'Name – description' (en dash or minus sign) → (name, desc)."""
+    for sep in ('–', '−'):
+        if sep in clean:
+            name, desc = clean.split(sep, 1)
+            return name.strip(), desc.strip()
+    return clean, ''
 
 
 def parse_olomoucky(text):
@@ -482,37 +534,26 @@ def parse_olomoucky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines()):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Domény specializace'):
             continue
 
-        if line_s.startswith(('•', '●')):
-            clean = line_s.lstrip('•●– ').strip()
-            if '–' in clean:
-                parts = clean.split('–', 1)
-                name = parts[0].strip()
-                desc = parts[1].strip() if len(parts) > 1 else ''
-            elif '−' in clean:
-                parts = clean.split('−', 1)
-                name = parts[0].strip()
-                desc = parts[1].strip() if len(parts) > 1 else ''
-            else:
-                name = clean
-                desc = ''
+        if tok.kind == 'bullet':
+            name, desc = _split_name_desc(line_s.lstrip('•●– ').strip())
             if name and len(name) > 3:
                 domains.append({
                     'nazev': clean_domain_name(name),
                     'desc_lines': [desc] if desc else [],
                     'nace': [],
+                    'pos': tok.pos,
                 })
 
-    return _finalize(domains), []
+    return _finalize(domains, text.doc), []
 
 
 def parse_pardubicky(text):
@@ -523,33 +564,31 @@ def parse_pardubicky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines(), nace='stezejni'):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Domény specializace'):
             continue
 
-        nace_match = re.search(r'Stěžejní\s+CZ\s*[-]?NACE\s+pro\s+tuto\s+doménu[:\s]*(.*)', line_s, re.IGNORECASE)
-        if nace_match:
+        if tok.kind == 'nace':
             if current:
-                current['nace'] = extract_nace_codes(nace_match.group(1))
+                current['nace'] = extract_nace_codes(tok.value)
                 domains.append(current)
                 current = None
             continue
 
-        if line_s.startswith(('•', '●', '–')) and current:
+        if tok.kind in ('bullet', 'dash') and current:
             clean = line_s.lstrip('•●–- ').strip()
             if clean:
                 current['desc_lines'].append(clean)
-        elif not line_s.startswith(('•', '●')) and 10 < len(line_s) < 100 and line_s[0].isupper() and not any(w in line_s.lower() for w in ['zaměření', 'stěžejní', 'preferované']):
+        elif tok.kind != 'bullet' and 10 < len(line_s) < 100 and line_s[0].isupper() and not any(w in line_s.lower() for w in ['zaměření', 'stěžejní', 'preferované']):
             if current and current['desc_lines']:
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
         elif current:
             current['desc_lines'].append(line_s)
 
@@ -562,12 +601,9 @@ def parse_pardubicky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if len(line_s) > 10 and not line_s.startswith(('Vznikající', 'Emerging')) and not is_page_marker(line):
-                emerging.append(line_s)
+        emerging = emerging_lines(em_section)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_plzensky(text):
@@ -578,25 +614,24 @@ def parse_plzensky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
     in_nace_block = False
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines(), nace='souvisejici_odvetvi'):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Tematické priority'):
             continue
 
         # NACE block header
-        if 'Související odvětví' in line_s and 'CZ-NACE' in line_s:
+        if tok.kind == 'nace':
             in_nace_block = True
             continue
 
         if in_nace_block:
-            if line_s.startswith('-') or line_s.startswith('–'):
+            if tok.kind in ('hyphen', 'dash'):
                 codes = extract_nace_codes(line_s)
                 if current:
                     current['nace'].extend(codes)
@@ -615,21 +650,21 @@ def parse_plzensky(text):
         if 'Preferované perspektivní' in line_s:
             continue
 
-        if line_s.startswith(('-', '–')) and current:
+        if tok.kind in ('hyphen', 'dash') and current:
             clean = line_s.lstrip('-– ').strip()
             if clean:
                 current['desc_lines'].append(clean)
-        elif not line_s.startswith(('-', '–', '•')) and 10 < len(line_s) < 80 and line_s[0].isupper():
+        elif tok.kind not in ('hyphen', 'dash') and not line_s.startswith('•') and 10 < len(line_s) < 80 and line_s[0].isupper():
             if current and (current['desc_lines'] or current['nace']):
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
         elif current:
             current['desc_lines'].append(line_s)
 
     if current and (current['desc_lines'] or current['nace']):
         domains.append(current)
 
-    return _finalize(domains), []
+    return _finalize(domains, text.doc), []
 
 
 def parse_praha(text):
@@ -641,21 +676,22 @@ def parse_praha(text):
         return [], []
 
     domains = []
-    parts = re.split(r'\n([A-D])\.\s+', section)
+    headers = list(section.finditer(PRAHA_SPLIT_RE))
 
-    for i in range(1, len(parts)-1, 2):
-        content = parts[i+1]
-        lines = content.strip().split('\n')
-        name = lines[0].strip().rstrip(',')
+    for i, m in enumerate(headers):
+        end = headers[i+1].start() if i+1 < len(headers) else section.end
+        tokens = lex(section.view(m.end(), end).lines())
+        name = tokens[0].text.rstrip(',') if tokens else ''
         desc_lines = []
-        for l in lines[1:]:
-            clean = l.strip().lstrip('●•–- ').strip()
-            if clean and not is_page_marker(l) and len(clean) > 3:
+        for tok in tokens[1:]:
+            clean = tok.text.lstrip('●•–- ').strip()
+            if clean and tok.kind != 'page' and len(clean) > 3:
                 desc_lines.append(clean)
         domains.append({
             'nazev': clean_domain_name(name),
             'desc_lines': desc_lines,
             'nace': [],
+            'pos': tokens[0].pos if tokens else m.start(),
         })
 
     # Check for planned future domains
@@ -664,14 +700,9 @@ def parse_praha(text):
         ['V následující aktualizaci'],
         ['Realizace krajské', 'Realizace Krajské'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if line_s.startswith(('•', '●')):
-                clean = line_s.lstrip('•●– ').strip()
-                if clean and len(clean) > 5:
-                    emerging.append(clean)
+        emerging = emerging_bullets(em_section)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_stredocesky(text):
@@ -682,32 +713,32 @@ def parse_stredocesky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines()):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Domény specializace'):
             continue
         # Skip footnotes
-        if re.match(r'^\d+\s+viz:', line_s):
+        if FOOTNOTE_RE.match(line_s):
             continue
 
-        inline_nace = re.search(r'\(CZ-NACE\s+([\d,.\s]+)\)', line_s)
-        if inline_nace and not line_s.startswith(('•', '●')):
+        inline_nace = INLINE_NACE_RE.search(line_s) if '(CZ-NACE' in line_s else None
+        if inline_nace and tok.kind != 'bullet':
             # Domain name with inline NACE
             if current and (current['desc_lines'] or current['nace']):
                 domains.append(current)
-            name = re.sub(r'\s*\(CZ-NACE[^)]+\)', '', line_s).strip()
+            name = INLINE_NACE_SUB_RE.sub('', line_s).strip()
             current = {
                 'nazev': clean_domain_name(name),
                 'desc_lines': [],
                 'nace': extract_nace_codes(inline_nace.group(1)),
+                'pos': tok.pos,
             }
-        elif line_s.startswith(('•', '●')) and current:
+        elif tok.kind == 'bullet' and current:
             clean = line_s.lstrip('•●– ').strip()
             if clean:
                 current['desc_lines'].append(clean)
@@ -723,14 +754,9 @@ def parse_stredocesky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if line_s.startswith(('•', '●')):
-                clean = line_s.lstrip('•●– ').strip()
-                if clean and len(clean) > 5:
-                    emerging.append(clean)
+        emerging = emerging_bullets(em_section)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_ustecky(text):
@@ -741,10 +767,8 @@ def parse_ustecky(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current_tier = None
-    current = None
 
     tier_headers = {
         'Hlavní oblasti specializace': 'hlavní',
@@ -752,9 +776,9 @@ def parse_ustecky(text):
         'Užší subdomény': 'subdomény',
     }
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines()):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Tematické priority'):
             continue
@@ -765,28 +789,28 @@ def parse_ustecky(text):
                 current_tier = tier
                 break
 
-        if line_s.startswith(('•', '●')):
-            clean = line_s.lstrip('•●–- ').strip()
-            if '–' in clean:
-                parts = clean.split('–', 1)
-                name = parts[0].strip()
-                desc = parts[1].strip()
-            elif '−' in clean:
-                parts = clean.split('−', 1)
-                name = parts[0].strip()
-                desc = parts[1].strip()
-            else:
-                name = clean
-                desc = ''
+        if tok.kind == 'bullet':
+            name, desc = _split_name_desc(line_s.lstrip('•●–- ').strip())
             if name and len(name) > 3:
                 domains.append({
                     'nazev': clean_domain_name(name),
                     'desc_lines': [desc] if desc else [],
                     'nace': [],
                     'tier': current_tier,
+                    'pos': tok.pos,
                 })
 
-    return _finalize(domains), []
+    return _finalize(domains, text.doc), []
+
+
+def _split_vysocina_nace(line):
+    """Inline '(NACE NN)' / '(CZ-NACE NN)' references → (codes, text without them)."""
+    if 'NACE' not in line:
+        return [], line
+    codes = []
+    for m in VYSOCINA_NACE_RE.findall(line):
+        codes.extend(extract_nace_codes(m))
+    return codes, VYSOCINA_NACE_SUB_RE.sub('', line).strip()
 
 
 def parse_vysocina(text):
@@ -797,37 +821,30 @@ def parse_vysocina(text):
     if not section:
         return [], []
 
-    lines = section.split('\n')
     domains = []
     current = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(section.lines()):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if line_s.startswith('Domény specializace'):
             continue
 
-        if line_s.startswith(('•', '●', '–')) and current:
-            clean = line_s.lstrip('•●–- ').strip()
-            # Extract inline NACE codes
-            nace_matches = re.findall(r'\((?:CZ-)?NACE\s+([\d,. a]+)\)', clean)
-            for m in nace_matches:
-                current['nace'].extend(extract_nace_codes(m))
-            # Remove NACE references from description
-            clean_desc = re.sub(r'\((?:CZ-)?NACE[^)]+\)', '', clean).strip()
+        if tok.kind in ('bullet', 'dash') and current:
+            # Extract inline NACE codes and remove them from the description
+            codes, clean_desc = _split_vysocina_nace(line_s.lstrip('•●–- ').strip())
+            current['nace'].extend(codes)
             if clean_desc:
                 current['desc_lines'].append(clean_desc)
-        elif not line_s.startswith(('•', '●')) and 10 < len(line_s) < 80 and line_s[0].isupper():
+        elif tok.kind != 'bullet' and 10 < len(line_s) < 80 and line_s[0].isupper():
             if current and (current['desc_lines'] or current['nace']):
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': []}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'pos': tok.pos}
         elif current:
             # Continuation line — also check for NACE codes
-            nace_matches = re.findall(r'\((?:CZ-)?NACE\s+([\d,. a]+)\)', line_s)
-            for m in nace_matches:
-                current['nace'].extend(extract_nace_codes(m))
-            clean_desc = re.sub(r'\((?:CZ-)?NACE[^)]+\)', '', line_s).strip()
+            codes, clean_desc = _split_vysocina_nace(line_s)
+            current['nace'].extend(codes)
             if clean_desc:
                 current['desc_lines'].append(clean_desc)
 
@@ -840,12 +857,9 @@ def parse_vysocina(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if len(line_s) > 10 and not line_s.startswith(('Vznikající', 'Emerging')) and not is_page_marker(line):
-                emerging.append(line_s)
+        emerging = emerging_lines(em_section)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 def parse_zlinsky(text):
@@ -859,29 +873,27 @@ def parse_zlinsky(text):
     if not v_section:
         return [], []
 
-    lines = v_section.split('\n')
     domains = []
     current = None
     current_tier = None
 
-    for line in lines:
-        line_s = line.strip()
-        if not line_s or is_page_marker(line):
+    for tok in lex(v_section.lines()):
+        line_s = tok.text
+        if tok.kind == 'page':
             continue
         if any(skip in line_s for skip in ['Odvětvové (aplikační)', 'Tematické priority']):
             continue
 
         # Tier headers: 1) ... 2) ... 3) ...
-        tier_match = re.match(r'^(\d)\)\s+(.+)', line_s)
-        if tier_match:
-            current_tier = tier_match.group(2)[:50]
+        if tok.kind == 'tier':
+            current_tier = tok.value[:50]
             continue
 
-        if line_s.startswith(('•', '●', '–')) and current:
+        if tok.kind in ('bullet', 'dash') and current:
             clean = line_s.lstrip('•●–- ').strip()
             if clean:
                 current['desc_lines'].append(clean)
-        elif not line_s.startswith(('•', '●')) and 10 < len(line_s) < 100 and line_s[0].isupper():
+        elif tok.kind != 'bullet' and 10 < len(line_s) < 100 and line_s[0].isupper():
             # Check it's not a tier description continuation
             if any(skip in line_s.lower() for skip in ['odvetví', 'odvetvích', 'jsou přitom', 'tato odvětvová']):
                 if current:
@@ -889,7 +901,7 @@ def parse_zlinsky(text):
                 continue
             if current and (current['desc_lines']):
                 domains.append(current)
-            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'tier': current_tier}
+            current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'tier': current_tier, 'pos': tok.pos}
         elif current:
             current['desc_lines'].append(line_s)
 
@@ -902,29 +914,29 @@ def parse_zlinsky(text):
         h_section_start = text.find('horizontální průřezové domény')
     if h_section_start >= 0:
         # End before "Opatření" or "Mezinárodní" or "Tematické priority"
-        h_end = len(text)
+        h_end = text.end
         for marker in ['Opatření pro průmyslovou', 'Mezinárodní aktivity', 'Tematické priority']:
             idx = text.find(marker, h_section_start + 20)
             if idx >= 0 and idx < h_end:
                 h_end = idx
-        h_section = text[h_section_start:h_end]
+        h_section = text.view(h_section_start, h_end)
         h_current = None
         h_domains = []
-        for line in h_section.split('\n'):
-            line_s = line.strip()
-            if not line_s or is_page_marker(line):
+        for tok in lex(h_section.lines()):
+            line_s = tok.text
+            if tok.kind == 'page':
                 continue
             if 'Horizontální' in line_s:
                 continue
 
-            if line_s.startswith(('•', '●', '–')) and h_current:
+            if tok.kind in ('bullet', 'dash') and h_current:
                 clean = line_s.lstrip('•●–- ').strip()
                 if clean:
                     h_current['desc_lines'].append(clean)
-            elif not line_s.startswith(('•', '●')) and 10 < len(line_s) < 80 and line_s[0].isupper():
+            elif tok.kind != 'bullet' and 10 < len(line_s) < 80 and line_s[0].isupper():
                 if h_current and h_current['desc_lines']:
                     h_domains.append(h_current)
-                h_current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'tier': 'horizontální'}
+                h_current = {'nazev': clean_domain_name(line_s), 'desc_lines': [], 'nace': [], 'tier': 'horizontální', 'pos': tok.pos}
             elif h_current:
                 h_current['desc_lines'].append(line_s)
         if h_current and h_current['desc_lines']:
@@ -938,18 +950,15 @@ def parse_zlinsky(text):
         ['Vznikající', 'Emerging'],
         ['Realizace krajské', 'Realizace Krajské'])
     if em_section:
-        for line in em_section.split('\n'):
-            line_s = line.strip()
-            if len(line_s) > 10 and not line_s.startswith(('Vznikající', 'Emerging')) and not is_page_marker(line):
-                emerging.append(line_s)
+        emerging = emerging_lines(em_section)
 
-    return _finalize(domains), emerging
+    return _finalize(domains, text.doc), emerging
 
 
 # ── Finalization ─────────────────────────────────────────────────────────────
 
-def _finalize(domains):
-    """Convert raw domain dicts to final format."""
+def _finalize(domains, doc):
+    """Convert raw domain dicts to final format, with page/line provenance."""
     result = []
     for d in domains:
         nazev = d['nazev']
@@ -957,7 +966,7 @@ def _finalize(domains):
             continue
         popis = ' '.join(d['desc_lines']).strip()
         # Clean up description
-        popis = re.sub(r'\s+', ' ', popis)
+        popis = WHITESPACE_RE.sub(' ', popis)
         nace = list(dict.fromkeys(d['nace']))  # Deduplicate
         text_pro_embedding = f"{nazev}: {popis}" if popis else nazev
         entry = {
@@ -968,6 +977,8 @@ def _finalize(domains):
         }
         if 'tier' in d and d['tier']:
             entry['tier'] = d['tier']
+        strana, radek = doc.locate(d['pos'])
+        entry['zdroj'] = {'strana': strana, 'radek': radek}
         result.append(entry)
     return result
 
@@ -991,86 +1002,129 @@ PARSERS = {
     'Zlínský kraj': parse_zlinsky,
 }
 
-result = {}
-all_emerging = {}
-total_domains = 0
-total_emerging = 0
-
-print("=" * 80)
-print("PARSING DOMAINS FROM PŘÍLOHA 2 NRIS3 v08")
-print("=" * 80)
-
-for kraj_name in PARSERS:
-    text = kraj_texts.get(kraj_name, '')
-    if not text:
-        print(f"\n  WARNING: No text found for {kraj_name}")
-        continue
-
-    parser = PARSERS[kraj_name]
-    domains, emerging = parser(text)
-
-    result[kraj_name] = domains
-    all_emerging[kraj_name] = emerging
-    total_domains += len(domains)
-    total_emerging += len(emerging)
-
-    nace_count = sum(1 for d in domains if d['nace'])
-    avg_desc = sum(len(d['popis']) for d in domains) / max(1, len(domains))
-    print(f"\n  {kraj_name:25s}: {len(domains):2d} domén, {nace_count} s NACE, prům. popis {avg_desc:.0f} znaků")
-    for d in domains:
-        tier_str = f" [{d['tier']}]" if 'tier' in d else ''
-        print(f"    - {d['nazev'][:60]:60s} [{len(d['nace']):2d} NACE, {len(d['popis']):5d} zn.]{tier_str}")
-    if emerging:
-        print(f"    Emerging ({len(emerging)}):")
-        for e in emerging[:3]:
-            print(f"      + {e[:70]}")
-
-# Save main output
-out_path = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-mapa-cr/public/data/domeny_plne_texty.json'
-# Convert list format to dict-of-dict format matching existing structure
-output = {}
-for kraj_name, domains in result.items():
-    kraj_dict = {}
-    for i, d in enumerate(domains):
-        kraj_dict[str(i)] = d
-    output[kraj_name] = kraj_dict
-
-with open(out_path, 'w', encoding='utf-8') as f:
-    json.dump(output, f, ensure_ascii=False, indent=2)
-
-# Also save domeny_kraje.json update
-kraje_out = {
-    'meta': {
-        'zdroj': 'Příloha 2 NRIS3 v08 (MPO, prosinec 2025)',
-        'parser': 'parse_pdf_v2.py',
-        'poznamka': 'Extrahováno z PDF automatickým parserem. NACE kódy pouze tam, kde jsou v dokumentu explicitně uvedeny.'
-    },
-    'kraje': {},
-    'statistika': {}
-}
-for kraj_name, domains in result.items():
-    kraje_out['kraje'][kraj_name] = {
-        'domeny': [
-            {
-                'nazev': d['nazev'],
-                'popis': d['popis'][:200] if d['popis'] else '',
-                'cz_nace': d['nace'],
-            }
-            for d in domains
-        ],
-        'emerging': all_emerging.get(kraj_name, []),
-    }
-    kraje_out['statistika'][kraj_name] = {
-        'pocet_domen': len(domains),
-        'pocet_s_nace': sum(1 for d in domains if d['nace']),
-        'prumerna_delka_popisu': round(sum(len(d['popis']) for d in domains) / max(1, len(domains))),
+OUT_PATH = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-mapa-cr/public/data/domeny_plne_texty.json'
+KRAJE_OUT_PATH = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-mapa-cr/public/data/domeny_kraje.json'
+
+def save_outputs(result, all_emerging, merge=False):
+    """Write domeny_plne_texty.json and domeny_kraje.json.
+
+    With merge=True only the given kraje are replaced in the existing files
+    (used by --kraj runs); the other kraje are kept as they are.
+    """
+    # Convert list format to dict-of-dict format matching existing structure
+    output = {}
+    for kraj_name, domains in result.items():
+        kraj_dict = {}
+        for i, d in enumerate(domains):
+            kraj_dict[str(i)] = d
+        output[kraj_name] = kraj_dict
+
+    # Also save domeny_kraje.json update
+    kraje_out = {
+        'meta': {
+            'zdroj': 'Příloha 2 NRIS3 v08 (MPO, prosinec 2025)',
+            'parser': 'parse_pdf_v2.py',
+            'poznamka': 'Extrahováno z PDF automatickým parserem. NACE kódy pouze tam, kde jsou v dokumentu explicitně uvedeny.'
+        },
+        'kraje': {},
+        'statistika': {}
     }
+    for kraj_name, domains in result.items():
+        kraje_out['kraje'][kraj_name] = {
+            'domeny': [
+                {
+                    'nazev': d['nazev'],
+                    'popis': d['popis'][:200] if d['popis'] else '',
+                    'cz_nace': d['nace'],
+                }
+                for d in domains
+            ],
+            'emerging': all_emerging.get(kraj_name, []),
+        }
+        kraje_out['statistika'][kraj_name] = {
+            'pocet_domen': len(domains),
+            'pocet_s_nace': sum(1 for d in domains if d['nace']),
+            'prumerna_delka_popisu': round(sum(len(d['popis']) for d in domains) / max(1, len(domains))),
+        }
 
-kraje_out_path = 'C:/Users/meisl/Downloads/Seminář CzechInvest pro RIS3 Analytiky/seminar_code_viz/ris3-mapa-cr/public/data/domeny_kraje.json'
-with open(kraje_out_path, 'w', encoding='utf-8') as f:
-    json.dump(kraje_out, f, ensure_ascii=False, indent=2)
+    if merge:
+        order = list(PARSERS)
+        if os.path.exists(OUT_PATH):
+            with open(OUT_PATH, encoding='utf-8') as f:
+                output = {**json.load(f), **output}
+            output = dict(sorted(output.items(), key=lambda kv: order.index(kv[0]) if kv[0] in order else len(order)))
+        if os.path.exists(KRAJE_OUT_PATH):
+            with open(KRAJE_OUT_PATH, encoding='utf-8') as f:
+                existing = json.load(f)
+            for key in ('kraje', 'statistika'):
+                merged = {**existing.get(key, {}), **kraje_out[key]}
+                kraje_out[key] = dict(sorted(merged.items(), key=lambda kv: order.index(kv[0]) if kv[0] in order else len(order)))
+
+    with open(OUT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    with open(KRAJE_OUT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(kraje_out, f, ensure_ascii=False, indent=2)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Parse domain descriptions from Příloha 2 NRIS3 v08.')
+    arg_parser.add_argument('--workers', type=int, default=1,
+                        help='processes for page extraction (1 = serial, 0 = all CPU cores)')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                        help='re-extract every page instead of using .cache/pdf_text')
+    arg_parser.add_argument('--kraj', action='append', choices=list(PARSERS), metavar='KRAJ',
+                        help='parse only this kraj (repeatable); extracts only its pages and '
+                             'updates its entries in the output files')
+    args = arg_parser.parse_args()
+    use_cache = not args.no_cache
+
+    kraj_texts = None
+    if args.kraj:
+        kraj_texts = extract_kraj_texts(args.kraj, workers=args.workers, use_cache=use_cache)
+    if kraj_texts is None:
+        doc = Document(load_pages(pdf_path, workers=args.workers, use_cache=use_cache),
+                       markers=ALL_MARKERS)
+        kraj_texts = split_kraje(doc)
+
+    result = {}
+    all_emerging = {}
+    total_domains = 0
+    total_emerging = 0
+
+    print("=" * 80)
+    print("PARSING DOMAINS FROM PŘÍLOHA 2 NRIS3 v08")
+    print("=" * 80)
+
+    for kraj_name in args.kraj or PARSERS:
+        text = kraj_texts.get(kraj_name, '')
+        if not text:
+            print(f"\n  WARNING: No text found for {kraj_name}")
+            continue
 
-print(f"\n{'=' * 80}")
-print(f"HOTOVO: {total_domains} domén + {total_emerging} emerging položek")
-print(f"Uloženo: {out_path}")
-print(f"Uloženo: {kraje_out_path}")
+        parser = PARSERS[kraj_name]
+        domains, emerging = parser(text)
+
+        result[kraj_name] = domains
+        all_emerging[kraj_name] = emerging
+        total_domains += len(domains)
+        total_emerging += len(emerging)
+
+        nace_count = sum(1 for d in domains if d['nace'])
+        avg_desc = sum(len(d['popis']) for d in domains) / max(1, len(domains))
+        print(f"\n  {kraj_name:25s}: {len(domains):2d} domén, {nace_count} s NACE, prům. popis {avg_desc:.0f} znaků")
+        for d in domains:
+            tier_str = f" [{d['tier']}]" if 'tier' in d else ''
+            print(f"    - {d['nazev'][:60]:60s} [{len(d['nace']):2d} NACE, {len(d['popis']):5d} zn.]{tier_str}")
+        if emerging:
+            print(f"    Emerging ({len(emerging)}):")
+            for e in emerging[:3]:
+                print(f"      + {e[:70]}")
+
+    save_outputs(result, all_emerging, merge=bool(args.kraj))
+
+    print(f"\n{'=' * 80}")
+    print(f"HOTOVO: {total_domains} domén + {total_emerging} emerging položek")
+    print(f"Uloženo: {OUT_PATH}")
+    print(f"Uloženo: {KRAJE_OUT_PATH}")
+
+if __name__ == '__main__':
+    main()
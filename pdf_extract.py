@@ -0,0 +1,190 @@
+"""
+Page text extraction for the NRIS3 annex, shared by parse_pdf.py and parse_pdf_v2.py.
+Page layout analysis in pdfplumber is pure CPU and pages are independent, so
+page ranges can be sharded across a process pool and reassembled in page order;
+the result is identical to the serial loop.
+
+Extracted pages are cached per page in .cache/pdf_text/ under a key made of
+the PDF content hash and the extractor settings, so re-running a parser after
+a regex tweak does not touch pdfplumber at all. Changing the PDF, the
+extract_text() parameters or the pdfplumber version yields a new key.
+
+find_marker_pages() is a cheap pre-pass (no layout analysis) that locates the
+pages on which given markers start, so a single kraj card can be extracted
+without laying out the whole annex.
+"""
+import hashlib, json, os, re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pdfplumber
+
+CACHE_DIR = Path(".cache/pdf_text")
+EXTRACT_KWARGS = {}   # passed to page.extract_text(); part of the cache key
+
+_worker_pdf = None
+
+
+def _open_worker(pdf_path):
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+
+def _page_text(page):
+    text = page.extract_text(**EXTRACT_KWARGS) or ""
+    if hasattr(page, 'close'):   # release cached layout objects (pdfplumber >= 0.10)
+        page.close()
+    return text
+
+
+def _extract_range(page_range):
+    start, stop = page_range
+    return [_page_text(_worker_pdf.pages[i]) for i in range(start, stop)]
+
+
+def page_count(pdf_path):
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pages(pdf_path, pages=None, workers=1):
+    """Extracted text of the given page indices (default: all), in order.
+
+    workers=1 runs the plain serial loop, workers=0 uses every CPU core.
+    Pages are split into contiguous shards, a few per worker for load balancing.
+    """
+    if pages is None:
+        pages = range(page_count(pdf_path))
+    pages = list(pages)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(pages))
+
+    if workers <= 1:
+        with pdfplumber.open(pdf_path) as pdf:
+            return [_page_text(pdf.pages[i]) for i in pages]
+
+    # Shard into runs of consecutive page numbers
+    shard_size = max(1, -(-len(pages) // (workers * 4)))
+    shards = []
+    for lo in range(0, len(pages), shard_size):
+        chunk = pages[lo:lo + shard_size]
+        run_start = chunk[0]
+        for prev, cur in zip(chunk, chunk[1:] + [None]):
+            if cur != prev + 1:
+                shards.append((run_start, prev + 1))
+                run_start = cur
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker,
+                             initargs=(pdf_path,)) as pool:
+        texts = []
+        for part in pool.map(_extract_range, shards):
+            texts.extend(part)
+    return texts
+
+
+def join_pages(page_texts):
+    """Full document text exactly as the original `full_text += t + "\\n\\n"` loop."""
+    return "".join(t + "\n\n" for t in page_texts)
+
+
+def pdf_hash(pdf_path):
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _settings_key():
+    settings = {'pdfplumber': pdfplumber.__version__, 'extract_text': EXTRACT_KWARGS}
+    blob = json.dumps(settings, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest()[:12], settings
+
+
+def cache_path(pdf_path, cache_dir=CACHE_DIR):
+    key, _ = _settings_key()
+    return Path(cache_dir) / f"{pdf_hash(pdf_path)[:16]}-{key}.json"
+
+
+def _load_entry(pdf_path, cache_dir):
+    path = cache_path(pdf_path, cache_dir)
+    if path.exists():
+        with open(path, encoding='utf-8') as f:
+            return path, json.load(f)
+    _, settings = _settings_key()
+    return path, {'pdf': os.path.basename(pdf_path), 'settings': settings,
+                  'page_count': page_count(pdf_path), 'pages': {}, 'markers': {}}
+
+
+def _save_entry(path, entry):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_pages(pdf_path, pages=None, workers=1, cache_dir=CACHE_DIR, use_cache=True):
+    """Like extract_pages(), but served from the per-page cache when possible.
+
+    Only pages missing from the cache are extracted; they are added to it.
+    """
+    if not use_cache:
+        return extract_pages(pdf_path, pages, workers)
+
+    path, entry = _load_entry(pdf_path, cache_dir)
+    if pages is None:
+        pages = range(entry['page_count'])
+    pages = list(pages)
+    cached = entry['pages']
+    missing = [i for i in pages if str(i) not in cached]
+    if missing:
+        for i, text in zip(missing, extract_pages(pdf_path, missing, workers)):
+            cached[str(i)] = text
+        _save_entry(path, entry)
+    print(f"  Page text: {len(pages) - len(missing)}/{len(pages)} pages from cache")
+    return [cached[str(i)] for i in pages]
+
+
+def _compact(text):
+    return re.sub(r'\s+', '', text)
+
+
+def find_marker_pages(pdf_path, markers, cache_dir=CACHE_DIR, use_cache=True):
+    """First page index on which each marker occurs (None if not found).
+
+    Uses the extracted text when every page is already cached. Otherwise the
+    pages are scanned without layout analysis: the raw character stream (in
+    content order and in top/left order) is compared with the marker, both
+    with whitespace removed. Found pages are cached with the page texts;
+    misses are not, so a later run scans again rather than reusing them.
+    """
+    path, entry = _load_entry(pdf_path, cache_dir) if use_cache else (None, None)
+    if entry is not None:
+        entry.setdefault('markers', {})
+        # Entries written by older versions may hold cached misses (None)
+        if all(entry['markers'].get(m) is not None for m in markers):
+            return {m: entry['markers'][m] for m in markers}
+        if len(entry['pages']) == entry['page_count']:
+            texts = [entry['pages'][str(i)] for i in range(entry['page_count'])]
+            return {m: next((i for i, t in enumerate(texts) if m in t), None) for m in markers}
+
+    found = {}
+    wanted = {m: _compact(m) for m in markers}
+    with pdfplumber.open(pdf_path) as pdf:
+        for i, page in enumerate(pdf.pages):
+            chars = page.chars
+            streams = (_compact("".join(c['text'] for c in chars)),
+                       _compact("".join(c['text'] for c in
+                                        sorted(chars, key=lambda c: (round(c['top']), c['x0'])))))
+            for m, compact in wanted.items():
+                if m not in found and any(compact in st for st in streams):
+                    found[m] = i
+            if hasattr(page, 'close'):
+                page.close()
+            if len(found) == len(wanted):
+                break
+    result = {m: found.get(m) for m in markers}
+    if entry is not None and found:
+        entry['markers'].update(found)
+        _save_entry(path, entry)
+    return result
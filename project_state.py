@@ -0,0 +1,70 @@
+"""
+On-disk per-project results for incremental runs of compute_vav_semantic.py.
+Each run writes one row per project — key, fingerprint, kraj, raw score record
+(JSON) and best semantic similarity — into an SQLite file keyed by project
+key. The next run looks its chunks up by key and finds removed projects with
+one anti-join against the new file, so neither side is ever held in memory.
+"""
+import json, os, sqlite3
+
+LOOKUP_BATCH = 500   # keys per IN (...) query, below SQLite's parameter limit
+
+
+class ProjectState:
+    """Results of the previous run, read by key."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+
+    def get(self, keys):
+        """{key: (fingerprint, kraj, record, score)} for the stored keys among `keys`."""
+        keys = list(keys)
+        found = {}
+        for lo in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[lo:lo + LOOKUP_BATCH]
+            rows = self.conn.execute(
+                f"SELECT key, fp, kraj, record, score FROM projects WHERE key IN ({','.join('?' * len(batch))})",
+                batch)
+            for key, fp, kraj, record, score in rows:
+                found[key] = (fp, kraj, json.loads(record), score)
+        return found
+
+    def missing_from(self, writer):
+        """(kraj, record) of stored projects that `writer` (the current run) has no row for."""
+        writer.conn.commit()
+        self.conn.execute("ATTACH DATABASE ? AS cur", (str(writer.tmp_path),))
+        try:
+            rows = self.conn.execute(
+                "SELECT kraj, record FROM projects WHERE key NOT IN (SELECT key FROM cur.projects)")
+            for kraj, record in rows:
+                yield kraj, json.loads(record)
+        finally:
+            self.conn.execute("DETACH DATABASE cur")
+
+    def close(self):
+        self.conn.close()
+
+
+class ProjectStateWriter:
+    """Rows of the current run, in a temporary file that replaces `path` on close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path.with_suffix(".tmp")
+        self.tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.tmp_path.exists():
+            self.tmp_path.unlink()
+        self.conn = sqlite3.connect(self.tmp_path)
+        self.conn.execute("CREATE TABLE projects (key TEXT PRIMARY KEY, fp TEXT, kraj TEXT, "
+                          "record TEXT, score REAL)")
+
+    def add(self, rows):
+        """Append (key, fingerprint, kraj, record, score) rows."""
+        self.conn.executemany("INSERT INTO projects VALUES (?, ?, ?, ?, ?)",
+                              ((key, fp, kraj, json.dumps(record, ensure_ascii=False), score)
+                               for key, fp, kraj, record, score in rows))
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+        os.replace(self.tmp_path, self.path)
@@ -0,0 +1,157 @@
+"""
+Columnar format for the raw_scores of vav_semantic_match.json.
+Instead of one pretty-printed object per project, every kraj gets parallel
+columns; domain names and categories are dictionary-encoded and the numeric
+columns are base64 little-endian arrays:
+
+  "raw_scores_format": {"version": 1, "kategorie": [...],
+                        "max_similarity": {"dtype": "uint16", "scale": 0.0001, "offset": -1.0}}
+  "raw_scores": {kraj: {
+      "projekt_kod":    [kod, ...],
+      "domeny":         [domain name, ...]       dictionary for best_domena
+      "best_domena":    base64 uint16            index into domeny
+      "max_similarity": base64 uint16            offset + value · scale
+      "category":       base64 uint8             index into kategorie
+  }}
+
+Similarities are stored at the 4 decimals of the record format, so the
+columns decode to exactly the same records; ford_match and semantic_match
+follow from the category. read_raw_scores() accepts both formats, as does
+src/rawScores.js on the frontend.
+"""
+import base64, json, os, tempfile
+import numpy as np
+
+VERSION = 1
+SCORE_SCALE = 0.0001
+SCORE_OFFSET = -1.0
+CATEGORIES = ["v_obou", "jen_semantic", "jen_ford", "mimo_vse"]
+CATEGORY_MATCHES = {"v_obou": (True, True), "jen_semantic": (False, True),
+                    "jen_ford": (True, False), "mimo_vse": (False, False)}   # (ford, semantic)
+
+
+def _b64(array, dtype):
+    return base64.b64encode(np.asarray(array, dtype=np.dtype(dtype).newbyteorder("<")).tobytes()).decode("ascii")
+
+
+def _unb64(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=np.dtype(dtype).newbyteorder("<"))
+
+
+class ColumnarScoresWriter:
+    """Drop-in for json_stream.GroupedArrayWriter for raw_scores records:
+    columns are spilled per kraj to temporary files and assembled by write()."""
+
+    def __init__(self, kraje, domain_names):
+        self.groups = list(kraje)
+        self.domain_names = domain_names
+        self._domain_index = {k: {name: i for i, name in enumerate(domain_names[k])} for k in self.groups}
+        self._category_index = {c: i for i, c in enumerate(CATEGORIES)}
+        self._dir = tempfile.TemporaryDirectory(prefix="score_columns_")
+        self._files = {}
+        self.counts = {g: 0 for g in self.groups}
+
+    def _open(self, group):
+        files = self._files.get(group)
+        if files is None:
+            base = os.path.join(self._dir.name, str(len(self._files)))
+            files = self._files[group] = {
+                "kod": open(base + ".kod", "w+", encoding="utf-8"),
+                "columns": open(base + ".bin", "w+b"),
+            }
+        return files
+
+    def append(self, group, records):
+        if not records:
+            return
+        files = self._open(group)
+        domains = self._domain_index[group]
+        columns = np.empty(len(records), dtype=[("sim", "<u2"), ("domain", "<u2"), ("category", "u1")])
+        columns["sim"] = [round((r["max_similarity"] - SCORE_OFFSET) / SCORE_SCALE) for r in records]
+        columns["domain"] = [domains[r["best_domena"]] for r in records]
+        columns["category"] = [self._category_index[r["category"]] for r in records]
+        files["columns"].write(columns.tobytes())
+        for r in records:
+            files["kod"].write(json.dumps(r["projekt_kod"], ensure_ascii=False) + "\n")
+        self.counts[group] += len(records)
+
+    def _columns(self, group):
+        files = self._files.get(group)
+        if files is None:
+            return [], np.empty(0, dtype=[("sim", "<u2"), ("domain", "<u2"), ("category", "u1")])
+        files["kod"].seek(0)
+        files["columns"].seek(0)
+        kody = [json.loads(line) for line in files["kod"]]
+        columns = np.frombuffer(files["columns"].read(),
+                                dtype=[("sim", "<u2"), ("domain", "<u2"), ("category", "u1")])
+        return kody, columns
+
+    def write(self, path, head, key, groups=None):
+        groups = self.groups if groups is None else list(groups)
+        fmt = {"version": VERSION, "kategorie": CATEGORIES,
+               "max_similarity": {"dtype": "uint16", "scale": SCORE_SCALE, "offset": SCORE_OFFSET}}
+        compact = dict(ensure_ascii=False, separators=(",", ":"))
+        with open(path, "w", encoding="utf-8") as out:
+            head_text = json.dumps({**head, f"{key}_format": fmt}, **compact)
+            out.write(head_text[:-1] + f",{json.dumps(key)}:{{")
+            for gi, group in enumerate(groups):
+                kody, columns = self._columns(group)
+                out.write(json.dumps(group, **compact) + ":" + json.dumps({
+                    "projekt_kod": kody,
+                    "domeny": self.domain_names[group],
+                    "best_domena": _b64(columns["domain"], "u2"),
+                    "max_similarity": _b64(columns["sim"], "u2"),
+                    "category": _b64(columns["category"], "u1"),
+                }, **compact))
+                if gi < len(groups) - 1:
+                    out.write(",")
+            out.write("}}")
+
+    def close(self):
+        for files in self._files.values():
+            for f in files.values():
+                f.close()
+        self._dir.cleanup()
+
+
+def read_columns(data, key="raw_scores"):
+    """{kraj: {"projekt_kod": list, "domeny": list, "best_domena": uint16,
+    "max_similarity": float64, "category": uint8}} of a columnar file."""
+    fmt = data[f"{key}_format"]
+    if fmt["version"] != VERSION:
+        raise ValueError(f"Unsupported {key} format version {fmt['version']}")
+    scale = fmt["max_similarity"]["scale"]
+    offset = fmt["max_similarity"]["offset"]
+    return {
+        kraj: {
+            "projekt_kod": cols["projekt_kod"],
+            "domeny": cols["domeny"],
+            "best_domena": _unb64(cols["best_domena"], "u2"),
+            "max_similarity": np.round(_unb64(cols["max_similarity"], "u2") * scale + offset, 4),
+            "category": _unb64(cols["category"], "u1"),
+        }
+        for kraj, cols in data[key].items()
+    }
+
+
+def read_raw_scores(data, key="raw_scores"):
+    """{kraj: [record, ...]} from either the record or the columnar format."""
+    if f"{key}_format" not in data:
+        return data[key]
+    categories = data[f"{key}_format"]["kategorie"]
+    out = {}
+    for kraj, cols in read_columns(data, key).items():
+        records = []
+        for kod, domain, sim, cat in zip(cols["projekt_kod"], cols["best_domena"].tolist(),
+                                         cols["max_similarity"].tolist(), cols["category"].tolist()):
+            ford_match, semantic_match = CATEGORY_MATCHES[categories[cat]]
+            records.append({
+                "projekt_kod": kod,
+                "max_similarity": sim,
+                "best_domena": cols["domeny"][domain],
+                "ford_match": ford_match,
+                "semantic_match": semantic_match,
+                "category": categories[cat],
+            })
+        out[kraj] = records
+    return out
@@ -0,0 +1,60 @@
+// Kraje and okresy from the shared TopoJSON topology built by
+// build_topology.py: quantized, delta-encoded arcs that both layers reference.
+// Each level is fetched once; src/mapPaths.js projects it for the map slides.
+
+// Simplified levels of build_topology.py (LEVELS): name → map width in px
+const GEO_LEVELS = { s: 480, m: 1200 }
+
+function topologyUrl(level) {
+  const name = level ? `kraje_okresy.${level}.topo.json` : 'kraje_okresy.topo.json'
+  return `${import.meta.env.BASE_URL}data/${name}`
+}
+
+// Coarsest level that is exact to about a pixel on a map `mapWidth` px wide;
+// null (full detail) for maps wider than every level
+export function geoLevel(mapWidth) {
+  const fitting = Object.entries(GEO_LEVELS)
+    .filter(([, width]) => width >= mapWidth)
+    .sort((a, b) => a[1] - b[1])
+  return fitting.length ? fitting[0][0] : null
+}
+
+// Arcs as absolute points, each passed through `project(lon, lat)` once
+export function decodeArcs(topology, project = (lon, lat) => [lon, lat]) {
+  const [sx, sy] = topology.transform.scale
+  const [tx, ty] = topology.transform.translate
+  return topology.arcs.map(arc => {
+    let x = 0, y = 0
+    return arc.map(([dx, dy]) => {
+      x += dx
+      y += dy
+      return project(x * sx + tx, y * sy + ty)
+    })
+  })
+}
+
+function ring(arcIds, arcs) {
+  const points = []
+  for (const id of arcIds) {
+    const arc = id >= 0 ? arcs[id] : arcs[~id].slice().reverse()
+    for (let i = points.length ? 1 : 0; i < arc.length; i++) points.push(arc[i])
+  }
+  return points
+}
+
+// All rings (closed point lists) of a Polygon or MultiPolygon geometry
+export function geometryRings(geometry, arcs) {
+  const polygons = geometry.type === 'Polygon' ? [geometry.arcs] : geometry.arcs
+  return polygons.flatMap(polygon => polygon.map(r => ring(r, arcs)))
+}
+
+const topologyPromises = {}
+
+// Topology at `level` (see geoLevel), fetched once
+export function loadTopology(level = null) {
+  const key = level || 'full'
+  if (!topologyPromises[key]) {
+    topologyPromises[key] = fetch(topologyUrl(level)).then(r => r.json())
+  }
+  return topologyPromises[key]
+}
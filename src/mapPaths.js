@@ -0,0 +1,107 @@
+// Kraje and okresy as SVG paths in a fixed frame spanning the kraje
+// (d3.geoMercator scaled to FRAME_WIDTH). Each topology level is projected
+// once per session: every shared arc once, then the paths, centroids and
+// bboxes of both layers, and the result is memoized. A slide only places the
+// frame: fitFrame gives the translate + scale that d3's fitSize would, so
+// mounting a map again costs no projection work.
+
+import { decodeArcs, geometryRings, loadTopology } from './geoLayers'
+
+const FRAME_WIDTH = 1000
+
+// d3.geoMercator raw projection with the y axis pointing down
+function mercator(lon, lat) {
+  const phi = lat * Math.PI / 180
+  return [lon * Math.PI / 180, -Math.log(Math.tan(Math.PI / 4 + phi / 2))]
+}
+
+const round1 = v => Math.round(v * 10) / 10
+
+// Closed rings as absolute SVG path commands, to a tenth of a frame unit
+function pathData(rings) {
+  return rings.map(points =>
+    'M' + points.slice(0, -1).map(([x, y]) => `${round1(x)},${round1(y)}`).join('L') + 'Z').join('')
+}
+
+// Area-weighted centroid of all rings, signed as in d3's pathCentroid
+function centroid(rings) {
+  let sx = 0, sy = 0, sz = 0
+  for (const points of rings) {
+    for (let i = 1; i < points.length; i++) {
+      const [x0, y0] = points[i - 1]
+      const [x1, y1] = points[i]
+      const z = x0 * y1 - x1 * y0
+      sx += (x0 + x1) * z
+      sy += (y0 + y1) * z
+      sz += z * 3
+    }
+  }
+  if (sz === 0) {
+    const all = rings.flat()
+    return [mean(all, 0), mean(all, 1)]
+  }
+  return [sx / sz, sy / sz]
+}
+
+function mean(points, axis) {
+  return points.reduce((sum, p) => sum + p[axis], 0) / points.length
+}
+
+function bbox(rings) {
+  let x0 = Infinity, y0 = Infinity, x1 = -Infinity, y1 = -Infinity
+  for (const points of rings) {
+    for (const [x, y] of points) {
+      if (x < x0) x0 = x
+      if (y < y0) y0 = y
+      if (x > x1) x1 = x
+      if (y > y1) y1 = y
+    }
+  }
+  return [x0, y0, x1, y1]
+}
+
+function projectTopology(topology) {
+  const projected = decodeArcs(topology, mercator)
+  const [x0, y0, x1, y1] = bbox(topology.objects.kraje.geometries.flatMap(g => geometryRings(g, projected)))
+  const k = FRAME_WIDTH / (x1 - x0)
+  const frame = { width: FRAME_WIDTH, height: (y1 - y0) * k }
+  const arcs = projected.map(arc => arc.map(([x, y]) => [(x - x0) * k, (y - y0) * k]))
+
+  const layer = name => ({
+    frame,
+    features: topology.objects[name].geometries.map(g => {
+      const rings = geometryRings(g, arcs)
+      return { properties: g.properties, d: pathData(rings), centroid: centroid(rings), bbox: bbox(rings) }
+    }),
+  })
+  return { kraje: layer('kraje'), okresy: layer('okresy') }
+}
+
+const mapPathsPromises = {}
+
+// { kraje, okresy }: { frame, features: [{ properties, d, centroid, bbox }] }
+// at a level of src/geoLayers.js (see geoLevel)
+export function loadMapPaths(level = null) {
+  const key = level || 'full'
+  if (!mapPathsPromises[key]) {
+    mapPathsPromises[key] = loadTopology(level).then(projectTopology)
+  }
+  return mapPathsPromises[key]
+}
+
+// Placement of the frame in a [width, height] box at `offset`, as
+// d3.geoMercator().fitSize([width, height], kraje) with the translate shifted
+export function fitFrame(frame, [width, height], [dx, dy] = [0, 0]) {
+  const k = Math.min(width / frame.width, height / frame.height)
+  return { k, x: (width - k * frame.width) / 2 + dx, y: (height - k * frame.height) / 2 + dy }
+}
+
+// SVG transform of a placement, for a <g className="map-frame"> around the paths
+export function frameTransform({ k, x, y }) {
+  return `translate(${x},${y}) scale(${k})`
+}
+
+// Frame point (centroid, bbox corner) in screen coordinates
+export function placePoint({ k, x, y }, [px, py]) {
+  return [x + k * px, y + k * py]
+}
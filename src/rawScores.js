@@ -0,0 +1,54 @@
+// Reader for raw_scores of vav_semantic_match.json, in the record format or
+// the columnar one written by compute_vav_semantic.py --columnar (see
+// score_columns.py): per-kraj columns, base64 little-endian typed arrays.
+
+function fromBase64(text, ArrayType) {
+  const binary = atob(text)
+  const bytes = new Uint8Array(binary.length)
+  for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i)
+  return new ArrayType(bytes.buffer)
+}
+
+// { kraj: { projekt_kod, domeny, best_domena: Uint16Array,
+//           max_similarity: Float32Array, category: Uint8Array } }
+export function rawScoreColumns(data) {
+  const fmt = data.raw_scores_format
+  if (!fmt) throw new Error('raw_scores are not columnar')
+  if (fmt.version !== 1) throw new Error(`Unsupported raw_scores format ${fmt.version}`)
+  const { scale, offset } = fmt.max_similarity
+  const out = {}
+  for (const [kraj, cols] of Object.entries(data.raw_scores)) {
+    const quantized = fromBase64(cols.max_similarity, Uint16Array)
+    const similarity = new Float32Array(quantized.length)
+    for (let i = 0; i < quantized.length; i++) similarity[i] = quantized[i] * scale + offset
+    out[kraj] = {
+      projekt_kod: cols.projekt_kod,
+      domeny: cols.domeny,
+      best_domena: fromBase64(cols.best_domena, Uint16Array),
+      max_similarity: similarity,
+      category: fromBase64(cols.category, Uint8Array),
+    }
+  }
+  return out
+}
+
+// { kraj: [{ projekt_kod, max_similarity, best_domena, ford_match, semantic_match, category }] }
+export function rawScoreRecords(data) {
+  if (!data.raw_scores_format) return data.raw_scores
+  const categories = data.raw_scores_format.kategorie
+  const out = {}
+  for (const [kraj, cols] of Object.entries(rawScoreColumns(data))) {
+    out[kraj] = cols.projekt_kod.map((kod, i) => {
+      const category = categories[cols.category[i]]
+      return {
+        projekt_kod: kod,
+        max_similarity: Math.round(cols.max_similarity[i] * 1e4) / 1e4,
+        best_domena: cols.domeny[cols.best_domena[i]],
+        ford_match: category === 'v_obou' || category === 'jen_ford',
+        semantic_match: category === 'v_obou' || category === 'jen_semantic',
+        category,
+      }
+    })
+  }
+  return out
+}
@@ -2,6 +2,8 @@ import { useState, useEffect, useMemo } from 'react'
 import * as d3 from 'd3'
 import InfoPanel from '../InfoPanel'
 import CollapsiblePanel from '../CollapsiblePanel'
+import { geoLevel } from '../geoLayers'
+import { fitFrame, frameTransform, loadMapPaths, placePoint } from '../mapPaths'
 
 const INFO_TEXT = `⚠ Známé limitace této analýzy:
 
@@ -60,8 +62,9 @@ export default function SlideJaccardHeatmap() {
   const [dimensions, setDimensions] = useState({ width: 0, height: 0 })
 
   useEffect(() => {
+    const w = window.innerWidth
     Promise.all([
-      fetch(`${import.meta.env.BASE_URL}data/kraje.geojson`).then(r => r.json()),
+      loadMapPaths(geoLevel(w > 1024 ? w * 0.62 : w * 0.92)).then(paths => paths.kraje),
       fetch(`${import.meta.env.BASE_URL}data/domeny_kraje.json`).then(r => r.json()),
     ]).then(([geo, dom]) => {
       setGeoData(geo)
@@ -183,37 +186,29 @@ export default function SlideJaccardHeatmap() {
     }
   }, [])
 
-  // Map projection
+  // Map placement
   const mapSvgW = isDesktop ? dimensions.width : dimensions.width
   const mapSvgH = isDesktop ? dimensions.height : isTablet ? dimensions.height * 0.40 : dimensions.height * 0.38
 
-  const projection = useMemo(() => {
+  const placement = useMemo(() => {
     if (!geoData || dimensions.width === 0) return null
     const mapWidth = isDesktop ? dimensions.width * (isCompact ? 0.60 : 0.62) : dimensions.width * 0.92
     const mapHeight = isDesktop ? dimensions.height * (isCompact ? 0.66 : 0.70) : mapSvgH * 0.80
-    const proj = d3.geoMercator().fitSize([mapWidth, mapHeight], geoData)
-    const [tx, ty] = proj.translate()
     if (isDesktop) {
       // Push map down to clear title
-      proj.translate([tx + dimensions.width * 0.01, ty + (isCompact ? Math.max(90, dimensions.height * 0.12) : dimensions.height * 0.08)])
-    } else {
-      proj.translate([tx + dimensions.width * 0.04, ty + mapSvgH * 0.08])
+      return fitFrame(geoData.frame, [mapWidth, mapHeight],
+        [dimensions.width * 0.01, isCompact ? Math.max(90, dimensions.height * 0.12) : dimensions.height * 0.08])
     }
-    return proj
+    return fitFrame(geoData.frame, [mapWidth, mapHeight], [dimensions.width * 0.04, mapSvgH * 0.08])
   }, [geoData, dimensions, isDesktop, isCompact, mapSvgH])
 
-  const pathGenerator = useMemo(() => {
-    if (!projection) return null
-    return d3.geoPath().projection(projection)
-  }, [projection])
-
   const centroids = useMemo(() => {
-    if (!geoData || !pathGenerator) return {}
+    if (!geoData || !placement) return {}
     const result = {}
     const scale = Math.min(dimensions.width, dimensions.height) / 1000
     for (const feature of geoData.features) {
       const nuts = feature.properties.nutslau
-      const [cx, cy] = pathGenerator.centroid(feature)
+      const [cx, cy] = placePoint(placement, feature.centroid)
       if (nuts === 'CZ020') {
         result[nuts] = [cx + 25 * scale, cy + 30 * scale]
       } else {
@@ -221,7 +216,7 @@ export default function SlideJaccardHeatmap() {
       }
     }
     return result
-  }, [geoData, pathGenerator, dimensions])
+  }, [geoData, placement, dimensions])
 
   const stats = useMemo(() => {
     const entries = Object.values(krajInfo).filter(d => d.avgJaccard != null)
@@ -230,7 +225,7 @@ export default function SlideJaccardHeatmap() {
     return { avg: values.reduce((s, v) => s + v, 0) / values.length }
   }, [krajInfo])
 
-  if (!geoData || !pathGenerator || !stats || !matrix) {
+  if (!geoData || !placement || !stats || !matrix) {
     return (
       <div className="w-full h-full flex items-center justify-center bg-[#f8f9fa]">
         <p className="text-[#777] text-lg">Načítám data…</p>
@@ -249,7 +244,7 @@ export default function SlideJaccardHeatmap() {
   // ── Map SVG ──
   const renderMap = (svgW, svgH) => (
     <svg width={svgW} height={svgH} style={{ display: 'block' }}>
-      <g>
+      <g className="map-frame" transform={frameTransform(placement)}>
         {geoData.features.map((feature) => {
           const nuts = feature.properties.nutslau
           const info = krajInfo[nuts]
@@ -257,7 +252,7 @@ export default function SlideJaccardHeatmap() {
           return (
             <path
               key={nuts}
-              d={pathGenerator(feature)}
+              d={feature.d}
               className="kraj-path"
               fill={hasData ? mapColorScale(info.avgJaccard) : '#c0c0c0'}
               stroke="#fff"
@@ -567,7 +562,7 @@ export default function SlideJaccardHeatmap() {
 
         <svg width={width} height={height} className="absolute inset-0">
           {/* Map */}
-          <g>
+          <g className="map-frame" transform={frameTransform(placement)}>
             {geoData.features.map((feature) => {
               const nuts = feature.properties.nutslau
               const info = krajInfo[nuts]
@@ -575,7 +570,7 @@ export default function SlideJaccardHeatmap() {
               return (
                 <path
                   key={nuts}
-                  d={pathGenerator(feature)}
+                  d={feature.d}
                   className="kraj-path"
                   fill={hasData ? mapColorScale(info.avgJaccard) : '#c0c0c0'}
                   stroke="#fff"
@@ -2,6 +2,8 @@ import { useState, useEffect, useMemo } from 'react'
 import * as d3 from 'd3'
 import InfoPanel from '../InfoPanel'
 import CollapsiblePanel from '../CollapsiblePanel'
+import { geoLevel } from '../geoLayers'
+import { fitFrame, frameTransform, loadMapPaths, placePoint } from '../mapPaths'
 
 const INFO_TEXT = `VaV intenzita (výdaje na výzkum a vývoj v poměru k HDP) je základní ukazatel inovační kapacity regionu. Koláčové grafy ukazují sektorové členění výdajů — podnikatelský sektor (modrá), vládní sektor (červená) a vysokoškolský sektor (žlutá). Velikost koláče odpovídá celkovým výdajům na VaV v daném kraji. Podkladová vrstva ukazuje hranice okresů. Data pocházejí z ČSÚ, Statistická ročenka krajů 2025, tabulka 19.104.`
 
@@ -25,9 +27,10 @@ export default function SlideMapVav() {
   const [dimensions, setDimensions] = useState({ width: 0, height: 0 })
 
   useEffect(() => {
+    const layers = loadMapPaths(geoLevel(window.innerWidth * 0.90))
     Promise.all([
-      fetch(`${import.meta.env.BASE_URL}data/kraje.geojson`).then(r => r.json()),
-      fetch(`${import.meta.env.BASE_URL}data/okresy.geojson`).then(r => r.json()),
+      layers.then(l => l.kraje),
+      layers.then(l => l.okresy),
       fetch(`${import.meta.env.BASE_URL}data/vav_sektory_2024.json`).then(r => r.json()),
     ]).then(([kraje, okresy, sektory]) => {
       setKrajeGeo(kraje)
@@ -72,30 +75,23 @@ export default function SlideMapVav() {
     return d3.scaleSqrt().domain([0, max]).range([minR, maxR])
   }, [sektorData, svgWidth, svgHeight])
 
-  const projection = useMemo(() => {
+  const placement = useMemo(() => {
     if (!krajeGeo || svgWidth === 0) return null
     const mapHeight = svgHeight * (isCompact ? 0.72 : 0.78)
     const mapWidth = svgWidth * 0.90
-    const proj = d3.geoMercator().fitSize([mapWidth, mapHeight], krajeGeo)
-    const [tx, ty] = proj.translate()
     const topOffset = isDesktop ? (isCompact ? svgHeight * 0.08 : 0) : svgHeight * 0.06
-    proj.translate([tx + (svgWidth - mapWidth) / 2, ty + (svgHeight - mapHeight) * 0.15 + topOffset])
-    return proj
+    return fitFrame(krajeGeo.frame, [mapWidth, mapHeight],
+      [(svgWidth - mapWidth) / 2, (svgHeight - mapHeight) * 0.15 + topOffset])
   }, [krajeGeo, svgWidth, svgHeight, isDesktop, isCompact])
 
-  const pathGenerator = useMemo(() => {
-    if (!projection) return null
-    return d3.geoPath().projection(projection)
-  }, [projection])
-
   // Centroids for pie charts (with manual fix for Středočeský/Praha overlap)
   const centroids = useMemo(() => {
-    if (!krajeGeo || !pathGenerator) return {}
+    if (!krajeGeo || !placement) return {}
     const result = {}
     const scale = Math.min(svgWidth, svgHeight) / 1000
     for (const feature of krajeGeo.features) {
       const nuts = feature.properties.nutslau
-      const [cx, cy] = pathGenerator.centroid(feature)
+      const [cx, cy] = placePoint(placement, feature.centroid)
       if (nuts === 'CZ020') {
         result[nuts] = [cx + 30 * scale, cy + 35 * scale]
       } else {
@@ -103,7 +99,7 @@ export default function SlideMapVav() {
       }
     }
     return result
-  }, [krajeGeo, pathGenerator, svgWidth, svgHeight])
+  }, [krajeGeo, placement, svgWidth, svgHeight])
 
   // Pie arc generator
   const pieGen = useMemo(() => d3.pie().sort(null).value(d => d.value), [])
@@ -124,7 +120,7 @@ export default function SlideMapVav() {
   // Responsive SVG font helper
   const fs = (base) => Math.max(base * 0.6, Math.min(base, Math.min(svgWidth, svgHeight) / 1080 * base))
 
-  if (!krajeGeo || !pathGenerator || !sektorData || !stats) {
+  if (!krajeGeo || !placement || !sektorData || !stats) {
     return (
       <div className="w-full h-full flex items-center justify-center bg-[#f8f9fa]">
         <p className="text-[#777] text-lg">Načítám data…</p>
@@ -193,11 +189,11 @@ export default function SlideMapVav() {
     <svg width={w} height={h} style={{ display: 'block' }}>
       {/* Okresy base layer */}
       {okresyGeo && (
-        <g>
+        <g className="map-frame" transform={frameTransform(placement)}>
           {okresyGeo.features.map((feature) => (
             <path
               key={feature.properties.nutslau}
-              d={pathGenerator(feature)}
+              d={feature.d}
               fill="#F0F0F0"
               stroke="#DDD"
               strokeWidth={0.5}
@@ -207,14 +203,14 @@ export default function SlideMapVav() {
       )}
 
       {/* Kraje choropleth */}
-      <g>
+      <g className="map-frame" transform={frameTransform(placement)}>
         {krajeGeo.features.map((feature) => {
           const nuts = feature.properties.nutslau
           const info = sektorData.kraje[nuts]
           return (
             <path
               key={nuts}
-              d={pathGenerator(feature)}
+              d={feature.d}
               fill={info ? colorScale(info.intenzita_hdp_2024) : '#eee'}
               stroke="#fff"
               strokeWidth={1.5}
@@ -1,6 +1,8 @@
 import { useState, useEffect, useMemo } from 'react'
 import * as d3 from 'd3'
 import InfoPanel from '../InfoPanel'
+import { geoLevel } from '../geoLayers'
+import { fitFrame, frameTransform, loadMapPaths, placePoint } from '../mapPaths'
 
 const INFO_TEXT = `Sémantická podobnost se počítá pomocí jazykového modelu (sentence-transformers), který převádí texty popisů domén z krajských karet na vektory (embeddings). Cosine similarity těchto vektorů měří, jak obsahově blízké si popisy jsou — nezávisle na tom, jaké CZ-NACE kódy krajská karta formálně uvádí. Scatter plot porovnává oba přístupy: osa X = Jaccardova podobnost NACE kódů, osa Y = sémantická podobnost textů. Body mimo diagonálu ukazují rozpor mezi formální a obsahovou podobností.`
 
@@ -44,9 +46,11 @@ export default function SlideSemantic() {
   const [dimensions, setDimensions] = useState({ width: 0, height: 0 })
 
   useEffect(() => {
+    // Map is secondary here, a third of the width
+    const layers = loadMapPaths(geoLevel(window.innerWidth * 0.32))
     Promise.all([
-      fetch(`${import.meta.env.BASE_URL}data/kraje.geojson`).then(r => r.json()),
-      fetch(`${import.meta.env.BASE_URL}data/okresy.geojson`).then(r => r.json()),
+      layers.then(l => l.kraje),
+      layers.then(l => l.okresy),
       fetch(`${import.meta.env.BASE_URL}data/semanticka_podobnost.json`).then(r => r.json()),
       fetch(`${import.meta.env.BASE_URL}data/domeny_kraje.json`).then(r => r.json()),
     ]).then(([kraje, okresy, sem, domeny]) => {
@@ -142,29 +146,21 @@ export default function SlideSemantic() {
       .interpolator(t => d3.interpolateRgb('#f0f7e6', '#5A8A1C')(Math.pow(t, 0.7)))
   }, [semData])
 
-  const projection = useMemo(() => {
+  const placement = useMemo(() => {
     if (!krajeGeo || dimensions.width === 0) return null
     // Map is now secondary — smaller, upper right
     const mapWidth = dimensions.width * 0.32
     const mapHeight = dimensions.height * 0.38
-    const proj = d3.geoMercator().fitSize([mapWidth, mapHeight], krajeGeo)
-    const [tx, ty] = proj.translate()
-    proj.translate([tx + dimensions.width * 0.62, ty + dimensions.height * 0.12])
-    return proj
+    return fitFrame(krajeGeo.frame, [mapWidth, mapHeight], [dimensions.width * 0.62, dimensions.height * 0.12])
   }, [krajeGeo, dimensions])
 
-  const pathGenerator = useMemo(() => {
-    if (!projection) return null
-    return d3.geoPath().projection(projection)
-  }, [projection])
-
   // Centroids for kraj labels on map (with manual fix for Středočeský/Praha overlap)
   const centroids = useMemo(() => {
-    if (!krajeGeo || !pathGenerator) return {}
+    if (!krajeGeo || !placement) return {}
     const result = {}
     for (const feature of krajeGeo.features) {
       const name = feature.properties.nazev
-      const [cx, cy] = pathGenerator.centroid(feature)
+      const [cx, cy] = placePoint(placement, feature.centroid)
       if (name === 'Středočeský kraj') {
         result[name] = [cx + 20, cy + 25]
       } else {
@@ -172,9 +168,9 @@ export default function SlideSemantic() {
       }
     }
     return result
-  }, [krajeGeo, pathGenerator])
+  }, [krajeGeo, placement])
 
-  if (!krajeGeo || !pathGenerator || !semData || scatterData.length === 0) {
+  if (!krajeGeo || !placement || !semData || scatterData.length === 0) {
     return (
       <div className="w-full h-full flex items-center justify-center bg-[#f8f9fa]">
         <p className="text-[#777] text-lg">Načítám data…</p>
@@ -235,11 +231,11 @@ export default function SlideSemantic() {
       <svg width={width} height={height} className="absolute inset-0">
         {/* LEFT: Map */}
         {okresyGeo && (
-          <g>
+          <g className="map-frame" transform={frameTransform(placement)}>
             {okresyGeo.features.map((feature) => (
               <path
                 key={`o-${feature.properties.nutslau}`}
-                d={pathGenerator(feature)}
+                d={feature.d}
                 fill="#F0F0F0" stroke="#DDD" strokeWidth={0.5}
               />
             ))}
@@ -247,7 +243,7 @@ export default function SlideSemantic() {
         )}
 
         {/* Kraje choropleth by semantic similarity */}
-        <g>
+        <g className="map-frame" transform={frameTransform(placement)}>
           {krajeGeo.features.map((feature) => {
             const nuts = feature.properties.nutslau
             const name = feature.properties.nazev
@@ -255,7 +251,7 @@ export default function SlideSemantic() {
             return (
               <path
                 key={nuts}
-                d={pathGenerator(feature)}
+                d={feature.d}
                 fill={avgSem != null ? mapColorScale(avgSem) : '#eee'}
                 stroke="#fff" strokeWidth={1.5}
                 className="kraj-path"
@@ -2,6 +2,8 @@ import { useState, useEffect, useMemo, useRef, useCallback } from 'react'
 import * as d3 from 'd3'
 import InfoPanel from '../InfoPanel'
 import CollapsiblePanel from '../CollapsiblePanel'
+import { geoLevel } from '../geoLayers'
+import { fitFrame, frameTransform, loadMapPaths, placePoint } from '../mapPaths'
 
 const INFO_TEXT = `Tento slide kombinuje tři pohledy na tematickou blízkost krajů podle textů domén specializace z krajských karet (Příloha 2 NRIS3):
 
@@ -70,9 +72,11 @@ export default function SlideSemanticMerged() {
 
   // Load all data
   useEffect(() => {
+    const w = window.innerWidth
+    const layers = loadMapPaths(geoLevel(w > 1024 ? w * 0.58 : w * 0.92))
     Promise.all([
-      fetch(`${import.meta.env.BASE_URL}data/kraje.geojson`).then(r => r.json()),
-      fetch(`${import.meta.env.BASE_URL}data/okresy.geojson`).then(r => r.json()),
+      layers.then(l => l.kraje),
+      layers.then(l => l.okresy),
       fetch(`${import.meta.env.BASE_URL}data/semanticka_podobnost.json`).then(r => r.json()),
       fetch(`${import.meta.env.BASE_URL}data/domeny_kraje.json`).then(r => r.json()),
     ]).then(([kraje, okresy, sem, domeny]) => {
@@ -106,30 +110,23 @@ export default function SlideSemanticMerged() {
   const mapSvgW = dimensions.width
   const mapSvgH = isDesktop ? dimensions.height : isTablet ? dimensions.height * 0.42 : dimensions.height * 0.34
 
-  // ── MAP: projection ──
-  const projection = useMemo(() => {
+  // ── MAP: placement of the projected paths ──
+  const placement = useMemo(() => {
     if (!krajeGeo || dimensions.width === 0) return null
     const mapWidth = isDesktop ? dimensions.width * (isCompact ? 0.55 : 0.58) : dimensions.width * 0.92
     const mapHeight = isDesktop ? dimensions.height * (isCompact ? 0.50 : 0.55) : mapSvgH * 0.82
-    const proj = d3.geoMercator().fitSize([mapWidth, mapHeight], krajeGeo)
-    const [tx, ty] = proj.translate()
     // Title on this slide is tall (~90px: title + subtitle + indicators), push map below
-    proj.translate([tx + dimensions.width * 0.04, ty + (isDesktop ? Math.max(105, dimensions.height * 0.14) : mapSvgH * 0.06)])
-    return proj
+    return fitFrame(krajeGeo.frame, [mapWidth, mapHeight],
+      [dimensions.width * 0.04, isDesktop ? Math.max(105, dimensions.height * 0.14) : mapSvgH * 0.06])
   }, [krajeGeo, dimensions, isDesktop, isCompact, mapSvgH])
 
-  const pathGenerator = useMemo(() => {
-    if (!projection) return null
-    return d3.geoPath().projection(projection)
-  }, [projection])
-
   const centroids = useMemo(() => {
-    if (!krajeGeo || !pathGenerator) return {}
+    if (!krajeGeo || !placement) return {}
     const result = {}
     const scale = Math.min(dimensions.width, dimensions.height) / 1000
     for (const feature of krajeGeo.features) {
       const name = feature.properties.nazev
-      const [cx, cy] = pathGenerator.centroid(feature)
+      const [cx, cy] = placePoint(placement, feature.centroid)
       if (name === 'Středočeský kraj') {
         result[name] = [cx + 20 * scale, cy + 25 * scale]
       } else {
@@ -137,7 +134,7 @@ export default function SlideSemanticMerged() {
       }
     }
     return result
-  }, [krajeGeo, pathGenerator, dimensions])
+  }, [krajeGeo, placement, dimensions])
 
   // ── ALL PAIRS with zone classification ──
   const allPairsData = useMemo(() => {
@@ -323,7 +320,7 @@ export default function SlideSemanticMerged() {
   }, [hoveredNode, links])
 
   // ── Loading ──
-  if (!krajeGeo || !pathGenerator || !semData || !stats || nodes.length === 0) {
+  if (!krajeGeo || !placement || !semData || !stats || nodes.length === 0) {
     return (
       <div className="w-full h-full flex items-center justify-center bg-[#f8f9fa]">
         <p className="text-[#777] text-lg">Načítám data…</p>
@@ -671,11 +668,11 @@ export default function SlideSemanticMerged() {
         <svg ref={svgRef} width={width} height={height} className="absolute inset-0">
           {/* Okresy background */}
           {okresyGeo && (
-            <g>
+            <g className="map-frame" transform={frameTransform(placement)}>
               {okresyGeo.features.map((feature) => (
                 <path
                   key={`o-${feature.properties.nutslau}`}
-                  d={pathGenerator(feature)}
+                  d={feature.d}
                   fill="#F0F0F0" stroke="#DDD" strokeWidth={0.5}
                 />
               ))}
@@ -683,7 +680,7 @@ export default function SlideSemanticMerged() {
           )}
 
           {/* Kraje choropleth */}
-          <g>
+          <g className="map-frame" transform={frameTransform(placement)}>
             {krajeGeo.features.map((feature) => {
               const nuts = feature.properties.nutslau
               const name = feature.properties.nazev
@@ -691,7 +688,7 @@ export default function SlideSemanticMerged() {
               return (
                 <path
                   key={nuts}
-                  d={pathGenerator(feature)}
+                  d={feature.d}
                   fill={avgSem != null ? mapColorScale(avgSem) : '#eee'}
                   stroke="#fff" strokeWidth={1.5}
                   className="kraj-path"
@@ -826,20 +823,20 @@ export default function SlideSemanticMerged() {
       <div className="relative" style={{ height: mapSvgH, minHeight: 200, flexShrink: 0 }}>
         <svg width={width} height={mapSvgH} style={{ display: 'block' }}>
           {okresyGeo && (
-            <g>
+            <g className="map-frame" transform={frameTransform(placement)}>
               {okresyGeo.features.map((feature) => (
                 <path key={`o-${feature.properties.nutslau}`}
-                  d={pathGenerator(feature)} fill="#F0F0F0" stroke="#DDD" strokeWidth={0.5} />
+                  d={feature.d} fill="#F0F0F0" stroke="#DDD" strokeWidth={0.5} />
               ))}
             </g>
           )}
-          <g>
+          <g className="map-frame" transform={frameTransform(placement)}>
             {krajeGeo.features.map((feature) => {
               const nuts = feature.properties.nutslau
               const name = feature.properties.nazev
               const avgSem = semData.avg_similarity[name]
               return (
-                <path key={nuts} d={pathGenerator(feature)}
+                <path key={nuts} d={feature.d}
                   fill={avgSem != null ? mapColorScale(avgSem) : '#eee'}
                   stroke="#fff" strokeWidth={1.5} className="kraj-path"
                   onMouseMove={(e) => setTooltip({ x: e.clientX, y: e.clientY, type: 'map', name, avgSem, domains: semData.domain_count[name] || 0 })}
@@ -1,5 +1,6 @@
 import { useState, useEffect, useMemo } from 'react'
-import * as d3 from 'd3'
+import { geoLevel } from '../geoLayers'
+import { fitFrame, frameTransform, loadMapPaths } from '../mapPaths'
 
 export default function SlideTitle() {
   const [visible, setVisible] = useState(false)
@@ -12,7 +13,8 @@ export default function SlideTitle() {
   }, [])
 
   useEffect(() => {
-    fetch(`${import.meta.env.BASE_URL}data/kraje.geojson`).then(r => r.json()).then(setKrajeGeo)
+    // Faint background outline (opacity 0.08): the coarsest level is enough
+    loadMapPaths(geoLevel(0)).then(paths => setKrajeGeo(paths.kraje))
   }, [])
 
   useEffect(() => {
@@ -22,33 +24,28 @@ export default function SlideTitle() {
     return () => window.removeEventListener('resize', update)
   }, [])
 
-  const pathData = useMemo(() => {
+  const placement = useMemo(() => {
     if (!krajeGeo || dimensions.width === 0) return null
     const { width, height } = dimensions
     const mapW = width * 0.70
     const mapH = height * 0.70
-    const proj = d3.geoMercator().fitSize([mapW, mapH], krajeGeo)
-    const [tx, ty] = proj.translate()
-    proj.translate([tx + (width - mapW) / 2, ty + (height - mapH) / 2 + height * 0.02])
-    const gen = d3.geoPath().projection(proj)
-    return krajeGeo.features.map(f => ({
-      d: gen(f),
-      nuts: f.properties.nutslau,
-    }))
+    return fitFrame(krajeGeo.frame, [mapW, mapH], [(width - mapW) / 2, (height - mapH) / 2 + height * 0.02])
   }, [krajeGeo, dimensions])
 
   return (
     <div className="w-full h-full flex flex-col items-center justify-center bg-gradient-to-br from-[#0A416E] to-[#0b5a9e] px-4 sm:px-8 relative overflow-hidden">
       {/* Stylized map background */}
-      {pathData && (
+      {placement && (
         <svg
           width={dimensions.width} height={dimensions.height}
           className="absolute inset-0 pointer-events-none"
           style={{ opacity: visible ? 0.08 : 0, transition: 'opacity 2s ease-in' }}
         >
-          {pathData.map(({ d, nuts }) => (
-            <path key={nuts} d={d} fill="white" stroke="white" strokeWidth={1.5} />
-          ))}
+          <g className="map-frame" transform={frameTransform(placement)}>
+            {krajeGeo.features.map(({ d, properties }) => (
+              <path key={properties.nutslau} d={d} fill="white" stroke="white" strokeWidth={1.5} />
+            ))}
+          </g>
         </svg>
       )}
 
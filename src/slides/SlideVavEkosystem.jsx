@@ -2,6 +2,7 @@ import { useState, useEffect, useMemo } from 'react'
 import * as d3 from 'd3'
 import InfoPanel from '../InfoPanel'
 import CollapsiblePanel from '../CollapsiblePanel'
+import { rawScoreRecords } from '../rawScores'
 
 const INFO_TEXT = `Tento slide propojuje projekty z IS VaVaI (CEP, 2021–2025) s doménami specializace z krajských karet (Příloha 2 NRIS3) pomocí dvou nezávislých metod. FORD matching porovnává oborovou klasifikaci projektu s tematickým zaměřením domén. Sémantický matching využívá jazykový model k porovnání textu projektu (název + klíčová slova) s popisy domén. Kombinace metod odhaluje čtyři situace: silná shoda (obor i obsah sedí), skrytý potenciál (obsah blízký, ale jiný obor), formální shoda (obor sedí, ale obsah se liší) a bez shody.`
 
@@ -23,12 +24,36 @@ const SHORT = {
 export default function SlideVavEkosystem() {
   const [data, setData] = useState(null)
   const [tooltip, setTooltip] = useState(null)
+  const [selected, setSelected] = useState(null)
+  const [shards, setShards] = useState({})   // kraj → records, null while loading
+  const [shardErrors, setShardErrors] = useState({})
   const [dimensions, setDimensions] = useState({ width: 0, height: 0 })
 
+  // Only the summary is needed to render; a kraj's projects are fetched on click
   useEffect(() => {
-    fetch(`${import.meta.env.BASE_URL}data/vav_semantic_match.json`).then(r => r.json()).then(setData)
+    fetch(`${import.meta.env.BASE_URL}data/vav_semantic/summary.json`).then(r => r.json()).then(setData)
   }, [])
 
+  const openKraj = (kraj, segment, e) => {
+    setTooltip(null)
+    setSelected({ x: e.clientX, y: e.clientY, kraj, segment })
+    const shard = data.shards?.[kraj]
+    if (!shard || kraj in shards) return
+    setShards(s => ({ ...s, [kraj]: null }))
+    setShardErrors(errors => ({ ...errors, [kraj]: null }))
+    fetch(`${import.meta.env.BASE_URL}data/vav_semantic/${shard.soubor}`)
+      .then(r => {
+        if (!r.ok) throw new Error(`HTTP ${r.status}`)
+        return r.json()
+      })
+      .then(d => setShards(s => ({ ...s, [kraj]: rawScoreRecords(d)[kraj] || [] })))
+      .catch(err => {
+        // Forget the failed shard so that the next click retries it
+        setShards(({ [kraj]: _failed, ...rest }) => rest)
+        setShardErrors(errors => ({ ...errors, [kraj]: err.message }))
+      })
+  }
+
   useEffect(() => {
     const update = () => setDimensions({ width: window.innerWidth, height: window.innerHeight })
     update()
@@ -142,6 +167,7 @@ export default function SlideVavEkosystem() {
                   fill={seg.color} opacity={seg.key === 'mimo_vse' ? 0.5 : 0.85}
                   onMouseMove={(e) => setTooltip({ x: e.clientX, y: e.clientY, kraj: krajName, stats, segment: seg.key })}
                   onMouseLeave={() => setTooltip(null)}
+                  onClick={(e) => openKraj(krajName, seg.key, e)}
                   style={{ cursor: 'pointer' }}
                 />
               )
@@ -191,6 +217,48 @@ export default function SlideVavEkosystem() {
     </div>
   )
 
+  // ── Kraj detail (projects of the clicked segment, from the kraj's shard) ──
+  const selectedSeg = selected && SEGMENTS.find(s => s.key === selected.segment)
+  const selectedRecords = selected && shards[selected.kraj]
+  const selectedError = selected && shardErrors[selected.kraj]
+  const topProjects = selectedRecords
+    ? selectedRecords.filter(r => r.category === selected.segment)
+      .sort((a, b) => b.max_similarity - a.max_similarity)
+      .slice(0, 8)
+    : null
+  const detailEl = selected && (
+    <div className="map-tooltip" style={{
+      left: Math.min(selected.x + 12, width - 340),
+      top: Math.max(Math.min(selected.y - 10, height - 320), 10),
+      pointerEvents: 'auto',
+    }}>
+      <button onClick={() => setSelected(null)} aria-label="Zavřít"
+        style={{ position: 'absolute', top: 4, right: 8, color: '#777', cursor: 'pointer' }}>×</button>
+      <div className="tooltip-title">{selected.kraj}</div>
+      <div className="tooltip-value" style={{ fontSize: 11 }}>
+        <span style={{ color: selectedSeg.color }}>■</span> {selectedSeg.label} — projekty nejbližší doménám
+      </div>
+      {selectedError ? (
+        <div style={{ marginTop: 6, fontSize: 11, color: '#B00020' }}>
+          Projekty se nepodařilo načíst ({selectedError}). Klikněte na kraj znovu.
+        </div>
+      ) : !topProjects ? (
+        <div style={{ marginTop: 6, fontSize: 11, color: '#777' }}>Načítám projekty…</div>
+      ) : topProjects.length === 0 ? (
+        <div style={{ marginTop: 6, fontSize: 11, color: '#777' }}>Žádné projekty</div>
+      ) : (
+        <div style={{ marginTop: 6, borderTop: '1px solid #eee', paddingTop: 4, fontSize: 10 }}>
+          {topProjects.map((r, i) => (
+            <div key={`${r.projekt_kod}-${i}`} style={{ color: '#555', marginTop: 2 }}>
+              <strong style={{ color: '#0A416E' }}>{r.projekt_kod}</strong> · {r.max_similarity.toFixed(2)} ·{' '}
+              {r.best_domena.length > 40 ? r.best_domena.slice(0, 40) + '…' : r.best_domena}
+            </div>
+          ))}
+        </div>
+      )}
+    </div>
+  )
+
   // ── Right panel content (methodology + legend + summary) ──
   const cFs = isCompact ? 'text-[10px]' : 'text-[11px]'
   const methodologyContent = (
@@ -290,6 +358,7 @@ export default function SlideVavEkosystem() {
         </div>
 
         {tooltipEl}
+        {detailEl}
 
         {/* Source */}
         <div className="absolute bottom-2 sm:bottom-4 left-0 right-0 text-center text-[#777] z-10 px-4" style={{ fontSize: 'clamp(7px, 1vw, 10px)' }}>
@@ -320,6 +389,7 @@ export default function SlideVavEkosystem() {
       <div className="relative" style={{ height: chartSvgH, minHeight: 300, flexShrink: 0 }}>
         {chartSvg(width, chartSvgH)}
         {tooltipEl}
+        {detailEl}
       </div>
 
       {/* Panels below chart */}
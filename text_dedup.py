@@ -0,0 +1,108 @@
+"""
+Exact and near-duplicate collapse of texts before encoding.
+Every text is mapped to the text of its group representative, so callers
+encode (or find in the embedding cache) one text per group and the result is
+broadcast to all members:
+  - exact duplicates: same normalized text (embedding_cache.normalize_text);
+  - near duplicates (optional, `jaccard`): Jaccard similarity of the word sets
+    with the representative ≥ jaccard. Candidates come from MinHash signatures
+    banded for LSH; each candidate is confirmed with the exact Jaccard.
+
+The first text of a group (in input order, across calls) is its
+representative, so the grouping does not depend on chunk boundaries. It is
+returned as given, not normalized, so that the model encodes the original.
+"""
+import re, zlib
+import numpy as np
+from embedding_cache import normalize_text
+
+NUM_PERM = 64
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def word_set(text):
+    return frozenset(re.findall(r'\w+', normalize_text(text).lower()))
+
+
+def lsh_bands(jaccard, num_perm=NUM_PERM):
+    """(bands, rows) with bands·rows = num_perm whose S-curve threshold
+    (1/bands)^(1/rows) is the highest one not above `jaccard`, so that pairs
+    at the threshold are likely to share a band."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= jaccard]
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1])) if below else (num_perm, 1)
+
+
+def minhash(word_sets, num_perm=NUM_PERM, seed=0):
+    """(n, num_perm) uint32 MinHash signatures, hashes h(x) = (a·x + b) mod 2^32
+    over CRC32 word hashes; empty sets get all-ones signatures."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+    sig = np.full((len(word_sets), num_perm), 0xFFFFFFFF, dtype=np.uint32)
+    counts = np.array([len(s) for s in word_sets], dtype=np.int64)
+    present = np.flatnonzero(counts > 0)
+    if len(present):
+        words = np.array([zlib.crc32(w.encode('utf-8')) for s in word_sets for w in s], dtype=np.uint64)
+        hashed = ((words[:, None] * a + b) & _MASK32).astype(np.uint32)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sig[present] = np.minimum.reduceat(hashed, starts[present], axis=0)
+    return sig
+
+
+class Deduplicator:
+    """Collapses texts call by call; `jaccard=None` collapses exact duplicates only."""
+
+    def __init__(self, jaccard=None, num_perm=NUM_PERM):
+        self.jaccard = jaccard
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_bands(jaccard, num_perm) if jaccard else (0, 0)
+        self._exact = {}      # normalized text → representative (original) text
+        self._reps = []       # word sets of near-duplicate representatives
+        self._rep_text = []
+        self._buckets = {}    # (band, signature slice) → representative indices
+        self.n_texts = 0
+        self.n_exact = 0      # distinct normalized texts
+        self.n_groups = 0     # representatives left to encode
+
+    def collapse(self, texts):
+        """Representative text for every text of `texts`."""
+        norm = [normalize_text(t) for t in texts]
+        first = {}   # new normalized text → its first original text
+        for t, n in zip(texts, norm):
+            if n not in self._exact:
+                first.setdefault(n, t)
+        new = list(first)
+        self.n_texts += len(texts)
+        self.n_exact += len(new)
+        if not self.jaccard:
+            self._exact.update(first)
+            self.n_groups += len(new)
+            return [self._exact[t] for t in norm]
+
+        sets = [word_set(t) for t in new]
+        sig = minhash(sets, self.num_perm)
+        for t, words, s in zip(new, sets, sig):
+            keys = [(band, s[band * self.rows:(band + 1) * self.rows].tobytes())
+                    for band in range(self.bands)]
+            best, best_j = None, self.jaccard
+            for rep in {r for key in keys for r in self._buckets.get(key, ())}:
+                union = len(words | self._reps[rep])
+                j = len(words & self._reps[rep]) / union if union else 1.0
+                if j >= best_j and (best is None or j > best_j or rep < best):
+                    best, best_j = rep, j
+            if best is None:
+                best = len(self._reps)
+                self._reps.append(words)
+                self._rep_text.append(first[t])
+                for key in keys:
+                    self._buckets.setdefault(key, []).append(best)
+                self.n_groups += 1
+            self._exact[t] = self._rep_text[best]
+        return [self._exact[t] for t in norm]
+
+    def report(self):
+        saved = 1 - self.n_groups / self.n_texts if self.n_texts else 0.0
+        near = f", {self.n_groups} near-duplicate groups (Jaccard ≥ {self.jaccard})" if self.jaccard else ""
+        return (f"Dedup: {self.n_texts} texts, {self.n_exact} distinct{near}; "
+                f"{self.n_texts - self.n_groups} encodings saved ({saved:.1%})")
@@ -0,0 +1,107 @@
+"""
+Indexed document model for the extracted NRIS3 annex.
+The full text is joined once; a line-offset index and a page map are built
+alongside it. Kraj cards and their sections are Views — offset ranges over the
+same string — so parsers never copy or re-split whole sections, and any offset
+can be traced back to its PDF page and line.
+
+Markers passed to the Document are located in one multi-pattern sweep
+(marker_scan); View.find() answers indexed markers from that table and falls
+back to str.find() for anything else.
+"""
+from bisect import bisect_right
+from marker_scan import MarkerScanner
+from pdf_extract import join_pages
+
+
+class Document:
+    def __init__(self, page_texts, page_numbers=None, markers=()):
+        """`page_texts` in page order; `page_numbers` are their 1-based PDF
+        page numbers (default 1..n, override when only some pages were extracted).
+        `markers` are indexed up front, see index_markers()."""
+        page_texts = list(page_texts)
+        self.text = join_pages(page_texts)
+        self.page_numbers = list(page_numbers) if page_numbers is not None else list(range(1, len(page_texts) + 1))
+        self.page_starts = []
+        pos = 0
+        for t in page_texts:
+            self.page_starts.append(pos)
+            pos += len(t) + 2   # join_pages appends "\n\n" to every page
+        self.line_starts = [0]
+        find = self.text.find
+        idx = find('\n')
+        while idx >= 0:
+            self.line_starts.append(idx + 1)
+            idx = find('\n', idx + 1)
+        self.markers = None
+        if markers:
+            self.index_markers(markers)
+
+    def index_markers(self, markers):
+        """Locate every occurrence of `markers` in a single pass over the text."""
+        self.markers = MarkerScanner(markers).scan(self.text)
+        return self.markers
+
+    def __len__(self):
+        return len(self.text)
+
+    def view(self, start=0, end=None):
+        return View(self, start, len(self.text) if end is None else end)
+
+    def locate(self, pos):
+        """(PDF page number, 1-based line within that page) of an offset."""
+        if not self.page_starts:
+            return None, None
+        p = max(0, bisect_right(self.page_starts, pos) - 1)
+        first_line = bisect_right(self.line_starts, self.page_starts[p]) - 1
+        line = bisect_right(self.line_starts, pos) - 1
+        return self.page_numbers[p], line - first_line + 1
+
+
+class View:
+    """Offset range [start, end) of a Document. All offsets are absolute."""
+    __slots__ = ('doc', 'start', 'end')
+
+    def __init__(self, doc, start, end):
+        self.doc = doc
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __bool__(self):
+        return self.end > self.start
+
+    def __str__(self):
+        return self.doc.text[self.start:self.end]
+
+    def view(self, start, end=None):
+        """Sub-view with absolute offsets, clipped to this view."""
+        end = self.end if end is None else min(end, self.end)
+        return View(self.doc, max(start, self.start), end)
+
+    def find(self, sub, start=None, end=None):
+        """Absolute offset of `sub` within this view (and [start, end)), or -1."""
+        start = self.start if start is None else max(start, self.start)
+        end = self.end if end is None else min(end, self.end)
+        markers = self.doc.markers
+        if markers is not None and sub in markers:
+            return markers.find(sub, start, end)
+        return self.doc.text.find(sub, start, end)
+
+    def finditer(self, pattern):
+        """Regex matches within the view, without slicing the text."""
+        return pattern.finditer(self.doc.text, self.start, self.end)
+
+    def lines(self):
+        """(offset, line) pairs — the same pieces as str(view).split('\\n')."""
+        text = self.doc.text
+        starts = self.doc.line_starts
+        i = bisect_right(starts, self.start)
+        pos = self.start
+        while i < len(starts) and starts[i] <= self.end:
+            yield pos, text[pos:starts[i] - 1]
+            pos = starts[i]
+            i += 1
+        yield pos, text[pos:self.end]
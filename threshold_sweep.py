@@ -0,0 +1,87 @@
+"""
+Threshold sweep for THRESHOLD / FORD_THRESHOLD calibration.
+Every project contributes its best semantic similarity and the best FORD
+similarity of its discipline in its kraj once; the per-kraj category counts
+for a whole grid of (semantic, FORD) threshold pairs then follow from one 2-D
+histogram over grid bins and its suffix sums, without re-encoding or
+re-matching anything. Projects can be added chunk by chunk.
+
+Output public/data/vav_threshold_sweep.json, per kraj:
+  celkem     projects in the kraj
+  semantic   [i]     projects with semantic similarity > threshold_semantic[i]
+  ford       [j]     projects with FORD similarity > threshold_ford[j]
+  v_obou     [i][j]  projects above both
+from which jen_semantic = semantic[i] - v_obou[i][j],
+jen_ford = ford[j] - v_obou[i][j] and mimo_vse = celkem - the three.
+"""
+import json
+from pathlib import Path
+import numpy as np
+
+OUT_PATH = Path("public/data/vav_threshold_sweep.json")
+SEMANTIC_GRID = np.round(np.arange(20, 61) / 100, 2)
+FORD_GRID = np.round(np.arange(20, 61) / 100, 2)
+
+
+class ThresholdSweep:
+    def __init__(self, kraje, semantic_grid=SEMANTIC_GRID, ford_grid=FORD_GRID):
+        self.kraje = list(kraje)
+        self.semantic_grid = np.asarray(semantic_grid, dtype=np.float64)
+        self.ford_grid = np.asarray(ford_grid, dtype=np.float64)
+        # Scores are float32 and compared with the thresholds in float32
+        self._semantic_edges = self.semantic_grid.astype(np.float32)
+        self._ford_edges = self.ford_grid.astype(np.float32)
+        # hist[k, a, b]: projects of kraj k above exactly a semantic and b FORD thresholds
+        self.hist = np.zeros((len(self.kraje), len(self.semantic_grid) + 1, len(self.ford_grid) + 1),
+                             dtype=np.int64)
+
+    def add(self, kraj_idx, semantic, ford):
+        """Add projects: kraj index (negative = skipped), best semantic and
+        best FORD similarity (-inf where no match is possible)."""
+        kraj_idx = np.asarray(kraj_idx)
+        keep = kraj_idx >= 0
+        # Grid thresholds strictly below the score, i.e. those the score exceeds
+        a = np.searchsorted(self._semantic_edges, np.asarray(semantic, dtype=np.float32)[keep], side='left')
+        b = np.searchsorted(self._ford_edges, np.asarray(ford, dtype=np.float32)[keep], side='left')
+        np.add.at(self.hist, (kraj_idx[keep], a, b), 1)
+
+    def counts(self):
+        """celkem (K,), semantic (K, S), ford (K, F), v_obou (K, S, F)."""
+        above = self.hist[:, ::-1, ::-1].cumsum(axis=1).cumsum(axis=2)[:, ::-1, ::-1]
+        return above[:, 0, 0], above[:, 1:, 0], above[:, 0, 1:], above[:, 1:, 1:]
+
+    def categories_at(self, semantic_threshold, ford_threshold):
+        """{kraj: {v_obou, jen_semantic, jen_ford, mimo_vse}} at one grid point."""
+        i = int(np.flatnonzero(np.isclose(self.semantic_grid, semantic_threshold))[0])
+        j = int(np.flatnonzero(np.isclose(self.ford_grid, ford_threshold))[0])
+        total, semantic, ford, both = self.counts()
+        return {
+            kraj: {
+                "v_obou": int(both[k, i, j]),
+                "jen_semantic": int(semantic[k, i] - both[k, i, j]),
+                "jen_ford": int(ford[k, j] - both[k, i, j]),
+                "mimo_vse": int(total[k] - semantic[k, i] - ford[k, j] + both[k, i, j]),
+            }
+            for k, kraj in enumerate(self.kraje)
+        }
+
+    def to_json(self, meta=None):
+        total, semantic, ford, both = self.counts()
+        return {
+            "meta": meta or {},
+            "threshold_semantic": self.semantic_grid.tolist(),
+            "threshold_ford": self.ford_grid.tolist(),
+            "kraje": {
+                kraj: {
+                    "celkem": int(total[k]),
+                    "semantic": semantic[k].tolist(),
+                    "ford": ford[k].tolist(),
+                    "v_obou": both[k].tolist(),
+                }
+                for k, kraj in enumerate(self.kraje)
+            },
+        }
+
+    def save(self, path=OUT_PATH, meta=None):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(meta), f, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,48 @@
+"""
+Blocked top-k similarity search.
+Queries are compared with keys in row × column blocks, so the working set is
+bounded by row_block × (col_block + k) scores whatever the number of keys;
+after each column block only the k best candidates per row are kept
+(np.argpartition), and the survivors are sorted once at the end.
+"""
+import numpy as np
+
+
+def merge_topk(best_s, best_i, block, first_index, k):
+    """Merge a (rows, cols) score block whose columns are keys
+    first_index.. into the running top-k candidates (unsorted)."""
+    cand_s = np.concatenate([best_s, block], axis=1)
+    cand_i = np.concatenate([best_i, np.broadcast_to(
+        np.arange(first_index, first_index + block.shape[1]), block.shape)], axis=1)
+    if cand_s.shape[1] > k:
+        keep = np.argpartition(-cand_s, k - 1, axis=1)[:, :k]
+        cand_s = np.take_along_axis(cand_s, keep, axis=1)
+        cand_i = np.take_along_axis(cand_i, keep, axis=1)
+    return cand_s, cand_i
+
+
+def sort_topk(best_s, best_i):
+    """Candidates ordered best first."""
+    order = np.argsort(-best_s, axis=1, kind='stable')
+    return np.take_along_axis(best_s, order, axis=1), np.take_along_axis(best_i, order, axis=1)
+
+
+def blocked_topk(queries, keys, k, row_block=1024, col_block=4096):
+    """(scores, indices) of the k keys with the highest dot product per query,
+    each (n_queries, k), best first. Vectors are expected to be normalized."""
+    queries = np.asarray(queries, dtype=np.float32)
+    keys = np.asarray(keys, dtype=np.float32)
+    k = min(k, len(keys))
+    scores = np.empty((len(queries), k), dtype=np.float32)
+    indices = np.empty((len(queries), k), dtype=np.int64)
+    if k == 0:
+        return scores, indices
+
+    for r0 in range(0, len(queries), row_block):
+        q = queries[r0:r0 + row_block]
+        best_s = np.empty((len(q), 0), dtype=np.float32)
+        best_i = np.empty((len(q), 0), dtype=np.int64)
+        for c0 in range(0, len(keys), col_block):
+            best_s, best_i = merge_topk(best_s, best_i, q @ keys[c0:c0 + col_block].T, c0, k)
+        scores[r0:r0 + len(q)], indices[r0:r0 + len(q)] = sort_topk(best_s, best_i)
+    return scores, indices
@@ -0,0 +1,85 @@
+"""
+Summary + per-kraj shards of vav_semantic_match.json for the frontend.
+SlideVavEkosystem.jsx needs only `meta` and the per-kraj `kraje` summary to
+render, so they go to a small public/data/vav_semantic/summary.json with a
+manifest of per-kraj detail shards (raw_scores of one kraj each), fetched
+when a kraj is opened. Shards are always written in the compact columnar
+format of score_columns.py, whatever the format of the full file; the full
+file itself is not published (data/vav_semantic_match.json).
+
+  summary.json   {"meta", "kraje", "shards": {kraj: {"soubor", "pocet_projektu", "bajty"}}}
+  <NUTS>.json    {"meta": {..., "kraj"}, "raw_scores_format", "raw_scores": {kraj: columns}}
+
+compute_vav_semantic.py writes them on every run; an existing full file can
+be split with
+  python vav_shards.py [data/vav_semantic_match.json]
+"""
+import json, re, sys, unicodedata
+from pathlib import Path
+
+DATA_DIR = Path("public/data")
+SHARD_DIR = DATA_DIR / "vav_semantic"
+KODOVNIK_PATH = DATA_DIR / "kraje_kodovnik.json"
+FULL_PATH = Path("data/vav_semantic_match.json")   # all raw_scores, not deployed
+
+
+def shard_names(kraje):
+    """File name per kraj: its NUTS code, or an ASCII slug for unknown names."""
+    codes = {}
+    if KODOVNIK_PATH.exists():
+        with open(KODOVNIK_PATH, encoding="utf-8") as f:
+            codes = {k["nazev"]: k["kod_nuts"] for k in json.load(f)["kraje"]}
+    names = {}
+    for kraj in kraje:
+        slug = codes.get(kraj) or re.sub(r'[^a-z0-9]+', '-', unicodedata.normalize(
+            'NFKD', kraj).encode('ascii', 'ignore').decode().lower()).strip('-')
+        names[kraj] = f"{slug}.json"
+    return names
+
+
+def write_shards(meta, kraje_summary, writer, shard_dir=SHARD_DIR, key="raw_scores"):
+    """One shard per group of `writer` (a score_columns.ColumnarScoresWriter)
+    plus summary.json."""
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    names = shard_names(writer.groups)
+    for stale in shard_dir.glob("*.json"):
+        if stale.name != "summary.json" and stale.name not in names.values():
+            stale.unlink()
+    shards = {}
+    for kraj in writer.groups:
+        path = shard_dir / names[kraj]
+        writer.write(path, {"meta": {**meta, "kraj": kraj}}, key, groups=[kraj])
+        shards[kraj] = {"soubor": names[kraj], "pocet_projektu": writer.counts[kraj],
+                        "bajty": path.stat().st_size}
+    summary_path = shard_dir / "summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "kraje": kraje_summary, "shards": shards}, f, ensure_ascii=False, indent=2)
+    return summary_path, shards
+
+
+def main():
+    from score_columns import ColumnarScoresWriter, read_raw_scores
+
+    sys.stdout.reconfigure(encoding='utf-8')
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else FULL_PATH
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    raw_scores = read_raw_scores(data)
+    kraje = list(raw_scores)
+    if "raw_scores_format" in data:
+        domeny = {k: data["raw_scores"][k]["domeny"] for k in kraje}
+    else:
+        domeny = {k: list(dict.fromkeys(r["best_domena"] for r in raw_scores[k])) for k in kraje}
+    writer = ColumnarScoresWriter(kraje, domeny)
+    for kraj in kraje:
+        writer.append(kraj, raw_scores[kraj])
+    summary_path, shards = write_shards(data["meta"], data["kraje"], writer)
+    writer.close()
+    total = sum(s["bajty"] for s in shards.values())
+    print(f"{path} ({path.stat().st_size} B) → {summary_path} ({summary_path.stat().st_size} B) "
+          f"+ {len(shards)} shards ({total} B)")
+
+
+if __name__ == '__main__':
+    main()